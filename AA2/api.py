@@ -1,5 +1,9 @@
+import json
 from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from src.flows.report_generation_flow import graph
+from src.flows.portfolio_runner import PortfolioRunner, property_ids_from_env
 from src.models.report_models import ReportStateInput
 from typing import Dict, List
 import os
@@ -22,27 +26,36 @@ app = FastAPI(title="GA4 Analytics Report API")
 # Initialize scheduler
 scheduler = AsyncIOScheduler()
 
+# Runs reports for many properties under shared GA and LLM limits
+portfolio_runner = PortfolioRunner.from_config(graph)
+
 async def generate_and_send_report(recipients: List[str] = None):
-    """Generate and send weekly report"""
+    """Generate and send weekly reports for every configured property"""
     try:
-        logger.info("Generating scheduled weekly report")
+        property_ids = property_ids_from_env()
+        logger.info(f"Generating scheduled weekly reports for {len(property_ids)} properties")
         
-        # Default input state
+        # Default input state shared by all properties
         input_data = {
-            "property_id": os.getenv("GA_PROPERTY_ID"),
             "report_type": "weekly",
             "recipients": recipients or [os.getenv("GESPREKSEIGENAAR_EMAIL")]
         }
         
-        # Generate report
-        state_input = ReportStateInput(**input_data)
-        result = await graph.ainvoke(state_input)
-        
-        # Send email
-        subject = f"Weekly Analytics Report - {datetime.now().strftime('%Y-%m-%d')}"
-        send_email(subject, result["final_report"])
-        
-        logger.info("Successfully sent weekly report")
+        # Send each report as soon as it is ready
+        async for outcome in portfolio_runner.stream(property_ids, input_data):
+            if outcome["status"] != "success":
+                logger.error(
+                    f"Error generating scheduled report for property "
+                    f"{outcome['property_id']}: {outcome['error']}"
+                )
+                continue
+            
+            subject = f"Weekly Analytics Report - {datetime.now().strftime('%Y-%m-%d')}"
+            if len(property_ids) > 1:
+                subject += f" (property {outcome['property_id']})"
+            send_email(subject, outcome["result"]["final_report"])
+            
+            logger.info(f"Successfully sent weekly report for property {outcome['property_id']}")
         
     except Exception as e:
         logger.error(f"Error generating/sending scheduled report: {str(e)}", exc_info=True)
@@ -72,10 +85,31 @@ async def generate_report(input_data: Dict, background_tasks: BackgroundTasks):
         state_input = ReportStateInput(**input_data)
         # Invoke graph
         result = await graph.ainvoke(state_input)
-        return result
+        # create_output already replaced the indexes by their summaries
+        return jsonable_encoder(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/generate-reports")
+async def generate_reports(input_data: Dict):
+    """Generate reports for several properties, streamed as NDJSON as they complete"""
+    property_ids = input_data.pop("property_ids", None) or property_ids_from_env()
+    if not property_ids:
+        raise HTTPException(status_code=400, detail="No property_ids given")
+    
+    async def results():
+        async for outcome in portfolio_runner.stream(property_ids, input_data):
+            result = outcome["result"] or {}
+            yield json.dumps({
+                "property_id": outcome["property_id"],
+                "status": outcome["status"],
+                "error": outcome["error"],
+                "duration_seconds": outcome["duration_seconds"],
+                "final_report": result.get("final_report")
+            }) + "\n"
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
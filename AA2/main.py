@@ -5,7 +5,7 @@ from dotenv import load_dotenv
 from langgraph.graph import StateGraph, START, END
 
 from src.flows.report_generation_flow import graph
-from src.models.report_models import ReportStateInput
+from src.flows.portfolio_runner import PortfolioRunner, property_ids_from_env
 
 # Configure logging
 logging.basicConfig(
@@ -22,7 +22,6 @@ async def main():
         # Validate required environment variables
         required_vars = [
             'OPENAI_API_KEY',
-            'GA_PROPERTY_ID',
             'GA_CLIENT_ID',
             'GA_CLIENT_SECRET',
             'GA_REFRESH_TOKEN',
@@ -34,23 +33,33 @@ async def main():
         ]
         
         missing_vars = [var for var in required_vars if not os.getenv(var)]
+        # Either a single GA_PROPERTY_ID or a comma-separated GA_PROPERTY_IDS
+        property_ids = property_ids_from_env()
+        if not property_ids:
+            missing_vars.append('GA_PROPERTY_ID (or GA_PROPERTY_IDS)')
         if missing_vars:
             raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
-        # Define input state
-        input_state = ReportStateInput(property_id=os.getenv('GA_PROPERTY_ID'))
+        # Execute the graph for every property, printing reports as they complete
+        runner = PortfolioRunner.from_config(graph)
+        failed = []
+        async for outcome in runner.stream(property_ids):
+            result = outcome['result']
+            if outcome['status'] == 'success' and isinstance(result, dict) and 'final_report' in result:
+                logger.info(f"Final report generated successfully for property {outcome['property_id']}")
+                print(f"\nFinal Report (property {outcome['property_id']}):")
+                print("-------------")
+                print(result['final_report'])
+            else:
+                failed.append(outcome['property_id'])
+                logger.warning(
+                    f"No final report generated for property {outcome['property_id']}: "
+                    f"{outcome['error']}"
+                )
+                logger.debug(f"Output type: {type(result)}, content: {result}")
 
-        # Execute the graph
-        result = await graph.ainvoke(input_state)
-        
-        if isinstance(result, dict) and 'final_report' in result:
-            logger.info("Final report generated successfully")
-            print("\nFinal Report:")
-            print("-------------")
-            print(result['final_report'])
-        else:
-            logger.warning("No final report generated in output")
-            logger.debug(f"Output type: {type(result)}, content: {result}")
+        if failed:
+            logger.warning(f"Reports failed for {len(failed)} of {len(property_ids)} properties: {failed}")
 
     except Exception as e:
         logger.error(f"An error occurred: {str(e)}", exc_info=True)
@@ -0,0 +1,211 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+import numpy as np
+from src.connectors.columnar import DimensionColumn, scoped_vocabulary
+from src.utils.metric_aggregation import RATIO_WEIGHT_METRIC, aggregation_kind
+
+class AggregateIndex:
+    """Top-N, bottom-N and biggest movers per dimension, computed once per run."""
+
+    def __init__(self, metrics: List[str], n: int = 5, min_sessions: float = 30):
+        """
+        Initialize an empty index.
+
+        Args:
+            metrics: Metric names
+            n: Number of values kept per list
+            min_sessions: Sessions a dimension value needs in the current
+                period to be ranked (in either period to be a mover), so
+                single-visit pages do not crowd the lists
+        """
+        self.metrics = list(metrics)
+        self.n = n
+        self.min_sessions = min_sessions
+        self._is_mean = np.array([aggregation_kind(metric) == 'mean' for metric in self.metrics])
+        self._slices: Dict[str, Dict[str, Dict[str, List[Dict[str, Any]]]]] = {}
+
+    @property
+    def dimensions(self) -> List[str]:
+        """Names of the indexed dimensions."""
+        return list(self._slices)
+
+    def add_dimension(
+        self,
+        dimension: str,
+        current_rows: List[Dict[str, Any]],
+        previous_rows: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Rank the values of a dimension by every metric.
+
+        Args:
+            dimension: Dimension name
+            current_rows: Rows by the dimension for the current period
+            previous_rows: Rows by the dimension for the previous period
+        """
+        if not current_rows and not previous_rows:
+            self._slices[dimension] = {metric: {'top': [], 'bottom': [], 'movers': []} for metric in self.metrics}
+            return
+        # The periods are joined on vocabulary codes (shared by every report
+        # of the run inside a vocabulary_scope) rather than on strings
+        vocabulary = scoped_vocabulary(dimension)
+        labels = DimensionColumn.encode(
+            [str(row.get(dimension)) for row in current_rows] + [str(row.get(dimension)) for row in previous_rows],
+            vocabulary
+        )
+        used, codes = np.unique(labels.code_array(), return_inverse=True)
+        names = [vocabulary.values[code] for code in used.tolist()]
+        current = self._matrix(current_rows, codes[:len(current_rows)], len(names))
+        previous = self._matrix(previous_rows, codes[len(current_rows):], len(names))
+
+        # GA omits values without activity, so values missing from the
+        # current period only rank as movers; a ratio needs both periods to move
+        present = np.zeros(len(names), dtype=bool)
+        present[codes[:len(current_rows)]] = True
+        present_before = np.zeros(len(names), dtype=bool)
+        present_before[codes[len(current_rows):]] = True
+        if RATIO_WEIGHT_METRIC in self.metrics:
+            column = self.metrics.index(RATIO_WEIGHT_METRIC)
+            ranked = present & (current[:, column] >= self.min_sessions)
+            moving = np.maximum(current[:, column], previous[:, column]) >= self.min_sessions
+        else:
+            ranked = present
+            moving = np.ones(len(names), dtype=bool)
+        ranked = np.broadcast_to(ranked[:, None], current.shape)
+        moving = moving[:, None] & (~self._is_mean[None, :] | (present & present_before)[:, None])
+
+        delta = current - previous
+        with np.errstate(invalid='ignore', divide='ignore'):
+            growth_rate = np.where(previous != 0, delta / np.abs(previous) * 100, np.nan)
+
+        # Rank every metric at once; ineligible values sort last
+        top_order = np.argsort(np.where(ranked, -current, np.inf), axis=0, kind='stable')
+        bottom_order = np.argsort(np.where(ranked, current, np.inf), axis=0, kind='stable')
+        mover_order = np.argsort(np.where(moving, -np.abs(delta), np.inf), axis=0, kind='stable')
+
+        def entries(
+            order: np.ndarray,
+            eligible: np.ndarray,
+            column: int,
+            exclude: Optional[set] = None
+        ) -> List[Dict[str, Any]]:
+            picked = []
+            for code in order[:int(eligible[:, column].sum()), column]:
+                if exclude and code in exclude:
+                    continue
+                picked.append(code)
+                if len(picked) == self.n:
+                    break
+            return [
+                {
+                    'value': str(names[code]),
+                    'current': round(float(current[code, column]), 4),
+                    'previous': round(float(previous[code, column]), 4),
+                    'delta': round(float(delta[code, column]), 4),
+                    'growth_rate': None if np.isnan(growth_rate[code, column])
+                    else round(float(growth_rate[code, column]), 2)
+                }
+                for code in picked
+            ]
+
+        slices = {}
+        for column, metric in enumerate(self.metrics):
+            top = entries(top_order, ranked, column)
+            slices[metric] = {
+                'top': top,
+                # Values already listed on top are not repeated at the bottom
+                'bottom': entries(bottom_order, ranked, column, {
+                    code for code in top_order[:len(top), column]
+                }),
+                'movers': [
+                    entry for entry in entries(mover_order, moving, column) if entry['delta'] != 0
+                ]
+            }
+        self._slices[dimension] = slices
+
+    def slices(self, dimensions: List[str], metrics: List[str]) -> Dict[str, Dict[str, Dict[str, List[Dict[str, Any]]]]]:
+        """
+        Get the ranked lists of some dimensions and metrics.
+
+        Args:
+            dimensions: Dimension names (unindexed ones are skipped)
+            metrics: Metric names (unknown ones are skipped)
+
+        Returns:
+            Dictionary mapping dimension to metric to {'top', 'bottom',
+            'movers'} lists of {'value', 'current', 'previous', 'delta',
+            'growth_rate'}
+        """
+        return {
+            dimension: {
+                metric: self._slices[dimension][metric]
+                for metric in metrics
+                if metric in self._slices[dimension]
+            }
+            for dimension in dimensions
+            if dimension in self._slices
+        }
+
+    def format(
+        self,
+        dimensions: List[str],
+        metrics: List[str],
+        insignificant: Optional[Set[Tuple[str, str, str]]] = None
+    ) -> str:
+        """
+        Render the ranked lists of some dimensions and metrics for a prompt.
+
+        Args:
+            dimensions: Dimension names
+            metrics: Metric names
+            insignificant: Optional (dimension, metric, value) movers whose
+                change was tested and found not significant; they are left out
+
+        Returns:
+            Compact text with one line per list
+        """
+        lines = []
+        for dimension, by_metric in self.slices(dimensions, metrics).items():
+            for metric, lists in by_metric.items():
+                for kind, label in (('top', 'top'), ('bottom', 'bottom'), ('movers', 'biggest movers')):
+                    entries = lists[kind]
+                    if kind == 'movers' and insignificant:
+                        entries = [
+                            entry for entry in entries
+                            if (dimension, metric, entry['value']) not in insignificant
+                        ]
+                    if not entries:
+                        continue
+                    values = ", ".join(_format_entry(entry, kind == 'movers') for entry in entries)
+                    lines.append(f"{dimension} by {metric}, {label}: {values}")
+        return "\n".join(lines) if lines else "No dimension breakdowns available."
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Describe the index in JSON-serializable form, e.g. for API responses.
+
+        Returns:
+            Dictionary with the ranked lists of every dimension and metric
+        """
+        return self.slices(self.dimensions, self.metrics)
+
+    def _matrix(self, rows: List[Dict[str, Any]], codes: np.ndarray, size: int) -> np.ndarray:
+        """Metric values per dimension value (values x metrics)."""
+        matrix = np.zeros((size, len(self.metrics)))
+        if rows:
+            values = np.array(
+                [[row.get(metric) or 0 for metric in self.metrics] for row in rows],
+                dtype=np.float64
+            ).reshape(len(rows), len(self.metrics))
+            # A value appears once per period, so plain assignment suffices
+            matrix[codes] = values
+        return matrix
+
+def _format_entry(entry: Dict[str, Any], with_change: bool) -> str:
+    """Render one ranked value."""
+    text = f"{entry['value']} {entry['current']:.4g}"
+    if with_change:
+        if entry['growth_rate'] is None:
+            text += f" (from {entry['previous']:.4g})"
+        else:
+            text += f" ({entry['growth_rate']:+.1f}%)"
+    return text
@@ -0,0 +1,260 @@
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from src.analytics.window_index import WindowIndex
+
+def weekday_factors(values: np.ndarray, weekdays: np.ndarray) -> np.ndarray:
+    """
+    Estimate multiplicative weekday seasonality of daily series.
+
+    Args:
+        values: Matrix of shape series x days
+        weekdays: Weekday of each day (Monday is 0)
+
+    Returns:
+        Matrix of shape series x 7 with the mean of each weekday relative to
+        the overall mean (1 where a series has no activity)
+    """
+    one_hot = weekdays[:, None] == np.arange(7)[None, :]
+    counts = np.maximum(one_hot.sum(axis=0), 1)
+    weekday_means = (values @ one_hot) / counts
+    overall = values.mean(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        factors = np.where(overall > 0, weekday_means / overall, 1.0)
+    # A weekday without activity would make every later value infinitely unusual
+    return np.where(factors > 0, factors, 1.0)
+
+def rolling_zscores(
+    values: np.ndarray,
+    window: int,
+    counts: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Score each day against the trailing window of days before it.
+
+    Means and deviations come from cumulative sums of the values and their
+    squares, so every window of every series costs the same.
+
+    Args:
+        values: Matrix of shape series x days
+        window: Number of preceding days forming the baseline
+        counts: Optional flag per series marking counts, whose deviation is
+            floored at Poisson noise so near-constant baselines do not turn
+            small wobbles into huge scores
+
+    Returns:
+        Tuple of (z-scores, baseline means, baseline standard deviations),
+        each series x days; days without a full baseline have NaN scores
+    """
+    series, days = values.shape
+    cumulative = np.pad(np.cumsum(values, axis=1), ((0, 0), (1, 0)))
+    cumulative_squares = np.pad(np.cumsum(values ** 2, axis=1), ((0, 0), (1, 0)))
+
+    ends = np.arange(days)
+    starts = np.maximum(ends - window, 0)
+    lengths = (ends - starts).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = (cumulative[:, ends] - cumulative[:, starts]) / lengths
+        variances = (cumulative_squares[:, ends] - cumulative_squares[:, starts]) / lengths - means ** 2
+        deviations = np.sqrt(np.maximum(variances, 0.0))
+        floor = np.abs(means) * 0.01
+        if counts is not None:
+            floor = np.where(counts[:, None], np.maximum(floor, np.sqrt(np.abs(means))), floor)
+        scores = (values - means) / np.maximum(deviations, np.maximum(floor, 1e-9))
+    scores[:, lengths < window] = np.nan
+    return scores, means, deviations
+
+def changepoints(
+    values: np.ndarray,
+    min_segment: int = 7,
+    first_split: int = 0,
+    baseline: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the most likely shift in level of each series.
+
+    Every split point is tested at once with a two-sample t statistic whose
+    segment means and pooled variance come from cumulative sums.
+
+    Args:
+        values: Matrix of shape series x days
+        min_segment: Minimum number of days on either side of a shift
+        first_split: Earliest day a shift may start, so an older shift does
+            not hide a recent one
+        baseline: Optional number of days before a shift its level is
+            compared with (defaults to every earlier day), so older shifts
+            do not blur the level before a recent one
+
+    Returns:
+        Tuple of (day of the shift, t statistic, mean before, mean after),
+        one entry per series; the day is -1 where the series is too short
+    """
+    series, days = values.shape
+    splits = np.arange(max(min_segment, first_split), days - min_segment + 1)
+    if len(splits) == 0:
+        empty = np.zeros(series)
+        return np.full(series, -1), empty, empty, empty
+
+    cumulative = np.pad(np.cumsum(values, axis=1), ((0, 0), (1, 0)))
+    cumulative_squares = np.pad(np.cumsum(values ** 2, axis=1), ((0, 0), (1, 0)))
+    starts = np.maximum(splits - baseline, 0) if baseline else np.zeros_like(splits)
+    left_n = (splits - starts).astype(np.float64)
+    right_n = (days - splits).astype(np.float64)
+    left_sum = cumulative[:, splits] - cumulative[:, starts]
+    right_sum = cumulative[:, -1:] - cumulative[:, splits]
+    left_mean = left_sum / left_n
+    right_mean = right_sum / right_n
+    # Within-segment sums of squares around each segment's own mean
+    squares = (
+        cumulative_squares[:, -1:] - cumulative_squares[:, starts]
+        - left_sum * left_mean - right_sum * right_mean
+    )
+    pooled = np.maximum(squares, 0.0) / (left_n + right_n - 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        statistics = np.abs(right_mean - left_mean) / np.sqrt(pooled * (1 / left_n + 1 / right_n))
+    statistics = np.nan_to_num(statistics, nan=0.0, posinf=0.0)
+
+    best = statistics.argmax(axis=1)
+    rows = np.arange(series)
+    return splits[best], statistics[rows, best], left_mean[rows, best], right_mean[rows, best]
+
+def detect_anomalies(
+    index: WindowIndex,
+    lookback_days: int = 90,
+    window: int = 28,
+    recent_days: int = 7,
+    shift_days: int = 28,
+    z_threshold: float = 3.0,
+    changepoint_threshold: float = 6.0,
+    min_shift: float = 0.15,
+    top_values: int = 5,
+    max_anomalies: int = 20
+) -> List[Dict[str, Any]]:
+    """
+    Flag unusual days and level shifts in the indexed daily series.
+
+    Every metric is checked property-wide and for the largest values (by
+    sessions) of each indexed dimension. Series are deseasonalized by
+    weekday, each recent day is scored against the trailing window before
+    it, and the strongest shift in level starting within the last
+    shift_days is tested against the window of days before it.
+
+    Args:
+        index: Daily series of the property
+        lookback_days: Days of history used for seasonality and shifts
+        window: Days of baseline each day is scored against
+        recent_days: Days at the end of the series that are reported on
+        shift_days: Days at the end of the series in which a level shift
+            must start to be reported
+        z_threshold: Absolute z-score at which a day is flagged
+        changepoint_threshold: t statistic at which a level shift is flagged
+        min_shift: Minimum relative change in level of a flagged shift
+        top_values: Values per dimension to check
+        max_anomalies: Maximum number of anomalies returned
+
+    Returns:
+        Anomalies ordered by severity, each a dict with 'type' ('spike',
+        'drop' or 'level_shift'), 'metric', 'dimension', 'value', 'date',
+        'actual', 'expected', 'change_pct', 'score' (z-score or t statistic)
+        and 'severity' (absolute score relative to its type's threshold, so
+        both types rank on one scale)
+    """
+    days = min(lookback_days, len(index.dates) - index.first_active)
+    if days < window + recent_days or not index.metrics:
+        return []
+    dates = index.dates[-days:]
+
+    labels, values, missing = index.stacked_series(days, top_values)
+    is_mean = np.array([index.kinds[index.metrics.index(metric)] == 'mean' for metric, _, _ in labels])
+
+    weekdays = (dates.astype(np.int64) + 3) % 7
+    baseline_days = days - recent_days
+    factors = weekday_factors(values[:, :baseline_days], weekdays[:baseline_days])
+    seasonal = factors[:, weekdays]
+    adjusted = values / seasonal
+
+    anomalies = []
+
+    # Unusual recent days, one per series (its most extreme day)
+    scores, means, _ = rolling_zscores(adjusted, window, ~is_mean)
+    scores[missing] = np.nan
+    recent_scores = np.nan_to_num(scores[:, -recent_days:], nan=0.0)
+    worst = np.abs(recent_scores).argmax(axis=1)
+    worst_scores = recent_scores[np.arange(len(labels)), worst]
+    for series in np.flatnonzero(np.abs(worst_scores) >= z_threshold):
+        day = days - recent_days + worst[series]
+        expected = means[series, day] * seasonal[series, day]
+        actual = values[series, day]
+        anomalies.append(_anomaly(
+            'spike' if worst_scores[series] > 0 else 'drop',
+            labels[series], dates[day], actual, expected, worst_scores[series], z_threshold
+        ))
+
+    # Recent shifts in level, against the level of the window before them
+    shift_starts, statistics, before, after = changepoints(
+        adjusted, first_split=days - shift_days, baseline=window
+    )
+    with np.errstate(invalid='ignore', divide='ignore'):
+        shifts = np.where(before != 0, (after - before) / np.abs(before), 0.0)
+    flagged = (shift_starts >= 0) & (statistics >= changepoint_threshold) & (np.abs(shifts) >= min_shift)
+    for series in np.flatnonzero(flagged):
+        anomalies.append(_anomaly(
+            'level_shift', labels[series], dates[shift_starts[series]],
+            after[series], before[series], statistics[series], changepoint_threshold
+        ))
+
+    # z-scores and t statistics have different scales, so rank by how far
+    # each exceeds the threshold of its own test
+    anomalies.sort(key=lambda anomaly: anomaly['severity'], reverse=True)
+    return anomalies[:max_anomalies]
+
+def format_anomalies(anomalies: List[Dict[str, Any]]) -> str:
+    """
+    Render anomalies as compact lines for a prompt.
+
+    Args:
+        anomalies: Output of detect_anomalies
+
+    Returns:
+        One line per anomaly, or a note that none were found
+    """
+    if not anomalies:
+        return "No anomalies detected."
+    lines = []
+    for anomaly in anomalies:
+        scope = f" ({anomaly['dimension']} = {anomaly['value']})" if anomaly['dimension'] else ""
+        if anomaly['type'] == 'level_shift':
+            lines.append(
+                f"- {anomaly['date']}: level shift in {anomaly['metric']}{scope}, daily average "
+                f"{anomaly['expected']:.4g} -> {anomaly['actual']:.4g} ({anomaly['change_pct']:+.1f}%)"
+            )
+        else:
+            lines.append(
+                f"- {anomaly['date']}: {anomaly['type']} in {anomaly['metric']}{scope}, "
+                f"{anomaly['actual']:.4g} vs {anomaly['expected']:.4g} expected "
+                f"({anomaly['change_pct']:+.1f}%, z = {anomaly['score']:.1f})"
+            )
+    return "\n".join(lines)
+
+def _anomaly(
+    kind: str,
+    label: Tuple[str, Optional[str], Optional[str]],
+    day: np.datetime64,
+    actual: float,
+    expected: float,
+    score: float,
+    threshold: float
+) -> Dict[str, Any]:
+    """Build one anomaly record."""
+    metric, dimension, value = label
+    return {
+        'type': kind,
+        'metric': metric,
+        'dimension': dimension,
+        'value': value,
+        'date': str(day),
+        'actual': round(float(actual), 4),
+        'expected': round(float(expected), 4),
+        'change_pct': round(float((actual - expected) / abs(expected) * 100), 2) if expected else 0.0,
+        'score': round(float(score), 2),
+        'severity': round(float(abs(score) / threshold), 2)
+    }
@@ -0,0 +1,332 @@
+import re
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from src.connectors.columnar import DimensionColumn, Vocabulary
+from src.utils.metric_aggregation import RATIO_WEIGHT_METRIC, aggregation_kind
+
+# Everyday names of GA4 fields, in addition to their API names and the words
+# of their camelCase names, used to find the fields a piece of text mentions
+FIELD_ALIASES = {
+    'sessionDefaultChannelGroup': ['channel', 'channels', 'traffic source', 'acquisition'],
+    'firstUserSource': ['source', 'sources', 'referrer', 'referrers'],
+    'firstUserMedium': ['medium', 'mediums', 'media'],
+    'deviceCategory': ['device', 'devices', 'mobile', 'desktop', 'tablet'],
+    'country': ['countries', 'geography', 'geographic', 'region', 'regions'],
+    'city': ['cities'],
+    'pagePath': ['page', 'pages', 'content', 'landing'],
+    'landingPage': ['landing page', 'landing pages'],
+    'date': ['daily', 'trend', 'trends'],
+    'totalUsers': ['users', 'audience', 'visitors'],
+    'activeUsers': ['active users', 'users'],
+    'newUsers': ['new users', 'acquisition'],
+    'sessions': ['sessions', 'visits', 'traffic'],
+    'averageSessionDuration': ['duration', 'time on site', 'session length'],
+    'screenPageViews': ['page views', 'pageviews', 'views'],
+    'eventCount': ['events', 'interactions'],
+    'engagementRate': ['engagement', 'engaged'],
+    'bounceRate': ['bounce', 'bounces'],
+    'conversions': ['conversion', 'conversions', 'goals'],
+}
+
+Rollup = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+class GACube:
+    """Dictionary-encoded cube over fetched GA4 rows with precomputed roll-ups."""
+
+    def __init__(self, metrics: List[str], vocabularies: Optional[Dict[str, Vocabulary]] = None):
+        """
+        Initialize an empty cube.
+
+        Args:
+            metrics: Metric names
+            vocabularies: Optional dimension vocabularies shared with the
+                other reports of the run (see vocabulary_scope), so the
+                cube's codes are theirs
+        """
+        self.metrics = list(metrics)
+        self.kinds = [aggregation_kind(metric) for metric in self.metrics]
+        self._is_mean = np.array([kind == 'mean' for kind in self.kinds], dtype=bool)
+        self._weight_column = (
+            self.metrics.index(RATIO_WEIGHT_METRIC) if RATIO_WEIGHT_METRIC in self.metrics else None
+        )
+
+        # Dimensions in order of appearance, and their vocabularies
+        self._dimensions: List[str] = []
+        self._vocabularies: Dict[str, Vocabulary] = vocabularies if vocabularies is not None else {}
+        # Fact tables: (dimensions, codes per dimension, weighted metric matrix, weights)
+        self._tables: List[Tuple[Tuple[str, ...], Dict[str, np.ndarray], np.ndarray, np.ndarray]] = []
+        # Sorted dimension tuple -> (group codes, weighted sums, weight sums)
+        self._rollups: Dict[Tuple[str, ...], Rollup] = {}
+        self._filters: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_window(
+        cls,
+        window: Dict[str, Any],
+        vocabularies: Optional[Dict[str, Vocabulary]] = None
+    ) -> 'GACube':
+        """
+        Build a cube from a fetched window.
+
+        Args:
+            window: Window in the format of GoogleAnalyticsConnector.fetch_data;
+                planned reports under 'breakdowns' (see QueryPlanner.fetch)
+                each become a fact table
+            vocabularies: Optional dimension vocabularies of the run
+
+        Returns:
+            GACube with its roll-ups computed
+        """
+        metrics = [header['name'] for header in window.get('metric_headers', [])]
+        cube = cls(metrics, vocabularies)
+        reports = window.get('breakdowns') or {'+'.join(window.get('dimension_headers', [])): window}
+        for report in reports.values():
+            cube.add_table(report.get('dimension_headers', []), report.get('rows', []))
+        cube.build_rollups()
+        return cube
+
+    @property
+    def dimensions(self) -> List[str]:
+        """Names of all dimensions in the cube."""
+        return list(self._dimensions)
+
+    def values(self, dimension: str) -> List[str]:
+        """
+        Get the distinct values of a dimension.
+
+        Args:
+            dimension: Dimension name
+
+        Returns:
+            Values in the cube's tables, in code order
+        """
+        codes = np.unique(np.concatenate(
+            [table[1][dimension] for table in self._tables if dimension in table[1]] or [np.zeros(0, dtype=np.int64)]
+        ))
+        names = self._vocabularies[dimension].values
+        return [names[code] for code in codes.tolist()]
+
+    def add_table(self, dimensions: Sequence[str], rows: Sequence[Dict[str, Any]]) -> None:
+        """
+        Add the rows of one report, dictionary-encoding its dimensions.
+
+        Args:
+            dimensions: Dimension names of the report
+            rows: Report rows
+        """
+        codes = {dimension: self._encode(dimension, [row.get(dimension) for row in rows]) for dimension in dimensions}
+        values = np.array(
+            [[row.get(metric) or 0 for metric in self.metrics] for row in rows],
+            dtype=np.float64
+        ).reshape(len(rows), len(self.metrics))
+        weights = values[:, self._weight_column] if self._weight_column is not None else np.ones(len(rows))
+        # Ratio metrics are stored multiplied by sessions so sums stay additive
+        weighted = values.copy()
+        weighted[:, self._is_mean] *= weights[:, None]
+        self._tables.append((tuple(dimensions), codes, weighted, weights))
+
+    def build_rollups(self) -> None:
+        """Precompute the roll-up of every dimension and every pair of dimensions."""
+        for size in (1, 2):
+            for group in combinations(sorted(self.dimensions), size):
+                table = self._table(group)
+                if table is not None:
+                    self._rollups[group] = self._aggregate(table, group, None)
+
+    def dice(self, filters: Dict[str, Any]) -> 'GACube':
+        """
+        Restrict the cube to some values of some dimensions.
+
+        Args:
+            filters: Dimension name -> value or list of values to keep
+
+        Returns:
+            View of the cube sharing its tables; unknown values match nothing
+        """
+        view = GACube.__new__(GACube)
+        view.__dict__.update(self.__dict__)
+        view._filters = dict(self._filters)
+        for dimension, values in filters.items():
+            if dimension not in self._dimensions:
+                raise KeyError(f"Dimension {dimension} is not in the cube, expected one of {self.dimensions}")
+            values = [values] if isinstance(values, str) else list(values)
+            vocabulary = self._vocabularies[dimension]
+            codes = np.array(
+                [code for code in map(vocabulary.code, values) if code is not None], dtype=np.int64
+            )
+            if dimension in view._filters:
+                codes = np.intersect1d(view._filters[dimension], codes)
+            view._filters[dimension] = codes
+        return view
+
+    def slice(self, dimension: str, value: str) -> 'GACube':
+        """
+        Restrict the cube to one value of a dimension.
+
+        Args:
+            dimension: Dimension name
+            value: Value to keep
+
+        Returns:
+            View of the cube (see dice)
+        """
+        return self.dice({dimension: [value]})
+
+    def group_by(
+        self,
+        dimensions: Sequence[str],
+        metrics: Optional[Sequence[str]] = None,
+        order_by: Optional[str] = None,
+        ascending: bool = False,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Aggregate metrics per combination of dimension values.
+
+        Unfiltered groupings of one or two dimensions come from the
+        precomputed roll-ups; others are computed with one pass over the
+        smallest fact table holding the dimensions. Counts are summed,
+        ratios and averages are combined as a mean weighted by sessions and
+        unique-user metrics are summed over rows (an upper bound when the
+        table has other dimensions).
+
+        Args:
+            dimensions: Dimensions to group by (empty for the grand total)
+            metrics: Metrics to return (defaults to all)
+            order_by: Metric to sort by (defaults to sessions, else the first metric)
+            ascending: Sort ascending instead of descending
+            limit: Maximum number of groups returned
+
+        Returns:
+            Rows with the dimension values and metric values of each group
+        """
+        dimensions = list(dimensions)
+        metrics = list(metrics) if metrics is not None else self.metrics
+        unknown = [dimension for dimension in dimensions if dimension not in self._dimensions]
+        if unknown:
+            raise KeyError(f"Dimensions {unknown} are not in the cube, expected one of {self.dimensions}")
+
+        key = tuple(sorted(dimensions))
+        if not self._filters and key in self._rollups:
+            group_codes, sums, weight_sums = self._rollups[key]
+            # Roll-ups are stored in sorted dimension order
+            group_codes = group_codes[:, [key.index(dimension) for dimension in dimensions]]
+        else:
+            table = self._table(tuple(dimensions) + tuple(self._filters))
+            if table is None:
+                raise KeyError(f"No fetched report holds dimensions {dimensions + list(self._filters)}")
+            group_codes, sums, weight_sums = self._aggregate(table, tuple(dimensions), self._filters)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = sums.copy()
+            result[:, self._is_mean] = np.where(
+                weight_sums[:, None] > 0, sums[:, self._is_mean] / weight_sums[:, None], 0.0
+            )
+
+        sort_metric = order_by or (RATIO_WEIGHT_METRIC if RATIO_WEIGHT_METRIC in self.metrics else self.metrics[0])
+        order = np.argsort(result[:, self.metrics.index(sort_metric)], kind='stable')
+        if not ascending:
+            order = order[::-1]
+        if limit is not None:
+            order = order[:limit]
+
+        columns = [self.metrics.index(metric) for metric in metrics]
+        return [
+            {
+                **{dimension: self._vocabularies[dimension].values[group_codes[group, position]]
+                   for position, dimension in enumerate(dimensions)},
+                **{metric: float(result[group, column]) for metric, column in zip(metrics, columns)}
+            }
+            for group in order
+        ]
+
+    def total(self, metrics: Optional[Sequence[str]] = None) -> Dict[str, float]:
+        """
+        Aggregate metrics over the whole (possibly filtered) cube.
+
+        Args:
+            metrics: Metrics to return (defaults to all)
+
+        Returns:
+            Dictionary mapping metric name to value
+        """
+        rows = self.group_by([], metrics)
+        return rows[0] if rows else {metric: 0.0 for metric in (metrics or self.metrics)}
+
+    def match(self, text: str) -> Tuple[List[str], List[str]]:
+        """
+        Find the metrics and dimensions of the cube a text refers to.
+
+        Fields match by API name, by the words of their camelCase name
+        (e.g. 'device category') or by an everyday alias from FIELD_ALIASES.
+
+        Args:
+            text: Text such as a section name and description
+
+        Returns:
+            Tuple of (metrics, dimensions) mentioned, in cube order
+        """
+        text = text.lower()
+
+        def mentioned(field: str) -> bool:
+            words = re.sub(r'(?<!^)(?=[A-Z])', ' ', field).lower()
+            names = [field.lower(), words] + FIELD_ALIASES.get(field, [])
+            return any(re.search(rf"\b{re.escape(name)}\b", text) for name in names)
+
+        return (
+            [metric for metric in self.metrics if mentioned(metric)],
+            [dimension for dimension in self.dimensions if mentioned(dimension)]
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Describe the cube in JSON-serializable form, e.g. for API responses.
+
+        Returns:
+            Dictionary with the metrics, the cardinality of each dimension and
+            the dimensions of each fact table
+        """
+        return {
+            'metrics': self.metrics,
+            'dimensions': {dimension: len(self.values(dimension)) for dimension in self._dimensions},
+            'tables': [list(table[0]) for table in self._tables],
+        }
+
+    def _encode(self, dimension: str, values: List[Any]) -> np.ndarray:
+        """Dictionary-encode values, extending the dimension's vocabulary."""
+        if dimension not in self._dimensions:
+            self._dimensions.append(dimension)
+        vocabulary = self._vocabularies.get(dimension)
+        if vocabulary is None:
+            vocabulary = self._vocabularies.setdefault(dimension, Vocabulary())
+        column = DimensionColumn.encode([str(value) for value in values], vocabulary)
+        return column.code_array().astype(np.int64)
+
+    def _table(self, dimensions: Tuple[str, ...]):
+        """The fact table with the fewest dimensions holding all given ones."""
+        candidates = [table for table in self._tables if set(dimensions) <= set(table[0])]
+        return min(candidates, key=lambda table: len(table[0])) if candidates else None
+
+    def _aggregate(self, table, dimensions: Tuple[str, ...], filters: Optional[Dict[str, np.ndarray]]) -> Rollup:
+        """Group a fact table by dimensions, after applying filters."""
+        _, codes, weighted, weights = table
+        mask = np.ones(len(weights), dtype=bool)
+        for dimension, allowed in (filters or {}).items():
+            mask &= np.isin(codes[dimension], allowed)
+        if not dimensions:
+            return (
+                np.zeros((1, 0), dtype=np.int64),
+                weighted[mask].sum(axis=0, keepdims=True),
+                np.array([weights[mask].sum()])
+            )
+
+        stacked = np.stack([codes[dimension][mask] for dimension in dimensions], axis=1)
+        group_codes, inverse = np.unique(stacked, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        sums = np.stack([
+            np.bincount(inverse, weights=weighted[mask, column], minlength=len(group_codes))
+            for column in range(len(self.metrics))
+        ], axis=1) if len(self.metrics) else np.zeros((len(group_codes), 0))
+        weight_sums = np.bincount(inverse, weights=weights[mask], minlength=len(group_codes))
+        return group_codes, sums, weight_sums
@@ -0,0 +1,253 @@
+from itertools import product
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from src.analytics.window_index import WindowIndex
+
+# Smoothing parameters tried for every series; each keeps the combination with
+# the smallest one-step error over its history
+ALPHAS = (0.1, 0.3, 0.5)
+BETAS = (0.01, 0.1)
+GAMMAS = (0.05, 0.2, 0.4)
+
+# Damping of the trend, so a short run of growth is not extrapolated forever
+DAMPING = 0.98
+
+# Seasonal period of daily series
+PERIOD = 7
+
+def holt_winters(
+    values: np.ndarray,
+    missing: np.ndarray,
+    horizon: int,
+    period: int = PERIOD,
+    phi: float = DAMPING
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Forecast daily series with additive damped Holt-Winters smoothing.
+
+    Every series and every parameter combination of the grid is smoothed in
+    one pass over the days, so the cost grows with the number of days only.
+
+    Args:
+        values: Matrix of shape series x days, at least two periods long
+        missing: Mask of days that do not update the smoothing
+        horizon: Number of days forecast after the last one
+        period: Seasonal period in days
+        phi: Trend damping factor
+
+    Returns:
+        Tuple of (forecasts of shape series x horizon, one-step residuals of
+        shape series x days, NaN for the first period and missing days)
+    """
+    series, days = values.shape
+    grid = np.array(list(product(ALPHAS, BETAS, GAMMAS)))
+    alpha, beta, gamma = (grid[:, column, None] for column in range(3))
+
+    # Start from the first period's level and the change to the second
+    level = np.broadcast_to(values[:, :period].mean(axis=1), (len(grid), series)).copy()
+    trend = np.broadcast_to(
+        (values[:, period:2 * period].mean(axis=1) - values[:, :period].mean(axis=1)) / period,
+        (len(grid), series)
+    ).copy()
+    season = np.broadcast_to(values[:, :period] - values[:, :period].mean(axis=1, keepdims=True),
+                             (len(grid), series, period)).copy()
+
+    residuals = np.full((len(grid), series, days), np.nan)
+    for day in range(days):
+        phase = day % period
+        predicted = level + phi * trend + season[:, :, phase]
+        # A missing day is replaced by its prediction, leaving the state as is
+        observed = np.where(missing[:, day], predicted, values[:, day])
+        if day >= period:
+            residuals[:, :, day] = np.where(missing[:, day], np.nan, observed - predicted)
+        new_level = alpha * (observed - season[:, :, phase]) + (1 - alpha) * (level + phi * trend)
+        trend = beta * (new_level - level) + (1 - beta) * phi * trend
+        season[:, :, phase] = gamma * (observed - new_level) + (1 - gamma) * season[:, :, phase]
+        level = new_level
+
+    best = _mean_square(residuals).argmin(axis=0)
+    rows = np.arange(series)
+    steps = np.arange(1, horizon + 1)
+    damping = np.cumsum(phi ** steps)
+    phases = (days + steps - 1) % period
+    forecasts = (
+        level[best, rows][:, None]
+        + damping[None, :] * trend[best, rows][:, None]
+        + season[best, rows][:, phases]
+    )
+    return forecasts, residuals[best, rows]
+
+def seasonal_naive(
+    values: np.ndarray,
+    missing: np.ndarray,
+    horizon: int,
+    period: int = PERIOD,
+    weeks: int = 4
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Forecast daily series as the average of the same weekday in recent weeks.
+
+    Args:
+        values: Matrix of shape series x days, at least one period long
+        missing: Mask of days left out of the averages
+        horizon: Number of days forecast after the last one
+        period: Seasonal period in days
+        weeks: Number of recent periods averaged
+
+    Returns:
+        Tuple of (forecasts of shape series x horizon, residuals of each day
+        against the same day a period earlier, NaN where undefined)
+    """
+    series, days = values.shape
+    weeks = max(1, min(weeks, days // period))
+    recent = values[:, days - weeks * period:].reshape(series, weeks, period)
+    present = ~missing[:, days - weeks * period:].reshape(series, weeks, period)
+    counts = present.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        profile = np.where(counts > 0, (recent * present).sum(axis=1) / counts, recent.mean(axis=1))
+    forecasts = profile[:, np.arange(horizon) % period]
+
+    residuals = np.full((series, days), np.nan)
+    residuals[:, period:] = values[:, period:] - values[:, :-period]
+    residuals[missing] = np.nan
+    residuals[:, period:][missing[:, :-period]] = np.nan
+    return forecasts, residuals
+
+FORECASTERS = {
+    'holt_winters': holt_winters,
+    'seasonal_naive': seasonal_naive,
+}
+
+def forecast_metrics(
+    index: WindowIndex,
+    lookback_days: int = 90,
+    horizon: int = 7,
+    top_values: int = 5,
+    method: str = 'holt_winters',
+    z: float = 1.96
+) -> List[Dict[str, Any]]:
+    """
+    Compare the last days of every daily series with their forecast.
+
+    Every metric is forecast property-wide and for the largest values (by
+    sessions) of each indexed dimension, from the history before the last
+    horizon days. Sums over the horizon are compared for count metrics and
+    daily averages for ratio metrics.
+
+    Args:
+        index: Daily series of the property
+        lookback_days: Days of history, horizon included
+        horizon: Days at the end of the series that are forecast
+        top_values: Values per dimension forecast
+        method: Key of FORECASTERS; Holt-Winters falls back to the seasonal
+            naive forecast when the history is shorter than four periods
+        z: Normal quantile of the prediction interval
+
+    Returns:
+        Forecasts ordered by surprise, each a dict with 'metric', 'dimension',
+        'value', 'start', 'end', 'aggregate' ('sum' or 'mean'), 'expected',
+        'actual', 'residual', 'residual_pct', 'lower', 'upper' and 'status'
+        ('above', 'below' or 'within')
+    """
+    if method not in FORECASTERS:
+        raise ValueError(f"Unknown forecast method '{method}', expected one of {list(FORECASTERS)}")
+    days = min(lookback_days, len(index.dates) - index.first_active)
+    history = days - horizon
+    if history < 2 * PERIOD or not index.metrics:
+        return []
+    if method == 'holt_winters' and history < 4 * PERIOD:
+        method = 'seasonal_naive'
+    dates = index.dates[-days:]
+
+    labels, values, missing = index.stacked_series(days, top_values)
+    is_mean = np.array([index.kinds[index.metrics.index(metric)] == 'mean' for metric, _, _ in labels])
+
+    forecasts, residuals = FORECASTERS[method](values[:, :history], missing[:, :history], horizon)
+    if method == 'holt_winters':
+        forecasts = np.where(is_mean[:, None], forecasts, np.maximum(forecasts, 0.0))
+    deviation = np.sqrt(_mean_square(residuals))
+
+    # Ratios are averaged over the days they are defined on
+    present = ~missing[:, history:]
+    counted = np.maximum(present.sum(axis=1), 1)
+    actual_days = values[:, history:]
+    actual = np.where(
+        is_mean,
+        (actual_days * present).sum(axis=1) / counted,
+        actual_days.sum(axis=1)
+    )
+    expected = np.where(
+        is_mean,
+        (forecasts * present).sum(axis=1) / counted,
+        forecasts.sum(axis=1)
+    )
+    spread = z * np.where(is_mean, deviation / np.sqrt(counted), deviation * np.sqrt(horizon))
+    lower = np.where(is_mean, expected - spread, np.maximum(expected - spread, 0.0))
+    upper = expected + spread
+
+    records = []
+    for series, (metric, dimension, value) in enumerate(labels):
+        if is_mean[series] and not present[series].any():
+            continue
+        residual = actual[series] - expected[series]
+        records.append({
+            'metric': metric,
+            'dimension': dimension,
+            'value': value,
+            'start': str(dates[history]),
+            'end': str(dates[-1]),
+            'aggregate': 'mean' if is_mean[series] else 'sum',
+            'expected': round(float(expected[series]), 4),
+            'actual': round(float(actual[series]), 4),
+            'residual': round(float(residual), 4),
+            'residual_pct': round(float(residual / abs(expected[series]) * 100), 2) if expected[series] else None,
+            'lower': round(float(lower[series]), 4),
+            'upper': round(float(upper[series]), 4),
+            'status': 'above' if actual[series] > upper[series]
+            else 'below' if actual[series] < lower[series] else 'within',
+            '_surprise': abs(residual) / spread[series] if spread[series] > 0 else 0.0
+        })
+    records.sort(key=lambda record: record.pop('_surprise'), reverse=True)
+    return records
+
+def format_forecasts(
+    forecasts: List[Dict[str, Any]],
+    metrics: Optional[List[str]] = None,
+    dimensions: Optional[List[str]] = None,
+    limit: int = 10
+) -> str:
+    """
+    Render forecasts as compact lines for a prompt.
+
+    Args:
+        forecasts: Output of forecast_metrics
+        metrics: Metrics to include (all when None)
+        dimensions: Dimensions whose values are included; property-wide
+            forecasts are always included (all dimensions when None)
+        limit: Maximum number of lines
+
+    Returns:
+        One line per forecast, the most surprising first, or a note that none
+        are available
+    """
+    lines = []
+    for forecast in forecasts:
+        if metrics is not None and forecast['metric'] not in metrics:
+            continue
+        if dimensions is not None and forecast['dimension'] and forecast['dimension'] not in dimensions:
+            continue
+        scope = f" ({forecast['dimension']} = {forecast['value']})" if forecast['dimension'] else ""
+        label = "daily average" if forecast['aggregate'] == 'mean' else "total"
+        change = f", {forecast['residual_pct']:+.1f}%" if forecast['residual_pct'] is not None else ""
+        lines.append(
+            f"- {forecast['metric']}{scope} {label}: {forecast['actual']:.4g} vs {forecast['expected']:.4g} "
+            f"expected (range {forecast['lower']:.4g}-{forecast['upper']:.4g}{change}, {forecast['status']})"
+        )
+        if len(lines) == limit:
+            break
+    return "\n".join(lines) if lines else "No forecasts available."
+
+def _mean_square(residuals: np.ndarray) -> np.ndarray:
+    """Mean square over the last axis ignoring NaN, 0 where all are NaN."""
+    defined = ~np.isnan(residuals)
+    return (np.where(defined, residuals, 0.0) ** 2).sum(axis=-1) / np.maximum(defined.sum(axis=-1), 1)
@@ -0,0 +1,167 @@
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from src.analytics.window_index import DateRange, WindowIndex
+
+def _previous_month_to_date(end: date) -> Tuple[DateRange, DateRange]:
+    """Month to date against the same days of the previous month."""
+    current_start = end.replace(day=1)
+    previous_month_end = current_start - timedelta(days=1)
+    previous_start = previous_month_end.replace(day=1)
+    previous_end = min(previous_start + timedelta(days=end.day - 1), previous_month_end)
+    return (current_start, end), (previous_start, previous_end)
+
+def _previous_year_to_date(end: date) -> Tuple[DateRange, DateRange]:
+    """Year to date against the same span of the previous year."""
+    previous_end = end.replace(year=end.year - 1, day=min(end.day, 28)) if (
+        end.month == 2 and end.day == 29
+    ) else end.replace(year=end.year - 1)
+    return (end.replace(month=1, day=1), end), (previous_end.replace(month=1, day=1), previous_end)
+
+def _trailing(days: int, offset: int) -> Callable[[date], Tuple[DateRange, DateRange]]:
+    """The last `days` days against the same number of days `offset` days earlier."""
+    def ranges(end: date) -> Tuple[DateRange, DateRange]:
+        start = end - timedelta(days=days - 1)
+        return (start, end), (start - timedelta(days=offset), end - timedelta(days=offset))
+    return ranges
+
+# Comparison name -> function of the last day returning (current, previous)
+# date ranges. A new comparison only needs an entry here: it is computed from
+# the same daily matrix in the same pass as the others.
+COMPARISONS: Dict[str, Callable[[date], Tuple[DateRange, DateRange]]] = {
+    'daily': _trailing(1, 1),
+    'weekly': _trailing(7, 7),
+    'monthly': _previous_month_to_date,
+    'yearly': _previous_year_to_date,
+    'trailing_28d': _trailing(28, 28),
+    # 364 days keeps weekdays aligned with last year
+    'same_period_last_year': _trailing(7, 364),
+}
+
+def comparison_ranges(
+    end: date,
+    comparisons: Optional[List[str]] = None
+) -> Dict[str, Dict[str, DateRange]]:
+    """
+    Resolve comparisons to their current and previous date ranges.
+
+    Args:
+        end: Last day of the current periods
+        comparisons: Names from COMPARISONS (defaults to all of them)
+
+    Returns:
+        Dictionary mapping comparison name to {'current': (start, end),
+        'previous': (start, end)}, both ranges inclusive
+    """
+    ranges = {}
+    for name in comparisons or list(COMPARISONS):
+        if name not in COMPARISONS:
+            raise ValueError(f"Unknown growth comparison {name}, expected one of {list(COMPARISONS)}")
+        current, previous = COMPARISONS[name](end)
+        ranges[name] = {'current': current, 'previous': previous}
+    return ranges
+
+def span_start(ranges: Dict[str, Dict[str, DateRange]]) -> date:
+    """
+    Get the first day any of the comparisons needs.
+
+    Args:
+        ranges: Output of comparison_ranges
+
+    Returns:
+        Earliest start date
+    """
+    return min(window[0] for periods in ranges.values() for window in periods.values())
+
+def compute_growth(
+    index: WindowIndex,
+    ranges: Dict[str, Dict[str, DateRange]],
+    exact_totals: Optional[Dict[DateRange, Dict[str, float]]] = None,
+    dimension: Optional[str] = None,
+    value: Optional[str] = None
+) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    Compute every comparison from a daily window index in one vectorized pass.
+
+    All current and previous periods are looked up in the index at once, so
+    the cost does not depend on the number or length of the windows. Ratio
+    and average metrics are combined as a mean weighted by sessions.
+    Unique-user metrics cannot be summed across days; unless GA totals for
+    both periods are given in exact_totals, they are reported as the sum of
+    daily values and flagged as approximate.
+
+    Args:
+        index: Daily series of the property
+        ranges: Output of comparison_ranges
+        exact_totals: Optional GA totals keyed by (start, end) date range
+        dimension: Optional indexed dimension to slice by
+        value: Value of the dimension to compute growth for
+
+    Returns:
+        Dictionary mapping comparison name to a dictionary per metric with
+        'current', 'previous', 'delta', 'growth_rate' (percentage, None when
+        the previous value is zero but the current one is not), 'status'
+        ('ok', 'zero_baseline' or 'no_data' when the index does not cover the
+        previous period) and 'approximate'
+    """
+    names = list(ranges)
+    metrics = index.metrics
+    if not names or not metrics:
+        return {name: {} for name in names}
+    exact_totals = exact_totals or {}
+
+    # Rows 0..W-1 are current periods, W..2W-1 previous periods
+    periods = [ranges[name]['current'] for name in names] + [ranges[name]['previous'] for name in names]
+    sums = index.sums(periods, dimension, value)
+
+    # A previous period before the first day with activity is a property
+    # that did not exist yet
+    covered = index.covered(periods, dimension)
+    covered[len(names):] &= index.covered(periods[len(names):], dimension, active=True)
+
+    # GA totals replace the daily sums where both periods of a comparison have them
+    approximate = np.broadcast_to(index.kinds == 'distinct', (len(names), len(metrics))).copy()
+    for position, name in enumerate(names):
+        current = exact_totals.get(ranges[name]['current'])
+        previous = exact_totals.get(ranges[name]['previous'])
+        if current is None or previous is None:
+            continue
+        for column, metric in enumerate(metrics):
+            if metric in current and metric in previous:
+                sums[position, column] = float(current[metric])
+                sums[len(names) + position, column] = float(previous[metric])
+                approximate[position, column] = False
+
+    current_values = sums[:len(names)]
+    previous_values = sums[len(names):]
+    delta = current_values - previous_values
+    with np.errstate(invalid='ignore', divide='ignore'):
+        growth_rate = np.where(
+            previous_values != 0,
+            delta / np.abs(previous_values) * 100,
+            np.where(current_values == 0, 0.0, np.nan)
+        )
+
+    has_data = (covered[:len(names)] & covered[len(names):])[:, None]
+    status = np.where(
+        ~has_data,
+        'no_data',
+        np.where((previous_values == 0) & (current_values != 0), 'zero_baseline', 'ok')
+    )
+    growth_rate = np.where(has_data, np.round(growth_rate, 2), np.nan)
+
+    growth = {}
+    for position, name in enumerate(names):
+        growth[name] = {
+            metric: {
+                'current': float(current_values[position, column]),
+                'previous': float(previous_values[position, column]),
+                'delta': float(delta[position, column]),
+                'growth_rate': None if np.isnan(growth_rate[position, column])
+                else float(growth_rate[position, column]),
+                'status': str(status[position, column]),
+                'approximate': bool(approximate[position, column])
+            }
+            for column, metric in enumerate(metrics)
+        }
+    return growth
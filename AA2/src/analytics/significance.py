@@ -0,0 +1,305 @@
+import math
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional
+import numpy as np
+from src.analytics.anomalies import weekday_factors
+from src.analytics.window_index import DateRange, WindowIndex
+
+# Iterations of the incomplete beta continued fraction; it converges in far
+# fewer for the degrees of freedom of daily comparisons
+BETA_ITERATIONS = 200
+
+_log_gamma = np.vectorize(math.lgamma, otypes=[np.float64])
+
+def welch_test(
+    current_mean: np.ndarray,
+    current_var: np.ndarray,
+    current_n: np.ndarray,
+    previous_mean: np.ndarray,
+    previous_var: np.ndarray,
+    previous_n: np.ndarray,
+    confidence: float = 0.95
+) -> Dict[str, np.ndarray]:
+    """
+    Test differences of means with Welch's unequal-variance t test.
+
+    All arguments are arrays of the same shape, one entry per test.
+
+    Args:
+        current_mean: Sample means of the current period
+        current_var: Unbiased sample variances of the current period
+        current_n: Sample sizes of the current period (at least 2)
+        previous_mean: Sample means of the previous period
+        previous_var: Unbiased sample variances of the previous period
+        previous_n: Sample sizes of the previous period (at least 2)
+        confidence: Level of the confidence interval of the difference
+
+    Returns:
+        Dictionary of arrays: 'difference', 'stderr', 'dof', 't', 'p_value'
+        (two-sided), 'lower' and 'upper' (interval of the difference)
+    """
+    current_se = current_var / current_n
+    previous_se = previous_var / previous_n
+    stderr = np.sqrt(current_se + previous_se)
+    difference = current_mean - previous_mean
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Welch-Satterthwaite degrees of freedom
+        dof = (current_se + previous_se) ** 2 / (
+            current_se ** 2 / (current_n - 1) + previous_se ** 2 / (previous_n - 1)
+        )
+        t = difference / stderr
+    # Constant samples: any difference is certain, no difference is no evidence
+    constant = stderr == 0
+    dof = np.where(constant, current_n + previous_n - 2, dof)
+    t = np.where(constant, np.where(difference == 0, 0.0, np.inf), t)
+
+    p_value = np.where(np.isinf(t), 0.0, 2 * student_t_sf(np.abs(np.nan_to_num(t, posinf=0.0)), dof))
+    margin = student_t_quantile(0.5 + confidence / 2, dof) * stderr
+    return {
+        'difference': difference,
+        'stderr': stderr,
+        'dof': dof,
+        't': t,
+        'p_value': np.clip(p_value, 0.0, 1.0),
+        'lower': difference - margin,
+        'upper': difference + margin,
+    }
+
+def student_t_sf(t: np.ndarray, dof: np.ndarray) -> np.ndarray:
+    """
+    Upper tail probability of Student's t distribution.
+
+    Args:
+        t: Non-negative t statistics
+        dof: Degrees of freedom (need not be integers)
+
+    Returns:
+        P(T > t) for each entry
+    """
+    return 0.5 * _regularized_beta(dof / 2, np.full_like(dof, 0.5), dof / (dof + t ** 2))
+
+def student_t_quantile(probability: float, dof: np.ndarray) -> np.ndarray:
+    """
+    Quantile of Student's t distribution by its Cornish-Fisher expansion.
+
+    Within 1% from two degrees of freedom on and far closer from five, which
+    is ample for interval bounds.
+
+    Args:
+        probability: Lower tail probability
+        dof: Degrees of freedom
+
+    Returns:
+        Quantile for each entry
+    """
+    z = NormalDist().inv_cdf(probability)
+    dof = np.maximum(dof, 1.0)
+    return (
+        z
+        + (z ** 3 + z) / (4 * dof)
+        + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * dof ** 2)
+        + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * dof ** 3)
+        + (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * dof ** 4)
+    )
+
+def benjamini_hochberg(p_values: np.ndarray) -> np.ndarray:
+    """
+    Adjust p-values for the false discovery rate of many simultaneous tests.
+
+    Args:
+        p_values: Raw p-values
+
+    Returns:
+        Adjusted p-values (q-values) in the same order
+    """
+    count = len(p_values)
+    if count == 0:
+        return p_values
+    order = np.argsort(p_values)
+    scaled = p_values[order] * count / np.arange(1, count + 1)
+    adjusted = np.empty(count)
+    adjusted[order] = np.minimum(np.minimum.accumulate(scaled[::-1])[::-1], 1.0)
+    return adjusted
+
+def compare_periods(
+    index: WindowIndex,
+    ranges: Dict[str, Dict[str, DateRange]],
+    top_values: int = 5,
+    alpha: float = 0.05,
+    confidence: float = 0.95,
+    seasonality_days: int = 84,
+    control_fdr: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Test the change of every daily series between the periods of comparisons.
+
+    Every metric is tested property-wide and, where the dimension's daily
+    series cover both periods, for the largest values (by sessions) of each
+    indexed dimension. Daily values are divided by their weekday factor so
+    the weekly pattern does not count as noise, and the mean daily values of
+    the two periods are compared with Welch's t test. By default significance
+    controls the false discovery rate over all tests of the run.
+
+    Args:
+        index: Daily series of the property
+        ranges: Output of growth.comparison_ranges
+        top_values: Values per dimension tested
+        alpha: False discovery rate (or, without control_fdr, p-value) at
+            which a change is significant
+        confidence: Level of the confidence intervals
+        seasonality_days: Days at least, ending on the last day, from which
+            the weekday factors are estimated; factors from the compared days
+            alone would absorb part of their noise
+        control_fdr: Adjust for the number of tests (Benjamini-Hochberg)
+
+    Returns:
+        Results ordered by p-value, each a dict with 'comparison', 'metric',
+        'dimension', 'value', 'current_mean' and 'previous_mean' (daily
+        averages), 'change_pct', 'ci_lower_pct', 'ci_upper_pct' (None without
+        a previous level), 'p_value', 'q_value' and 'significant'
+    """
+    if not index.metrics:
+        return []
+    tests = []
+    for comparison, periods in ranges.items():
+        start = min(periods['current'][0], periods['previous'][0])
+        active_days = len(index.dates) - index.first_active
+        days = (index.dates[-1].item() - start).days + 1
+        # Comparisons reaching back before the first activity would test zeros
+        if days > active_days or not index.covered(
+            [periods['current'], periods['previous']]
+        ).all():
+            continue
+        days = max(days, min(seasonality_days, active_days))
+        dates = index.dates[-days:]
+        labels, values, missing = index.stacked_series(days, top_values)
+
+        weekdays = (dates.astype(np.int64) + 3) % 7
+        adjusted = values / weekday_factors(values, weekdays)[:, weekdays]
+
+        offsets = (dates - np.datetime64(start, 'D')).astype(np.int64)
+        statistics = []
+        for period in ('current', 'previous'):
+            first = (periods[period][0] - start).days
+            last = (periods[period][1] - start).days
+            present = ((offsets >= first) & (offsets <= last))[None, :] & ~missing
+            n = present.sum(axis=1).astype(np.float64)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = np.where(present, adjusted, 0.0).sum(axis=1) / n
+                variance = np.where(present, (adjusted - mean[:, None]) ** 2, 0.0).sum(axis=1) / (n - 1)
+                raw_mean = np.where(present, values, 0.0).sum(axis=1) / n
+            statistics.append((mean, variance, n, raw_mean))
+        (current_mean, current_var, current_n, current_raw), (
+            previous_mean, previous_var, previous_n, previous_raw
+        ) = statistics
+
+        testable = (current_n >= 2) & (previous_n >= 2)
+        if not testable.any():
+            continue
+        result = welch_test(
+            current_mean[testable], current_var[testable], current_n[testable],
+            previous_mean[testable], previous_var[testable], previous_n[testable],
+            confidence
+        )
+        for position, series in enumerate(np.flatnonzero(testable)):
+            tests.append((comparison, labels[series], current_raw[series], previous_raw[series],
+                          previous_mean[series], {key: value[position] for key, value in result.items()}))
+
+    p_values = np.array([test[-1]['p_value'] for test in tests])
+    q_values = benjamini_hochberg(p_values) if control_fdr else p_values
+    results = []
+    for (comparison, (metric, dimension, value), current_raw, previous_raw, baseline, result), q_value in zip(
+        tests, q_values
+    ):
+        relative = (lambda amount: round(float(amount / abs(baseline) * 100), 2)) if baseline else (lambda amount: None)
+        results.append({
+            'comparison': comparison,
+            'metric': metric,
+            'dimension': dimension,
+            'value': value,
+            'current_mean': round(float(current_raw), 4),
+            'previous_mean': round(float(previous_raw), 4),
+            'change_pct': relative(result['difference']),
+            'ci_lower_pct': relative(result['lower']),
+            'ci_upper_pct': relative(result['upper']),
+            'p_value': round(float(result['p_value']), 6),
+            'q_value': round(float(q_value), 6),
+            'significant': bool(q_value <= alpha)
+        })
+    results.sort(key=lambda result: result['p_value'])
+    return results
+
+def format_significance(
+    results: List[Dict[str, Any]],
+    metrics: Optional[List[str]] = None,
+    dimensions: Optional[List[str]] = None,
+    limit: int = 15
+) -> str:
+    """
+    Render the significant changes as compact lines for a prompt.
+
+    Args:
+        results: Output of compare_periods
+        metrics: Metrics to include (all when None)
+        dimensions: Dimensions whose values are included; property-wide
+            results are always included (all dimensions when None)
+        limit: Maximum number of lines
+
+    Returns:
+        One line per significant change, the strongest evidence first, or a
+        note that there are none
+    """
+    lines = []
+    for result in results:
+        if not result['significant']:
+            continue
+        if metrics is not None and result['metric'] not in metrics:
+            continue
+        if dimensions is not None and result['dimension'] and result['dimension'] not in dimensions:
+            continue
+        scope = f" ({result['dimension']} = {result['value']})" if result['dimension'] else ""
+        change = (
+            f"{result['change_pct']:+.1f}%, CI {result['ci_lower_pct']:+.1f}% to {result['ci_upper_pct']:+.1f}%, "
+            if result['change_pct'] is not None else "up from 0, "
+        )
+        lines.append(
+            f"- {result['metric']}{scope} {result['comparison']}: daily average {result['current_mean']:.4g} "
+            f"vs {result['previous_mean']:.4g} ({change}p = {result['p_value']:.2g})"
+        )
+        if len(lines) == limit:
+            break
+    return "\n".join(lines) if lines else "No statistically significant changes."
+
+def _regularized_beta(a: np.ndarray, b: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """Regularized incomplete beta function I_x(a, b), by continued fraction."""
+    a, b, x = np.broadcast_arrays(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64),
+                                  np.clip(np.asarray(x, dtype=np.float64), 0.0, 1.0))
+    # The fraction converges quickly below the mean; above it use symmetry
+    flip = x > (a + 1) / (a + b + 2)
+    a, b, x = np.where(flip, b, a), np.where(flip, a, b), np.where(flip, 1 - x, x)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        front = np.exp(
+            _log_gamma(a + b) - _log_gamma(a) - _log_gamma(b) + a * np.log(x) + b * np.log1p(-x)
+        ) / a
+    tiny = 1e-300
+    c = np.ones_like(x)
+    d = 1 - (a + b) * x / (a + 1)
+    d = 1 / np.where(np.abs(d) < tiny, tiny, d)
+    fraction = d.copy()
+    for m in range(1, BETA_ITERATIONS + 1):
+        for numerator in (
+            m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+            -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))
+        ):
+            d = 1 + numerator * d
+            d = 1 / np.where(np.abs(d) < tiny, tiny, d)
+            c = 1 + numerator / c
+            c = np.where(np.abs(c) < tiny, tiny, c)
+            step = c * d
+            fraction = fraction * step
+        if np.all(np.abs(step - 1) < 1e-12):
+            break
+    value = np.nan_to_num(front * fraction, nan=0.0)
+    value = np.where(x == 0, 0.0, value)
+    return np.where(flip, 1 - value, value)
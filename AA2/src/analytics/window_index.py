@@ -0,0 +1,385 @@
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from src.utils.metric_aggregation import RATIO_WEIGHT_METRIC, aggregation_kind
+
+DateRange = Tuple[date, date]
+
+class WindowIndex:
+    """Cumulative sums of daily metric series answering any window sum in constant time."""
+
+    def __init__(self, dates: np.ndarray, values: np.ndarray, metrics: List[str]):
+        """
+        Build the index over property-wide daily series.
+
+        Args:
+            dates: Consecutive days (datetime64[D])
+            values: Matrix of shape days x metrics
+            metrics: Metric names, in column order
+        """
+        self.dates = dates
+        self.values = values
+        self.metrics = list(metrics)
+        self.kinds = np.array([aggregation_kind(metric) for metric in self.metrics])
+        self._columns = {metric: column for column, metric in enumerate(self.metrics)}
+        self._is_mean = self.kinds == 'mean'
+
+        active = np.flatnonzero(values.any(axis=1))
+        # First day with any activity; earlier days belong to no property yet
+        self.first_active = int(active[0]) if len(active) else len(dates)
+        self._cumulative, self._cumulative_weights = self._accumulate(values)
+
+        # Dimension name -> (values, first covered day, cumulative sums of
+        # shape values x days+1 x metrics, cumulative weights)
+        self._dimensions: Dict[str, Tuple[List[str], int, np.ndarray, np.ndarray]] = {}
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: List[Dict[str, Any]],
+        metrics: List[str],
+        start: date,
+        end: date
+    ) -> 'WindowIndex':
+        """
+        Build the index from the rows of a report by date.
+
+        Args:
+            rows: Report rows with a 'date' value in GA's YYYYMMDD format
+            metrics: Metric names
+            start: First day of the index
+            end: Last day of the index
+
+        Returns:
+            WindowIndex over start..end
+        """
+        dates = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+        positions, _, row_values = _row_arrays(rows, metrics, dates[0], None)
+        values = np.zeros((len(dates), len(metrics)))
+        inside = (positions >= 0) & (positions < len(dates))
+        # GA omits days without activity, which stay zero
+        np.add.at(values, positions[inside], row_values[inside])
+        return cls(dates, values, metrics)
+
+    def add_dimension(self, dimension: str, rows: List[Dict[str, Any]], start: Optional[date] = None) -> None:
+        """
+        Index daily series per value of a dimension.
+
+        Args:
+            dimension: Dimension name
+            rows: Report rows by 'date' and the dimension
+            start: First day the rows cover (defaults to the start of the index)
+        """
+        positions, labels, row_values = _row_arrays(rows, self.metrics, self.dates[0], dimension)
+        names, codes = np.unique(labels, return_inverse=True)
+        values = np.zeros((len(names), len(self.dates), len(self.metrics)))
+        inside = (positions >= 0) & (positions < len(self.dates))
+        np.add.at(values, (codes[inside], positions[inside]), row_values[inside])
+
+        first = 0 if start is None else max(0, int((np.datetime64(start, 'D') - self.dates[0]).astype(np.int64)))
+        cumulative, cumulative_weights = self._accumulate(values)
+        self._dimensions[dimension] = ([str(name) for name in names], first, cumulative, cumulative_weights)
+
+    @property
+    def dimensions(self) -> List[str]:
+        """Names of the indexed dimensions."""
+        return list(self._dimensions)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Describe the index in JSON-serializable form, e.g. for API responses.
+
+        Returns:
+            Dictionary with the indexed date span, metrics and dimensions
+        """
+        return {
+            'start': str(self.dates[0]) if len(self.dates) else None,
+            'end': str(self.dates[-1]) if len(self.dates) else None,
+            'days': len(self.dates),
+            'metrics': self.metrics,
+            'dimensions': {name: len(self._dimensions[name][0]) for name in self._dimensions}
+        }
+
+    def dimension_values(self, dimension: str) -> List[str]:
+        """
+        Get the indexed values of a dimension.
+
+        Args:
+            dimension: Dimension name
+
+        Returns:
+            Values in code order, as used by the rows of breakdown_sums
+        """
+        return list(self._dimension(dimension)[0])
+
+    def sums(
+        self,
+        ranges: Sequence[DateRange],
+        dimension: Optional[str] = None,
+        value: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Aggregate every metric over many date ranges at once.
+
+        Counts are summed, ratio and average metrics are combined as a mean
+        weighted by sessions and unique-user metrics are summed per day (an
+        upper bound on the true count).
+
+        Args:
+            ranges: Inclusive (start, end) date ranges
+            dimension: Optional dimension to slice by
+            value: Value of the dimension to slice to
+
+        Returns:
+            Matrix of shape ranges x metrics; ranges outside the index are
+            clipped to it (see covered)
+        """
+        lo, hi = self._bounds(ranges)
+        if dimension is None:
+            cumulative, cumulative_weights = self._cumulative, self._cumulative_weights
+        else:
+            names, _, cumulative, cumulative_weights = self._dimension(dimension)
+            if value not in names:
+                return np.zeros((len(lo), len(self.metrics)))
+            code = names.index(value)
+            cumulative, cumulative_weights = cumulative[code], cumulative_weights[code]
+        return self._combine(
+            cumulative[hi] - cumulative[lo],
+            cumulative_weights[hi] - cumulative_weights[lo]
+        )
+
+    def breakdown_sums(self, dimension: str, ranges: Sequence[DateRange]) -> np.ndarray:
+        """
+        Aggregate every metric for every value of a dimension over many date ranges.
+
+        Args:
+            dimension: Indexed dimension name
+            ranges: Inclusive (start, end) date ranges
+
+        Returns:
+            Array of shape values x ranges x metrics, values in the order of
+            dimension_values
+        """
+        lo, hi = self._bounds(ranges)
+        _, _, cumulative, cumulative_weights = self._dimension(dimension)
+        return self._combine(
+            cumulative[:, hi] - cumulative[:, lo],
+            cumulative_weights[:, hi] - cumulative_weights[:, lo]
+        )
+
+    def window(
+        self,
+        start: date,
+        end: date,
+        dimension: Optional[str] = None,
+        value: Optional[str] = None
+    ) -> Dict[str, float]:
+        """
+        Aggregate every metric over one date range.
+
+        Args:
+            start: First day of the range
+            end: Last day of the range
+            dimension: Optional dimension to slice by
+            value: Value of the dimension to slice to
+
+        Returns:
+            Dictionary mapping metric name to its value over the range
+        """
+        sums = self.sums([(start, end)], dimension, value)[0]
+        return {metric: float(sums[column]) for column, metric in enumerate(self.metrics)}
+
+    def breakdown(self, dimension: str, start: date, end: date) -> Dict[str, Dict[str, float]]:
+        """
+        Aggregate every metric per value of a dimension over one date range.
+
+        Args:
+            dimension: Indexed dimension name
+            start: First day of the range
+            end: Last day of the range
+
+        Returns:
+            Dictionary mapping dimension value to metric values
+        """
+        sums = self.breakdown_sums(dimension, [(start, end)])[:, 0]
+        return {
+            name: {metric: float(sums[code, column]) for column, metric in enumerate(self.metrics)}
+            for code, name in enumerate(self.dimension_values(dimension))
+        }
+
+    def covered(
+        self,
+        ranges: Sequence[DateRange],
+        dimension: Optional[str] = None,
+        active: bool = False
+    ) -> np.ndarray:
+        """
+        Check which date ranges lie within the indexed days.
+
+        Args:
+            ranges: Inclusive (start, end) date ranges
+            dimension: Optional dimension whose (possibly shorter) coverage applies
+            active: Also require the range to end on or after the first day
+                with any activity
+
+        Returns:
+            Boolean array, one entry per range
+        """
+        starts, ends = self._offsets(ranges)
+        first = self._dimension(dimension)[1] if dimension is not None else 0
+        covered = (starts >= first) & (ends < len(self.dates)) & (ends >= starts)
+        if active:
+            covered &= ends >= self.first_active
+        return covered
+
+    def series(
+        self,
+        metric: str,
+        dimension: Optional[str] = None,
+        value: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Get the daily series of a metric, recovered from the cumulative sums.
+
+        Args:
+            metric: Metric name
+            dimension: Optional dimension to slice by
+            value: Value of the dimension to slice to
+
+        Returns:
+            Daily values aligned with dates
+        """
+        column = self._columns[metric]
+        if dimension is None:
+            return self.values[:, column]
+        names, _, cumulative, cumulative_weights = self._dimension(dimension)
+        if value not in names:
+            return np.zeros(len(self.dates))
+        code = names.index(value)
+        daily = self._combine(
+            np.diff(cumulative[code], axis=0),
+            np.diff(cumulative_weights[code])
+        )
+        return daily[:, column]
+
+    def stacked_series(
+        self,
+        days: int,
+        top_values: int = 5
+    ) -> Tuple[List[Tuple[str, Optional[str], Optional[str]]], np.ndarray, np.ndarray]:
+        """
+        Stack the recent daily series of every metric into one matrix.
+
+        Series are property-wide and for the largest values (by sessions) of
+        each indexed dimension covering the days. Ratio metrics are undefined
+        on days without sessions; those days are filled with the series mean
+        and marked missing.
+
+        Args:
+            days: Number of days, ending on the last indexed day
+            top_values: Values per dimension included
+
+        Returns:
+            Tuple of (labels as (metric, dimension, value) with None for
+            property-wide series, matrix of shape series x days, missing mask
+            of the same shape)
+        """
+        weight_column = self._columns.get(RATIO_WEIGHT_METRIC)
+        span = [(self.dates[-days].item(), self.dates[-1].item())]
+
+        labels: List[Tuple[str, Optional[str], Optional[str]]] = []
+        rows = []
+        weights = []
+        for column, metric in enumerate(self.metrics):
+            labels.append((metric, None, None))
+            rows.append(self.values[-days:, column])
+            weights.append(self.values[-days:, weight_column] if weight_column is not None else None)
+        for dimension in self.dimensions:
+            if not self.covered(span, dimension)[0]:
+                continue
+            names = self.dimension_values(dimension)
+            volume = self.breakdown_sums(dimension, span)[:, 0]
+            for code in np.argsort(-volume[:, weight_column or 0])[:top_values]:
+                sessions = (
+                    self.series(RATIO_WEIGHT_METRIC, dimension, names[code])[-days:]
+                    if weight_column is not None else None
+                )
+                for metric in self.metrics:
+                    labels.append((metric, dimension, names[code]))
+                    rows.append(self.series(metric, dimension, names[code])[-days:])
+                    weights.append(sessions)
+        values = np.vstack(rows)
+
+        missing = np.zeros_like(values, dtype=bool)
+        for series, (metric, _, _) in enumerate(labels):
+            if self.kinds[self._columns[metric]] == 'mean' and weights[series] is not None:
+                missing[series] = weights[series] == 0
+        defined = np.where(missing, 0.0, values)
+        fill = defined.sum(axis=1) / np.maximum((~missing).sum(axis=1), 1)
+        return labels, np.where(missing, fill[:, None], values), missing
+
+    def _accumulate(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Cumulative sums along the day axis, with ratio metrics weighted."""
+        if RATIO_WEIGHT_METRIC in self._columns:
+            weights = values[..., self._columns[RATIO_WEIGHT_METRIC]]
+        else:
+            weights = np.ones(values.shape[:-1])
+        weighted = values.copy()
+        weighted[..., self._is_mean] *= weights[..., None]
+
+        day_axis = values.ndim - 2
+        pad = [(0, 0)] * values.ndim
+        pad[day_axis] = (1, 0)
+        cumulative = np.pad(np.cumsum(weighted, axis=day_axis), pad)
+        cumulative_weights = np.pad(np.cumsum(weights, axis=day_axis), pad[:-1])
+        return cumulative, cumulative_weights
+
+    def _combine(self, sums: np.ndarray, weight_sums: np.ndarray) -> np.ndarray:
+        """Turn weighted sums of ratio metrics back into weighted means."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sums[..., self._is_mean] = np.where(
+                weight_sums[..., None] > 0,
+                sums[..., self._is_mean] / weight_sums[..., None],
+                0.0
+            )
+        return sums
+
+    def _offsets(self, ranges: Sequence[DateRange]) -> Tuple[np.ndarray, np.ndarray]:
+        """Day offsets of range starts and ends relative to the first indexed day."""
+        origin = self.dates[0] if len(self.dates) else np.datetime64('1970-01-01', 'D')
+        starts = (np.array([r[0] for r in ranges], dtype='datetime64[D]') - origin).astype(np.int64)
+        ends = (np.array([r[1] for r in ranges], dtype='datetime64[D]') - origin).astype(np.int64)
+        return starts, ends
+
+    def _bounds(self, ranges: Sequence[DateRange]) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions in the cumulative sums bounding each range, clipped to the index."""
+        starts, ends = self._offsets(ranges)
+        lo = np.clip(starts, 0, len(self.dates))
+        hi = np.maximum(np.clip(ends + 1, 0, len(self.dates)), lo)
+        return lo, hi
+
+    def _dimension(self, dimension: str) -> Tuple[List[str], int, np.ndarray, np.ndarray]:
+        """Indexed series of a dimension."""
+        if dimension not in self._dimensions:
+            raise KeyError(f"Dimension {dimension} is not indexed, expected one of {self.dimensions}")
+        return self._dimensions[dimension]
+
+def _row_arrays(
+    rows: List[Dict[str, Any]],
+    metrics: List[str],
+    origin: np.datetime64,
+    dimension: Optional[str]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Day offsets, dimension values and metric values of report rows."""
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=object), np.zeros((0, len(metrics)))
+    row_dates = np.array(
+        [f"{row['date'][:4]}-{row['date'][4:6]}-{row['date'][6:8]}" for row in rows],
+        dtype='datetime64[D]'
+    )
+    labels = np.array([row.get(dimension) for row in rows] if dimension else [], dtype=object)
+    values = np.array(
+        [[row.get(metric) or 0 for metric in metrics] for row in rows],
+        dtype=np.float64
+    ).reshape(len(rows), len(metrics))
+    return (row_dates - origin).astype(np.int64), labels, values
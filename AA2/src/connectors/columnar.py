@@ -0,0 +1,500 @@
+import contextvars
+import logging
+import threading
+from array import array
+from collections.abc import Sequence
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import numpy as np
+import proto
+from google.analytics.data_v1beta.types import MetricType
+from src.utils.metric_aggregation import RATIO_WEIGHT_METRIC, aggregation_kind
+
+logger = logging.getLogger(__name__)
+
+# Array typecode and converter per GA4 MetricType name; other types stay strings
+METRIC_COLUMN_TYPES: Dict[str, Tuple[str, Callable[[str], Any]]] = {
+    'TYPE_INTEGER': ('q', int),
+    'TYPE_FLOAT': ('d', float),
+    'TYPE_CURRENCY': ('d', float),
+    'TYPE_STANDARD': ('d', float),
+    'TYPE_SECONDS': ('d', float),
+    'TYPE_MILLISECONDS': ('d', float),
+    'TYPE_MINUTES': ('d', float),
+    'TYPE_HOURS': ('d', float),
+    'TYPE_FEET': ('d', float),
+    'TYPE_MILES': ('d', float),
+    'TYPE_METERS': ('d', float),
+    'TYPE_KILOMETERS': ('d', float),
+}
+
+MetricColumn = Union[array, List[Any]]
+
+class Vocabulary:
+    """Append-only dictionary of one dimension's values, shared by the reports of a run."""
+
+    def __init__(self):
+        # Codes never change once assigned, so columns encoded earlier stay
+        # valid as the vocabulary grows
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def encode(self, raw_values: Iterable[str]) -> array:
+        """
+        Encode values, adding unseen ones to the vocabulary.
+
+        Args:
+            raw_values: Dimension value per row
+
+        Returns:
+            Unsigned integer code per row
+        """
+        with self._lock:
+            codes = self._codes
+            values = self.values
+            encoded = array('I')
+            for value in raw_values:
+                code = codes.get(value)
+                if code is None:
+                    code = codes[value] = len(values)
+                    values.append(value)
+                encoded.append(code)
+            return encoded
+
+    def intern(self, value: str) -> str:
+        """
+        Get the vocabulary's own string for a value, adding it if unseen.
+
+        Rows holding interned values share one string object per distinct
+        value instead of one per row.
+
+        Args:
+            value: Dimension value
+
+        Returns:
+            Equal string owned by the vocabulary
+        """
+        code = self._codes.get(value)
+        if code is None:
+            code = self.encode([value])[0]
+        return self.values[code]
+
+    def code(self, value: str) -> Optional[int]:
+        """
+        Look up the code of a value without adding it.
+
+        Args:
+            value: Dimension value
+
+        Returns:
+            Code, or None for a value the vocabulary has not seen
+        """
+        return self._codes.get(value)
+
+_vocabularies: contextvars.ContextVar[Optional[Dict[str, Vocabulary]]] = contextvars.ContextVar(
+    'ga_dimension_vocabularies',
+    default=None
+)
+
+@contextmanager
+def vocabulary_scope(vocabularies: Optional[Dict[str, Vocabulary]] = None) -> Iterator[Dict[str, Vocabulary]]:
+    """
+    Share one vocabulary per dimension among the reports processed inside the block.
+
+    The scope follows tasks created inside the block, e.g. by asyncio.gather,
+    but not executor threads, which need the vocabularies passed explicitly.
+
+    Args:
+        vocabularies: Dimension name -> vocabulary to extend (a new empty
+            mapping by default)
+
+    Yields:
+        The mapping of the scope, filled as reports are processed
+    """
+    vocabularies = {} if vocabularies is None else vocabularies
+    token = _vocabularies.set(vocabularies)
+    try:
+        yield vocabularies
+    finally:
+        _vocabularies.reset(token)
+
+def scoped_vocabulary(dimension: str) -> Vocabulary:
+    """
+    Get the vocabulary of a dimension in the current scope.
+
+    Args:
+        dimension: Dimension name
+
+    Returns:
+        The scope's vocabulary, created on first use, or a new private one
+        when no scope is active
+    """
+    vocabularies = _vocabularies.get()
+    if vocabularies is None:
+        return Vocabulary()
+    vocabulary = vocabularies.get(dimension)
+    if vocabulary is None:
+        vocabulary = vocabularies.setdefault(dimension, Vocabulary())
+    return vocabulary
+
+def intern_rows(rows: Iterable[Dict[str, Any]], dimensions: List[str]) -> None:
+    """
+    Replace the dimension values of row dicts by the scope's interned strings.
+
+    Args:
+        rows: Row dicts, modified in place
+        dimensions: Dimension names whose values are interned
+    """
+    if _vocabularies.get() is None:
+        return
+    vocabularies = [(dimension, scoped_vocabulary(dimension)) for dimension in dimensions]
+    for row in rows:
+        for dimension, vocabulary in vocabularies:
+            value = row.get(dimension)
+            if value is not None:
+                row[dimension] = vocabulary.intern(value)
+
+def resolve_converter(metric_type: str) -> Tuple[Optional[str], Callable[[str], Any]]:
+    """
+    Resolve the array typecode and converter for a metric type once per column.
+
+    Args:
+        metric_type: GA4 MetricType name
+
+    Returns:
+        Tuple of (array typecode or None for untyped columns, converter)
+    """
+    return METRIC_COLUMN_TYPES.get(metric_type, (None, str))
+
+def build_metric_column(
+    values: List[str],
+    metric_type: str,
+    converter: Optional[Callable[[str], Any]] = None
+) -> MetricColumn:
+    """
+    Convert the raw string values of a metric into a typed column.
+
+    Args:
+        values: Raw metric values as returned by GA4
+        metric_type: GA4 MetricType name
+        converter: Optional precomputed converter of the metric (e.g. from
+            PropertyMetadata.converters), otherwise resolved from metric_type
+
+    Returns:
+        Typed array, or a plain list if the type is untyped or a value
+        could not be converted
+    """
+    typecode, default = resolve_converter(metric_type)
+    converter = converter or default
+    if typecode is None:
+        return list(values)
+
+    try:
+        return array(typecode, map(converter, values))
+    except (ValueError, TypeError):
+        logger.warning(
+            f"Could not convert all values to type {metric_type}, "
+            f"keeping unconvertible values as strings"
+        )
+        column = []
+        for value in values:
+            try:
+                column.append(converter(value))
+            except (ValueError, TypeError):
+                column.append(value)
+        return column
+
+class DimensionColumn:
+    """Dictionary-encoded dimension column: integer codes into a value list."""
+
+    def __init__(self, codes: array, values: List[str]):
+        self.codes = codes
+        self.values = values
+
+    @classmethod
+    def encode(cls, raw_values: List[str], vocabulary: Optional[Vocabulary] = None) -> 'DimensionColumn':
+        """
+        Dictionary-encode a list of dimension values.
+
+        Args:
+            raw_values: Dimension value per row
+            vocabulary: Optional vocabulary shared with other columns of the
+                dimension; their codes are then directly comparable
+
+        Returns:
+            Encoded column
+        """
+        if vocabulary is not None:
+            return cls(vocabulary.encode(raw_values), vocabulary.values)
+        index: Dict[str, int] = {}
+        codes = array('I', [index.setdefault(value, len(index)) for value in raw_values])
+        return cls(codes, list(index))
+
+    def code_array(self) -> np.ndarray:
+        """Codes as a NumPy array sharing the column's memory."""
+        return np.frombuffer(self.codes, dtype=np.dtype(f'u{self.codes.itemsize}'))
+
+    def distinct(self) -> int:
+        """Number of distinct values in the column (not in a shared vocabulary)."""
+        return len(np.unique(self.code_array()))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, position: int) -> str:
+        return self.values[self.codes[position]]
+
+    def take(self, positions: List[int]) -> 'DimensionColumn':
+        """Return a new column holding only the given row positions."""
+        return DimensionColumn(
+            array('I', [self.codes[i] for i in positions]),
+            self.values
+        )
+
+class RowView(Sequence):
+    """Lazy dict-of-rows adapter over a ColumnarResult."""
+
+    def __init__(self, columns: 'ColumnarResult'):
+        self._columns = columns
+
+    def __len__(self) -> int:
+        return self._columns.row_count
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self._columns.row(i) for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("row index out of range")
+        return self._columns.row(position)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for position in range(len(self)):
+            yield self._columns.row(position)
+
+    def __repr__(self) -> str:
+        return f"RowView(row_count={len(self)})"
+
+class ColumnarResult:
+    """Column-oriented GA4 report: typed metric arrays and encoded dimensions."""
+
+    def __init__(
+        self,
+        dimension_headers: List[str],
+        metric_headers: List[Dict[str, str]],
+        dimensions: Dict[str, DimensionColumn],
+        metrics: Dict[str, MetricColumn],
+        row_count: int
+    ):
+        self.dimension_headers = dimension_headers
+        self.metric_headers = metric_headers
+        self.dimensions = dimensions
+        self.metrics = metrics
+        self.row_count = row_count
+
+    @classmethod
+    def from_response(
+        cls,
+        response: Any,
+        converters: Optional[Dict[str, Callable[[str], Any]]] = None
+    ) -> 'ColumnarResult':
+        """
+        Build a columnar result from a raw GA4 report response.
+
+        Dimensions are encoded with the vocabularies of the current
+        vocabulary_scope, if any, so results of one run share codes.
+
+        Args:
+            response: RunReportResponse (proto-plus or raw protobuf)
+            converters: Optional precomputed converter per metric name (see
+                PropertyMetadata.converters)
+
+        Returns:
+            Columnar result
+        """
+        # Raw protobuf access avoids the proto-plus wrapper cost per cell
+        pb = type(response).pb(response) if isinstance(response, proto.Message) else response
+
+        dimension_headers = [header.name for header in pb.dimension_headers]
+        metric_headers = [
+            {'name': header.name, 'type': MetricType(header.type_).name}
+            for header in pb.metric_headers
+        ]
+        rows = pb.rows
+
+        shared = _vocabularies.get() is not None
+        dimensions = {
+            name: DimensionColumn.encode(
+                [row.dimension_values[i].value for row in rows],
+                scoped_vocabulary(name) if shared else None
+            )
+            for i, name in enumerate(dimension_headers)
+        }
+        metrics = {
+            header['name']: build_metric_column(
+                [row.metric_values[i].value for row in rows],
+                header['type'],
+                (converters or {}).get(header['name'])
+            )
+            for i, header in enumerate(metric_headers)
+        }
+
+        return cls(dimension_headers, metric_headers, dimensions, metrics, len(rows))
+
+    @property
+    def rows(self) -> RowView:
+        """Dict-of-rows view, materialized one row at a time on access."""
+        return RowView(self)
+
+    def row(self, position: int) -> Dict[str, Any]:
+        """
+        Materialize a single row as a dict.
+
+        Args:
+            position: Row position
+
+        Returns:
+            Row dict keyed by dimension and metric name
+        """
+        row = {name: column[position] for name, column in self.dimensions.items()}
+        for name, column in self.metrics.items():
+            row[name] = column[position]
+        return row
+
+    def take(self, positions: List[int]) -> 'ColumnarResult':
+        """
+        Return a new result holding only the given row positions.
+
+        Args:
+            positions: Row positions to keep
+
+        Returns:
+            Columnar result sharing dimension vocabularies with this one
+        """
+        metrics = {}
+        for name, column in self.metrics.items():
+            values = [column[i] for i in positions]
+            metrics[name] = (
+                array(column.typecode, values) if isinstance(column, array) else values
+            )
+
+        return ColumnarResult(
+            self.dimension_headers,
+            self.metric_headers,
+            {name: column.take(positions) for name, column in self.dimensions.items()},
+            metrics,
+            len(positions)
+        )
+
+    def split_by(self, dimension: str) -> Dict[str, 'ColumnarResult']:
+        """
+        Partition rows by the values of one dimension and drop that dimension.
+
+        Args:
+            dimension: Dimension to split on
+
+        Returns:
+            Dictionary mapping each dimension value to its columnar result
+        """
+        column = self.dimensions[dimension]
+        positions_by_code: Dict[int, List[int]] = {}
+        for position, code in enumerate(column.codes):
+            positions_by_code.setdefault(code, []).append(position)
+
+        remaining = ColumnarResult(
+            [name for name in self.dimension_headers if name != dimension],
+            self.metric_headers,
+            {name: col for name, col in self.dimensions.items() if name != dimension},
+            self.metrics,
+            self.row_count
+        )
+        return {
+            column.values[code]: remaining.take(positions)
+            for code, positions in positions_by_code.items()
+        }
+
+    def empty_like(self) -> 'ColumnarResult':
+        """Return an empty result with the same headers."""
+        return self.take([])
+
+    def metric_matrix(self, metrics: List[str]) -> np.ndarray:
+        """
+        Metric values as a float matrix.
+
+        Args:
+            metrics: Metric names, in column order
+
+        Returns:
+            Matrix of shape rows x metrics; values that are not numbers are 0
+        """
+        matrix = np.zeros((self.row_count, len(metrics)))
+        for position, metric in enumerate(metrics):
+            column = self.metrics[metric]
+            if isinstance(column, array):
+                matrix[:, position] = np.frombuffer(column, dtype=np.dtype(column.typecode))
+            else:
+                matrix[:, position] = [value if isinstance(value, (int, float)) else 0 for value in column]
+        return matrix
+
+    def group_by(self, dimensions: List[str], metrics: Optional[List[str]] = None) -> 'ColumnarResult':
+        """
+        Combine rows per combination of dimension codes.
+
+        Counts and unique-user metrics are summed; ratios and averages are
+        averaged, weighted by sessions when the result carries them.
+
+        Args:
+            dimensions: Dimensions to group by (empty for a single total row)
+            metrics: Metrics to combine (defaults to all)
+
+        Returns:
+            Columnar result with one row per group, sharing this result's
+            dimension vocabularies
+        """
+        metrics = list(metrics) if metrics is not None else list(self.metrics)
+        keys, inverse = _group_codes([self.dimensions[name].code_array() for name in dimensions], self.row_count)
+        sums, weight_sums = _combine(self, metrics, inverse, len(keys))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            is_mean = np.array([aggregation_kind(metric) == 'mean' for metric in metrics], dtype=bool)
+            sums[:, is_mean] = np.where(weight_sums[:, None] > 0, sums[:, is_mean] / weight_sums[:, None], 0.0)
+        return ColumnarResult(
+            list(dimensions),
+            [header for header in self.metric_headers if header['name'] in metrics],
+            {
+                name: DimensionColumn(array('I', keys[:, position].tolist()), self.dimensions[name].values)
+                for position, name in enumerate(dimensions)
+            },
+            {metric: array('d', sums[:, position].tolist()) for position, metric in enumerate(metrics)},
+            len(keys)
+        )
+
+def _group_codes(columns: List[np.ndarray], row_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Distinct code combinations (groups x columns) and the group of each row."""
+    if not columns:
+        return np.zeros((1 if row_count else 0, 0), dtype=np.int64), np.zeros(row_count, dtype=np.int64)
+    stacked = np.stack([column.astype(np.int64) for column in columns], axis=1)
+    keys, inverse = np.unique(stacked, axis=0, return_inverse=True)
+    return keys, inverse.reshape(-1)
+
+def _combine(
+    result: ColumnarResult,
+    metrics: List[str],
+    inverse: np.ndarray,
+    groups: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-group metric sums, ratios weighted by sessions, and weight sums."""
+    values = result.metric_matrix(metrics)
+    weights = (
+        result.metric_matrix([RATIO_WEIGHT_METRIC])[:, 0]
+        if RATIO_WEIGHT_METRIC in result.metrics else np.ones(result.row_count)
+    )
+    is_mean = np.array([aggregation_kind(metric) == 'mean' for metric in metrics], dtype=bool)
+    values[:, is_mean] *= weights[:, None]
+    sums = np.zeros((groups, len(metrics)))
+    np.add.at(sums, inverse, values)
+    return sums, np.bincount(inverse, weights=weights, minlength=groups)
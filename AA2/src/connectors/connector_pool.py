@@ -0,0 +1,171 @@
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from google.analytics.data_v1beta import BetaAnalyticsDataClient
+from google.oauth2.credentials import Credentials
+from src.connectors.ga_cache import GAResponseCache
+from src.connectors.google_analytics import GoogleAnalyticsConnector
+from src.connectors.quota_scheduler import QuotaScheduler, default_scheduler
+
+class ConnectorPool:
+    """Process-wide pool of GA4 connectors, credentials and Data API clients."""
+
+    def __init__(
+        self,
+        validation_ttl_seconds: int = 3600,
+        scheduler: Optional[QuotaScheduler] = None,
+        client_factory: Optional[Callable[[Credentials], Any]] = None,
+        max_workers: Optional[int] = None
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            validation_ttl_seconds: How long a successful credential
+                validation is trusted before it is checked again
+            scheduler: Optional QuotaScheduler shared by all pooled connectors
+            client_factory: Builds the Data API client for a credential set
+                (defaults to BetaAnalyticsDataClient; load tests point it at
+                SyntheticAnalyticsDataClient)
+            max_workers: Threads running blocking Data API calls for all
+                pooled connectors together (defaults to the scheduler's
+                max_concurrent_total, else 32)
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.validation_ttl_seconds = validation_ttl_seconds
+        self.scheduler = scheduler
+        self.client_factory = client_factory or (
+            lambda credentials: BetaAnalyticsDataClient(credentials=credentials)
+        )
+
+        self._lock = threading.Lock()
+        # One credentials object and client (gRPC channel) per credential set;
+        # the client is property-agnostic and is shared by all its properties
+        self._clients: Dict[str, Tuple[Credentials, Any]] = {}
+        self._connectors: Dict[Tuple[str, str], GoogleAnalyticsConnector] = {}
+        self._validated_until: Dict[Tuple[str, str], float] = {}
+
+        # One bounded executor for every pooled connector, so threads do not
+        # grow with the number of properties seen by the process
+        if max_workers is None:
+            max_workers = scheduler.max_concurrent_total if scheduler else 32
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='ga4-pool'
+        )
+
+    def get_connector(
+        self,
+        config: Dict[str, Any],
+        cache: Optional[GAResponseCache] = None
+    ) -> GoogleAnalyticsConnector:
+        """
+        Get the pooled connector for a property and credential set.
+
+        Args:
+            config: Connector configuration (see GoogleAnalyticsConnector)
+            cache: Optional response cache to attach to the connector
+
+        Returns:
+            Connector sharing credentials and client with other properties of
+            the same credential set
+        """
+        credentials_config = config.get('credentials', {})
+        fingerprint = self._fingerprint(credentials_config)
+        key = (str(config.get('property_id')), fingerprint)
+
+        with self._lock:
+            connector = self._connectors.get(key)
+            if connector is None:
+                if fingerprint not in self._clients:
+                    credentials = GoogleAnalyticsConnector.build_credentials(
+                        credentials_config
+                    )
+                    self._clients[fingerprint] = (
+                        credentials,
+                        self.client_factory(credentials)
+                    )
+                credentials, client = self._clients[fingerprint]
+
+                connector = GoogleAnalyticsConnector(
+                    config,
+                    cache=cache,
+                    credentials=credentials,
+                    client=client,
+                    scheduler=self.scheduler,
+                    executor=self._executor
+                )
+                self._connectors[key] = connector
+                self.logger.info(
+                    f"Created pooled GA4 connector for property {key[0]}"
+                )
+            elif cache is not None:
+                connector.cache = cache
+
+        return connector
+
+    async def validate(self, connector: GoogleAnalyticsConnector) -> bool:
+        """
+        Validate a connector's credentials, reusing recent successful checks.
+
+        Args:
+            connector: Connector obtained from this pool
+
+        Returns:
+            True if credentials are valid, False otherwise
+        """
+        key = self._key_for(connector)
+        if self._validated_until.get(key, 0) > time.time():
+            return True
+
+        valid = await connector.validate_credentials()
+        if valid:
+            self._validated_until[key] = time.time() + self.validation_ttl_seconds
+        else:
+            self._validated_until.pop(key, None)
+        return valid
+
+    def invalidate(self, connector: GoogleAnalyticsConnector) -> None:
+        """
+        Forget the cached validation of a connector, e.g. after an auth error.
+
+        Args:
+            connector: Connector obtained from this pool
+        """
+        self._validated_until.pop(self._key_for(connector), None)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get pool counters.
+
+        Returns:
+            Dictionary with the number of pooled connectors and clients
+        """
+        with self._lock:
+            return {
+                'connectors': len(self._connectors),
+                'clients': len(self._clients)
+            }
+
+    def _key_for(self, connector: GoogleAnalyticsConnector) -> Tuple[str, str]:
+        """Find the pool key of a pooled connector."""
+        with self._lock:
+            for key, pooled in self._connectors.items():
+                if pooled is connector:
+                    return key
+        return (connector.property_id, '')
+
+    @staticmethod
+    def _fingerprint(credentials: Dict[str, Any]) -> str:
+        """Identify a credential set without keeping its secrets as a key."""
+        payload = '|'.join(
+            str(credentials.get(key, ''))
+            for key in ('client_id', 'client_secret', 'refresh_token')
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+# Shared by every graph run in this process
+default_pool = ConnectorPool(scheduler=default_scheduler)
@@ -0,0 +1,213 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+class GAResponseCache:
+    """SQLite-backed cache for processed GA4 report responses."""
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: int = 900,
+        settle_days: int = 3,
+        max_size_mb: float = 256
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: Path of the SQLite database file
+            ttl_seconds: Lifetime of entries whose period is not yet settled
+            settle_days: Days after which GA data for a date no longer changes;
+                periods ending before that are cached permanently
+            max_size_mb: Size budget; least recently used entries are evicted
+                once it is exceeded
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.settle_days = settle_days
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL,
+                last_accessed REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(
+        property_id: str,
+        metrics: List[str],
+        dimensions: Optional[List[str]],
+        start_date: datetime,
+        end_date: datetime,
+        row_limit: int,
+        extra: Optional[Any] = None
+    ) -> str:
+        """
+        Build the cache key for a report request.
+
+        Args:
+            property_id: GA4 property ID
+            metrics: List of metric names
+            dimensions: Optional list of dimension names
+            start_date: Start date of the report
+            end_date: End date of the report
+            row_limit: Maximum number of rows requested
+            extra: Optional JSON-serializable request details that also
+                identify the request (e.g. pivot specs)
+
+        Returns:
+            Hex digest identifying the request
+        """
+        parts = [
+            property_id,
+            list(metrics),
+            list(dimensions or []),
+            start_date.strftime("%Y-%m-%d"),
+            end_date.strftime("%Y-%m-%d"),
+            row_limit
+        ]
+        if extra is not None:
+            parts.append(extra)
+        payload = json.dumps(parts, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            Cached processed response, or None on a miss or expired entry
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row is None or (row[1] is not None and row[1] <= now):
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE responses SET last_accessed = ? WHERE key = ?",
+                (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any], end_date: datetime) -> None:
+        """
+        Store a processed response.
+
+        Args:
+            key: Cache key from make_key
+            value: Processed response (must be JSON serializable)
+            end_date: End date of the reported period, used to decide whether
+                the entry is permanent or expires after ttl_seconds
+        """
+        try:
+            payload = json.dumps(value, default=str)
+        except (TypeError, ValueError) as e:
+            self.logger.warning(f"Skipping uncacheable GA4 response: {str(e)}")
+            return
+
+        now = time.time()
+        expires_at = None if self.is_settled(end_date) else now + self.ttl_seconds
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), expires_at, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def is_settled(self, end_date: datetime) -> bool:
+        """
+        Check whether GA data for a period ending on end_date is final.
+
+        Args:
+            end_date: End date of the period
+
+        Returns:
+            True if the period ended more than settle_days ago
+        """
+        end = end_date.date() if isinstance(end_date, datetime) else end_date
+        return end < date.today() - timedelta(days=self.settle_days)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with hits, misses, entries and bytes
+        """
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': entries,
+            'bytes': size
+        }
+
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones until under budget."""
+        self._conn.execute(
+            "DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (time.time(),)
+        )
+
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_accessed"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+
+        self.logger.info(f"Evicted {evicted} GA4 cache entries to stay under budget")
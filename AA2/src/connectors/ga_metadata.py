@@ -0,0 +1,259 @@
+import contextlib
+import difflib
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+from google.analytics.data_v1beta.types import Compatibility, MetricType
+from src.connectors.columnar import resolve_converter
+
+class PropertyMetadata:
+    """Metric and dimension catalog of one GA4 property."""
+
+    def __init__(self, property_id: str, catalog: Dict[str, Any]):
+        """
+        Initialize from a catalog dict as stored on disk.
+
+        Args:
+            property_id: GA4 property ID
+            catalog: Dict with 'dimensions', 'metrics', 'compatibility' and
+                'fetched_at' entries
+        """
+        self.property_id = property_id
+        self.catalog = catalog
+        self.dimensions: Dict[str, Dict[str, Any]] = catalog['dimensions']
+        self.metrics: Dict[str, Dict[str, Any]] = catalog['metrics']
+
+        # Deprecated names still resolve to their current API name
+        self.aliases: Dict[str, str] = {}
+        for entries in (self.dimensions, self.metrics):
+            for api_name, entry in entries.items():
+                for alias in entry.get('deprecated_api_names', []):
+                    self.aliases[alias] = api_name
+
+        # Used by the connector in place of the response header types
+        self.converters: Dict[str, Callable[[str], Any]] = {
+            name: resolve_converter(entry['type'])[1]
+            for name, entry in self.metrics.items()
+        }
+
+    def validate(self, metrics: List[str], dimensions: Optional[List[str]] = None) -> None:
+        """
+        Check metric and dimension names against the catalog.
+
+        Args:
+            metrics: Metric names to check
+            dimensions: Optional dimension names to check
+
+        Raises:
+            ValueError: If any name is unknown to the property
+        """
+        errors = []
+        for kind, names, known in (
+            ('metric', metrics, self.metrics),
+            ('dimension', dimensions or [], self.dimensions),
+        ):
+            for name in names:
+                if name in known:
+                    continue
+                if self.aliases.get(name) in known:
+                    logging.getLogger(self.__class__.__name__).warning(
+                        f"GA4 {kind} '{name}' is deprecated, use '{self.aliases[name]}'"
+                    )
+                    continue
+                suggestions = difflib.get_close_matches(name, known, n=3)
+                hint = f" (did you mean {suggestions}?)" if suggestions else ""
+                errors.append(f"unknown {kind} '{name}'{hint}")
+
+        if errors:
+            raise ValueError(
+                f"Invalid GA4 configuration for property {self.property_id}: "
+                f"{'; '.join(errors)}"
+            )
+
+    def category(self, name: str) -> Optional[str]:
+        """
+        Get the GA4 category of a metric or dimension (e.g. 'Traffic source').
+
+        Args:
+            name: Metric or dimension API name
+
+        Returns:
+            Category, or None if the name is unknown
+        """
+        entry = self.metrics.get(name) or self.dimensions.get(name)
+        return entry.get('category') if entry else None
+
+    def compatibility(self, metrics: List[str], dimensions: List[str]) -> Optional[Dict[str, List[str]]]:
+        """
+        Get a previously checked compatibility result without a round trip.
+
+        Args:
+            metrics: Metric names
+            dimensions: Dimension names
+
+        Returns:
+            Dict with incompatible_metrics and incompatible_dimensions, or None
+            if this combination has not been checked yet
+        """
+        return self.catalog['compatibility'].get(_combination_key(metrics, dimensions))
+
+class GAMetadataCatalog:
+    """Per-property GA4 metadata cached on disk and refreshed periodically."""
+
+    def __init__(self, directory: str, refresh_seconds: int = 86400):
+        """
+        Initialize the catalog.
+
+        Args:
+            directory: Directory holding one JSON file per property
+            refresh_seconds: Age after which the metadata is fetched again
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.directory = directory
+        self.refresh_seconds = refresh_seconds
+        self._loaded: Dict[str, PropertyMetadata] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    async def load(self, connector: Any) -> PropertyMetadata:
+        """
+        Get the metadata of a property, fetching it only when stale.
+
+        Args:
+            connector: GoogleAnalyticsConnector for the property
+
+        Returns:
+            Property metadata
+        """
+        try:
+            property_id = connector.property_id
+            metadata = self._loaded.get(property_id)
+            if metadata is None:
+                metadata = self._read(property_id)
+
+            if metadata is None or self._is_stale(metadata):
+                metadata = await self._fetch(connector)
+                self._write(metadata)
+
+            self._loaded[property_id] = metadata
+            return metadata
+
+        except Exception as e:
+            self.logger.error(f"Error loading GA4 metadata: {str(e)}")
+            raise
+
+    async def check_compatibility(
+        self,
+        connector: Any,
+        metrics: List[str],
+        dimensions: List[str]
+    ) -> Dict[str, List[str]]:
+        """
+        Check whether metrics and dimensions can be queried together.
+
+        Results are cached with the property's metadata, so each combination
+        costs at most one CheckCompatibility call per refresh interval.
+
+        Args:
+            connector: GoogleAnalyticsConnector for the property
+            metrics: Metric names
+            dimensions: Dimension names
+
+        Returns:
+            Dict with incompatible_metrics and incompatible_dimensions
+        """
+        metadata = await self.load(connector)
+        cached = metadata.compatibility(metrics, dimensions)
+        if cached is not None:
+            return cached
+
+        response = await connector.check_compatibility(metrics, dimensions)
+        result = {
+            'incompatible_metrics': [
+                item.metric_metadata.api_name
+                for item in response.metric_compatibilities
+                if item.compatibility == Compatibility.INCOMPATIBLE
+            ],
+            'incompatible_dimensions': [
+                item.dimension_metadata.api_name
+                for item in response.dimension_compatibilities
+                if item.compatibility == Compatibility.INCOMPATIBLE
+            ]
+        }
+
+        metadata.catalog['compatibility'][_combination_key(metrics, dimensions)] = result
+        self._write(metadata)
+        return result
+
+    async def _fetch(self, connector: Any) -> PropertyMetadata:
+        """Fetch the metadata of a property from the GetMetadata endpoint."""
+        self.logger.info(f"Fetching GA4 metadata for property {connector.property_id}")
+        response = await connector.get_metadata()
+
+        return PropertyMetadata(connector.property_id, {
+            'fetched_at': time.time(),
+            'dimensions': {
+                item.api_name: {
+                    'ui_name': item.ui_name,
+                    'category': item.category,
+                    'custom_definition': item.custom_definition,
+                    'deprecated_api_names': list(item.deprecated_api_names)
+                }
+                for item in response.dimensions
+            },
+            'metrics': {
+                item.api_name: {
+                    'ui_name': item.ui_name,
+                    'category': item.category,
+                    'type': MetricType(item.type_).name,
+                    'expression': item.expression,
+                    'custom_definition': item.custom_definition,
+                    'deprecated_api_names': list(item.deprecated_api_names),
+                    'blocked_reasons': [reason.name for reason in item.blocked_reasons]
+                }
+                for item in response.metrics
+            },
+            'compatibility': {}
+        })
+
+    def _is_stale(self, metadata: PropertyMetadata) -> bool:
+        """Check whether metadata is older than the refresh interval."""
+        return time.time() - metadata.catalog.get('fetched_at', 0) > self.refresh_seconds
+
+    def _path(self, property_id: str) -> str:
+        """Path of the JSON file of a property."""
+        return os.path.join(self.directory, f"{property_id}.json")
+
+    def _read(self, property_id: str) -> Optional[PropertyMetadata]:
+        """Read cached metadata from disk, if present."""
+        try:
+            with open(self._path(property_id), "r") as f:
+                return PropertyMetadata(property_id, json.load(f))
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError) as e:
+            self.logger.warning(f"Ignoring corrupt GA4 metadata cache: {str(e)}")
+            return None
+
+    def _write(self, metadata: PropertyMetadata) -> None:
+        """Write metadata to disk atomically."""
+        path = self._path(metadata.property_id)
+        # A private temporary file per write, as overlapping runs of the same
+        # property may refresh the catalog at the same time
+        descriptor, temporary = tempfile.mkstemp(
+            dir=self.directory, prefix=f".{metadata.property_id}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(descriptor, "w") as f:
+                json.dump(metadata.catalog, f)
+            os.replace(temporary, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temporary)
+            raise
+
+def _combination_key(metrics: List[str], dimensions: List[str]) -> str:
+    """Order-independent key of a metric/dimension combination."""
+    return f"{','.join(sorted(metrics))}|{','.join(sorted(dimensions))}"
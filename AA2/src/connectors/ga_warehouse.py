@@ -0,0 +1,353 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from src.utils.metric_aggregation import aggregation_kinds, combine_rows
+
+class GAWarehouse:
+    """Local daily-partitioned store of GA4 report data, one SQLite file per property."""
+
+    def __init__(self, directory: str, settle_days: int = 3):
+        """
+        Initialize the warehouse.
+
+        Args:
+            directory: Directory holding one SQLite file per property
+            settle_days: Days after which GA data for a date is final; more
+                recent partitions are refetched on every sync
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.directory = directory
+        self.settle_days = settle_days
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connections: Dict[str, sqlite3.Connection] = {}
+
+    async def sync(
+        self,
+        connector: Any,
+        metrics: List[str],
+        dimensions: Optional[List[str]],
+        start_date: datetime,
+        end_date: datetime,
+        page_size: int = 10000
+    ) -> int:
+        """
+        Fetch the days in a range that are missing or not yet final.
+
+        Each contiguous run of stale days is fetched as one paginated report
+        with an added date dimension, plus a date-only report for exact daily
+        totals. Runs are fetched concurrently.
+
+        Args:
+            connector: GoogleAnalyticsConnector for the property
+            metrics: List of metric names
+            dimensions: Optional list of dimension names
+            start_date: First day to cover
+            end_date: Last day to cover
+            page_size: Rows per page when streaming a run
+
+        Returns:
+            Number of days fetched from GA
+        """
+        try:
+            property_id = connector.property_id
+            dataset = self._dataset_key(metrics, dimensions)
+            stale_days = self._stale_days(property_id, dataset, start_date, end_date)
+            if not stale_days:
+                self.logger.info(
+                    f"Warehouse for property {property_id} is up to date "
+                    f"from {start_date.date()} to {end_date.date()}"
+                )
+                return 0
+
+            runs = _contiguous_runs(stale_days)
+            self.logger.info(
+                f"Syncing {len(stale_days)} days in {len(runs)} runs "
+                f"for property {property_id}"
+            )
+            await asyncio.gather(*[
+                self._sync_run(
+                    connector, dataset, metrics, dimensions, run_start, run_end, page_size
+                )
+                for run_start, run_end in runs
+            ])
+            return len(stale_days)
+
+        except Exception as e:
+            self.logger.error(f"Error syncing GA4 warehouse: {str(e)}")
+            raise
+
+    def window(
+        self,
+        property_id: str,
+        metrics: List[str],
+        dimensions: Optional[List[str]],
+        start_date: datetime,
+        end_date: datetime
+    ) -> Dict[str, Any]:
+        """
+        Compute a date window from local partitions.
+
+        Args:
+            property_id: GA4 property ID
+            metrics: List of metric names
+            dimensions: Optional list of dimension names
+            start_date: First day of the window
+            end_date: Last day of the window
+
+        Returns:
+            Data in the same format as GoogleAnalyticsConnector.fetch_data.
+            Unique-user metrics are sums of daily values and are listed under
+            metadata.approximate_metrics.
+        """
+        dimensions = list(dimensions or [])
+        dataset = self._dataset_key(metrics, dimensions)
+        partitions = self._load_partitions(property_id, dataset, start_date, end_date)
+
+        rows = combine_rows(
+            (row for _, day_rows, _ in partitions for row in day_rows),
+            dimensions,
+            metrics
+        )
+        totals = combine_rows(
+            (day_totals for _, _, day_totals in partitions),
+            [],
+            metrics
+        )
+
+        kinds = aggregation_kinds(metrics)
+        return {
+            'dimension_headers': dimensions,
+            'metric_headers': self._metric_headers(property_id, dataset),
+            'rows': rows,
+            'row_count': len(rows),
+            'totals': totals[0] if totals else {},
+            'metadata': {
+                'property_id': property_id,
+                'date_range': {
+                    'start': start_date.strftime("%Y-%m-%d"),
+                    'end': end_date.strftime("%Y-%m-%d")
+                },
+                'source': 'warehouse',
+                'days': len(partitions),
+                'approximate_metrics': [
+                    metric for metric in metrics if kinds[metric] == 'distinct'
+                ]
+            }
+        }
+
+    def daily_totals(
+        self,
+        property_id: str,
+        metrics: List[str],
+        dimensions: Optional[List[str]],
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Get the stored daily totals for a date range.
+
+        Args:
+            property_id: GA4 property ID
+            metrics: List of metric names
+            dimensions: Optional list of dimension names of the dataset
+            start_date: First day
+            end_date: Last day
+
+        Returns:
+            List of (ISO date, totals) pairs in date order
+        """
+        dataset = self._dataset_key(metrics, dimensions)
+        return [
+            (day, totals)
+            for day, _, totals in self._load_partitions(
+                property_id, dataset, start_date, end_date
+            )
+        ]
+
+    async def _sync_run(
+        self,
+        connector: Any,
+        dataset: str,
+        metrics: List[str],
+        dimensions: Optional[List[str]],
+        run_start: date,
+        run_end: date,
+        page_size: int
+    ) -> None:
+        """Fetch one contiguous run of days and store it as daily partitions."""
+        start = datetime.combine(run_start, datetime.min.time())
+        end = datetime.combine(run_end, datetime.min.time())
+        breakdown_dimensions = list(dimensions or []) + ['date']
+
+        rows_by_day: Dict[str, List[Dict[str, Any]]] = {}
+        metric_headers: List[Dict[str, str]] = []
+
+        async def stream_rows() -> None:
+            async for page in connector.iter_pages(
+                metrics=metrics,
+                dimensions=breakdown_dimensions,
+                start_date=start,
+                end_date=end,
+                page_size=page_size
+            ):
+                metric_headers[:] = page['metric_headers']
+                for row in page['rows']:
+                    day = _iso_date(row.pop('date'))
+                    rows_by_day.setdefault(day, []).append(row)
+
+        daily, _ = await asyncio.gather(
+            connector.fetch_data(
+                metrics=metrics,
+                dimensions=['date'],
+                start_date=start,
+                end_date=end,
+                row_limit=(run_end - run_start).days + 1
+            ),
+            stream_rows()
+        )
+        totals_by_day = {_iso_date(row.pop('date')): row for row in daily['rows']}
+
+        settled_before = date.today() - timedelta(days=self.settle_days)
+        now = time.time()
+        partitions = []
+        day = run_start
+        while day <= run_end:
+            key = day.isoformat()
+            partitions.append((
+                dataset,
+                key,
+                int(day < settled_before),
+                now,
+                json.dumps(rows_by_day.get(key, [])),
+                json.dumps(totals_by_day.get(key, {}))
+            ))
+            day += timedelta(days=1)
+
+        conn = self._connection(connector.property_id)
+        with self._lock:
+            conn.executemany(
+                "INSERT OR REPLACE INTO partitions VALUES (?, ?, ?, ?, ?, ?)",
+                partitions
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO datasets VALUES (?, ?)",
+                (dataset, json.dumps(metric_headers or daily['metric_headers']))
+            )
+            conn.commit()
+
+    def _stale_days(
+        self,
+        property_id: str,
+        dataset: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[date]:
+        """List the days in a range that are missing or not final."""
+        conn = self._connection(property_id)
+        with self._lock:
+            final_days = {
+                row[0] for row in conn.execute(
+                    "SELECT day FROM partitions "
+                    "WHERE dataset = ? AND day BETWEEN ? AND ? AND final = 1",
+                    (dataset, start_date.date().isoformat(), end_date.date().isoformat())
+                )
+            }
+
+        stale = []
+        day = start_date.date()
+        while day <= end_date.date():
+            if day.isoformat() not in final_days:
+                stale.append(day)
+            day += timedelta(days=1)
+        return stale
+
+    def _load_partitions(
+        self,
+        property_id: str,
+        dataset: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[Tuple[str, List[Dict[str, Any]], Dict[str, Any]]]:
+        """Load (day, rows, totals) for the stored days in a range."""
+        conn = self._connection(property_id)
+        with self._lock:
+            stored = conn.execute(
+                "SELECT day, rows, totals FROM partitions "
+                "WHERE dataset = ? AND day BETWEEN ? AND ? ORDER BY day",
+                (dataset, start_date.date().isoformat(), end_date.date().isoformat())
+            ).fetchall()
+
+        return [(day, json.loads(rows), json.loads(totals)) for day, rows, totals in stored]
+
+    def _metric_headers(self, property_id: str, dataset: str) -> List[Dict[str, str]]:
+        """Get the metric headers recorded for a dataset."""
+        conn = self._connection(property_id)
+        with self._lock:
+            row = conn.execute(
+                "SELECT metric_headers FROM datasets WHERE dataset = ?",
+                (dataset,)
+            ).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def _connection(self, property_id: str) -> sqlite3.Connection:
+        """Open (once) the SQLite file of a property."""
+        with self._lock:
+            conn = self._connections.get(property_id)
+            if conn is None:
+                conn = sqlite3.connect(
+                    os.path.join(self.directory, f"{property_id}.sqlite"),
+                    check_same_thread=False
+                )
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS partitions (
+                        dataset TEXT NOT NULL,
+                        day TEXT NOT NULL,
+                        final INTEGER NOT NULL,
+                        fetched_at REAL NOT NULL,
+                        rows TEXT NOT NULL,
+                        totals TEXT NOT NULL,
+                        PRIMARY KEY (dataset, day)
+                    )
+                    """
+                )
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS datasets (
+                        dataset TEXT PRIMARY KEY,
+                        metric_headers TEXT NOT NULL
+                    )
+                    """
+                )
+                conn.commit()
+                self._connections[property_id] = conn
+            return conn
+
+    @staticmethod
+    def _dataset_key(metrics: List[str], dimensions: Optional[List[str]]) -> str:
+        """Identify a metric/dimension combination stored in the warehouse."""
+        payload = json.dumps([list(metrics), list(dimensions or [])])
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+def _iso_date(ga_date: str) -> str:
+    """Convert a GA4 date dimension value (YYYYMMDD) to ISO format."""
+    return f"{ga_date[:4]}-{ga_date[4:6]}-{ga_date[6:8]}"
+
+def _contiguous_runs(days: List[date]) -> List[Tuple[date, date]]:
+    """Group sorted days into (start, end) runs of consecutive days."""
+    runs = []
+    for day in days:
+        if runs and day - runs[-1][1] == timedelta(days=1):
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
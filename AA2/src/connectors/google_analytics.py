@@ -1,22 +1,56 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional, Tuple
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from google.oauth2.credentials import Credentials
 from google.analytics.data_v1beta import BetaAnalyticsDataClient
 from google.analytics.data_v1beta.types import (
     RunReportRequest,
+    BatchRunReportsRequest,
+    RunPivotReportRequest,
+    BatchRunPivotReportsRequest,
+    Pivot,
+    OrderBy,
+    CheckCompatibilityRequest,
+    GetMetadataRequest,
     DateRange,
     Metric,
     Dimension,
     MetricType,
+    MetricAggregation,
 )
 from dotenv import load_dotenv
+from src.connectors.columnar import ColumnarResult, intern_rows, resolve_converter
+from src.connectors.ga_cache import GAResponseCache
+from src.connectors.quota_scheduler import QuotaScheduler
 load_dotenv()
 
+# GA4 accepts at most four date ranges in a single RunReportRequest
+MAX_DATE_RANGES = 4
+
+# GA4 accepts at most five reports in a single BatchRunReportsRequest
+MAX_BATCH_REPORTS = 5
+
+# Dimension values GA4 uses in pivot aggregate rows
+PIVOT_AGGREGATE_VALUES = {
+    'RESERVED_TOTAL': 'total',
+    'RESERVED_MIN': 'minimum',
+    'RESERVED_MAX': 'maximum',
+}
+
 class GoogleAnalyticsConnector:
     """Handles connection and data fetching from Google Analytics 4."""
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        cache: Optional[GAResponseCache] = None,
+        credentials: Optional[Credentials] = None,
+        client: Optional[BetaAnalyticsDataClient] = None,
+        scheduler: Optional[QuotaScheduler] = None,
+        executor: Optional[ThreadPoolExecutor] = None
+    ):
         """
         Initialize the GA4 connector.
         
@@ -24,24 +58,75 @@ class GoogleAnalyticsConnector:
             config: Configuration dictionary containing:
                 - property_id: GA4 property ID
                 - credentials: OAuth2 credentials dict
+                - max_concurrent_requests: Optional size of the executor
+                  that runs blocking Data API calls (defaults to 4; ignored
+                  when an executor is given)
+            cache: Optional response cache consulted by fetch_data and
+                fetch_comparison for non-columnar requests
+            credentials: Optional existing credentials to share (see
+                ConnectorPool), so their access token is reused
+            client: Optional existing Data API client to share, so its
+                gRPC channel stays warm
+            scheduler: Optional QuotaScheduler that throttles, prioritizes
+                and retries every request of this connector (one activated
+                with QuotaScheduler.activate takes precedence)
+            executor: Optional existing executor to share (see
+                ConnectorPool), so connectors of many properties do not each
+                keep threads of their own
         """
         self.logger = logging.getLogger(self.__class__.__name__)
         self.validate_config(config)
         
         self.property_id = config['property_id']
+        self.cache = cache
+        self.scheduler = scheduler
         
         # Create credentials with all required fields
-        self.credentials = Credentials(
+        self.credentials = credentials or self.build_credentials(config['credentials'])
+        
+        self.client = client or BetaAnalyticsDataClient(credentials=self.credentials)
+        
+        # Per-metric converters precomputed from the property's metadata
+        # catalog (see use_metadata); other metrics use their header type
+        self.converters: Dict[str, Callable[[str], Any]] = {}
+        
+        # The Data API client is blocking, so calls run on a bounded executor
+        # to keep the event loop free and let independent requests overlap
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=config.get('max_concurrent_requests', 4),
+            thread_name_prefix='ga4-connector'
+        )
+        
+    @staticmethod
+    def build_credentials(credentials: Dict[str, str]) -> Credentials:
+        """
+        Create OAuth2 credentials from a credentials dict.
+        
+        Args:
+            credentials: Dict with refresh_token, client_id and client_secret
+            
+        Returns:
+            Credentials that obtain their access token through refresh
+        """
+        return Credentials(
             token=None,  # Token will be obtained through refresh
-            refresh_token=config['credentials']['refresh_token'],
+            refresh_token=credentials['refresh_token'],
             token_uri='https://oauth2.googleapis.com/token',
-            client_id=config['credentials']['client_id'],
-            client_secret=config['credentials']['client_secret'],
+            client_id=credentials['client_id'],
+            client_secret=credentials['client_secret'],
             scopes=['https://www.googleapis.com/auth/analytics.readonly']
         )
+
+    def use_metadata(self, metadata: Any) -> None:
+        """
+        Convert metric values with the converters of the property's metadata.
         
-        self.client = BetaAnalyticsDataClient(credentials=self.credentials)
-        
+        Args:
+            metadata: PropertyMetadata of this connector's property (see
+                GAMetadataCatalog.load)
+        """
+        self.converters = metadata.converters
+
     def validate_config(self, config: Dict[str, Any]) -> None:
         """Validate the configuration."""
         required_keys = ['property_id', 'credentials']
@@ -63,7 +148,8 @@ class GoogleAnalyticsConnector:
         dimensions: Optional[List[str]] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        row_limit: int = 10000
+        row_limit: int = 10000,
+        columnar: bool = False
     ) -> Dict[str, Any]:
         """
         Fetch data from GA4.
@@ -74,6 +160,7 @@ class GoogleAnalyticsConnector:
             start_date: Start date for the report (defaults to 30 days ago)
             end_date: End date for the report (defaults to today)
             row_limit: Maximum number of rows to return
+            columnar: Whether to return a columnar result (see _process_response)
             
         Returns:
             Dictionary containing the fetched data
@@ -85,26 +172,32 @@ class GoogleAnalyticsConnector:
             if not end_date:
                 end_date = datetime.now()
 
-            # Prepare dimensions
-            dimension_list = []
-            if dimensions:
-                dimension_list = [Dimension(name=dim) for dim in dimensions]
-
-            # Prepare metrics
-            metric_list = [Metric(name=metric) for metric in metrics]
+            # Serve from cache when possible
+            cache_key = None
+            if self.cache and not columnar:
+                cache_key = self.cache.make_key(
+                    self.property_id, metrics, dimensions,
+                    start_date, end_date, row_limit
+                )
+                cached = await self._cache_get(cache_key)
+                if cached is not None:
+                    self.logger.info(
+                        f"Serving GA4 data from cache for date range: "
+                        f"{start_date.date()} to {end_date.date()}"
+                    )
+                    return cached
 
             # Create request
-            request = RunReportRequest(
-                property=f"properties/{self.property_id}",
-                dimensions=dimension_list,
-                metrics=metric_list,
+            request = self._build_request(
+                metrics=metrics,
+                dimensions=dimensions,
                 date_ranges=[
                     DateRange(
                         start_date=start_date.strftime("%Y-%m-%d"),
                         end_date=end_date.strftime("%Y-%m-%d")
                     )
                 ],
-                limit=row_limit
+                row_limit=row_limit
             )
 
             # Execute request
@@ -112,26 +205,879 @@ class GoogleAnalyticsConnector:
                 f"Fetching GA4 data for date range: "
                 f"{start_date.date()} to {end_date.date()}"
             )
-            response = self.client.run_report(request)
+            response = await self._execute('run_report', request)
 
             # Process response
-            return self._process_response(response)
+            result = self._process_response(response, columnar=columnar)
+            if response.row_count > result['row_count']:
+                self.logger.warning(
+                    f"GA4 report truncated to {result['row_count']} of "
+                    f"{response.row_count} rows; use iter_pages to stream all rows"
+                )
+            if cache_key:
+                await self._cache_set(cache_key, result, end_date)
+            return result
 
         except Exception as e:
             self.logger.error(f"Error fetching GA4 data: {str(e)}")
             raise
 
-    def _process_response(self, response: Any) -> Dict[str, Any]:
+    async def iter_pages(
+        self,
+        metrics: List[str],
+        dimensions: Optional[List[str]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        page_size: int = 10000,
+        columnar: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a report page by page, following offset until all rows are read.
+        
+        The next page is requested while the caller consumes the current one,
+        so at most two pages are held in memory at any time.
+        
+        Args:
+            metrics: List of metric names to fetch
+            dimensions: Optional list of dimension names
+            start_date: Start date for the report (defaults to 30 days ago)
+            end_date: End date for the report (defaults to today)
+            page_size: Number of rows to request per page
+            columnar: Whether to yield columnar pages (see _process_response)
+            
+        Yields:
+            Processed page in the same format as fetch_data, with the page
+            offset and the report's total row count added to its metadata
+        """
+        spec = {
+            'metrics': metrics,
+            'dimensions': dimensions,
+            'start_date': start_date,
+            'end_date': end_date,
+            'row_limit': page_size
+        }
+
+        async def fetch_page(offset: int) -> Any:
+            request = self._build_spec_request(spec)
+            request.offset = offset
+            return await self._execute('run_report', request)
+
+        offset = 0
+        pending = asyncio.ensure_future(fetch_page(offset))
+        try:
+            while pending is not None:
+                response = await pending
+                pending = None
+
+                page_rows = len(response.rows)
+                if not page_rows:
+                    break
+
+                # Prefetch the next page before handing this one to the caller
+                next_offset = offset + page_rows
+                if next_offset < response.row_count:
+                    pending = asyncio.ensure_future(fetch_page(next_offset))
+
+                page = self._process_response(response, columnar=columnar)
+                page['metadata']['offset'] = offset
+                self.logger.debug(
+                    f"Fetched GA4 rows {offset} to {next_offset} "
+                    f"of {response.row_count}"
+                )
+                yield page
+
+                offset = next_offset
+
+        except Exception as e:
+            self.logger.error(f"Error streaming GA4 data: {str(e)}")
+            raise
+
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def fetch_comparison(
+        self,
+        metrics: List[str],
+        date_ranges: Dict[str, Tuple[datetime, datetime]],
+        dimensions: Optional[List[str]] = None,
+        row_limit: int = 10000,
+        columnar: bool = False
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch several comparison windows with as few requests as possible.
+        
+        Up to four windows are sent as named date ranges in one request and
+        the response is split back per window using the `dateRange`
+        pseudo-dimension GA adds to every row. GA applies the row limit to
+        the rows of all windows together, so a truncated combined response
+        is fetched again one window per request.
+        
+        Args:
+            metrics: List of metric names to fetch
+            date_ranges: Mapping of window name to (start_date, end_date)
+            dimensions: Optional list of dimension names
+            row_limit: Maximum number of rows to return per window
+            columnar: Whether to return columnar results (see _process_response)
+            
+        Returns:
+            Dictionary mapping each window name to its processed data, in the
+            same format as fetch_data
+        """
+        try:
+            results = {}
+            windows = []
+            cache_keys = {}
+            for name, (start, end) in date_ranges.items():
+                if self.cache and not columnar:
+                    cache_keys[name] = self.cache.make_key(
+                        self.property_id, metrics, dimensions, start, end, row_limit
+                    )
+                    cached = await self._cache_get(cache_keys[name])
+                    if cached is not None:
+                        results[name] = cached
+                        continue
+                windows.append((name, (start, end)))
+
+            if results:
+                self.logger.info(
+                    f"Serving GA4 comparison windows from cache: {list(results)}"
+                )
+
+            chunks = [
+                windows[i:i + MAX_DATE_RANGES]
+                for i in range(0, len(windows), MAX_DATE_RANGES)
+            ]
+
+            for chunk_result in await asyncio.gather(*[
+                self._fetch_comparison_chunk(
+                    metrics, chunk, dimensions, row_limit, columnar
+                )
+                for chunk in chunks
+            ]):
+                results.update(chunk_result)
+
+            for name, (start, end) in windows:
+                if name in cache_keys:
+                    await self._cache_set(cache_keys[name], results[name], end)
+
+            return {name: results[name] for name in date_ranges}
+
+        except Exception as e:
+            self.logger.error(f"Error fetching GA4 comparison data: {str(e)}")
+            raise
+
+    async def _fetch_comparison_chunk(
+        self,
+        metrics: List[str],
+        windows: List[Tuple[str, Tuple[datetime, datetime]]],
+        dimensions: Optional[List[str]],
+        row_limit: int,
+        columnar: bool = False
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch up to MAX_DATE_RANGES windows in a single request.
+        
+        Args:
+            metrics: List of metric names to fetch
+            windows: List of (window name, (start_date, end_date)) pairs
+            dimensions: Optional list of dimension names
+            row_limit: Maximum number of rows to return per window
+            columnar: Whether to return columnar results
+            
+        Returns:
+            Dictionary mapping each window name to its processed data
+        """
+        # The row limit applies to the combined rows of all date ranges
+        request = self._build_request(
+            metrics=metrics,
+            dimensions=dimensions,
+            date_ranges=[
+                DateRange(
+                    start_date=start.strftime("%Y-%m-%d"),
+                    end_date=end.strftime("%Y-%m-%d"),
+                    name=name
+                )
+                for name, (start, end) in windows
+            ],
+            row_limit=row_limit * len(windows)
+        )
+
+        self.logger.info(
+            f"Fetching GA4 comparison data for windows: "
+            f"{[name for name, _ in windows]}"
+        )
+        response = await self._execute('run_report', request)
+
+        if response.row_count > len(response.rows):
+            if len(windows) > 1:
+                # A busy window may have taken rows the other windows needed,
+                # so every window is fetched on its own with the full limit
+                self.logger.warning(
+                    f"GA4 comparison report truncated to {len(response.rows)} of "
+                    f"{response.row_count} rows across windows; fetching each window separately"
+                )
+                results = {}
+                for chunk_result in await asyncio.gather(*[
+                    self._fetch_comparison_chunk(metrics, [window], dimensions, row_limit, columnar)
+                    for window in windows
+                ]):
+                    results.update(chunk_result)
+                return results
+            self.logger.warning(
+                f"GA4 report for window {windows[0][0]} truncated to "
+                f"{len(response.rows)} of {response.row_count} rows"
+            )
+
+        return self._split_by_date_range(
+            self._process_response(response, columnar=columnar),
+            response,
+            windows
+        )
+
+    def _split_by_date_range(
+        self,
+        processed: Dict[str, Any],
+        response: Any,
+        windows: List[Tuple[str, Tuple[datetime, datetime]]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Split a processed multi-date-range response into per-window results.
+        
+        Args:
+            processed: Output of _process_response for the combined response
+            response: Raw GA4 API response (used for per-range totals)
+            windows: List of (window name, (start_date, end_date)) pairs
+            
+        Returns:
+            Dictionary mapping each window name to its processed data;
+            metadata.total_row_count is the number of rows GA matched for the
+            window (exact, as a truncated multi-window response is never split)
+        """
+        dimension_headers = [
+            header for header in processed['dimension_headers']
+            if header != 'dateRange'
+        ]
+
+        # GA only adds the dateRange dimension when more than one range is sent
+        columns_by_window = {}
+        rows_by_window = {name: [] for name, _ in windows}
+        columns = processed.get('columns')
+        if columns is not None:
+            if 'dateRange' in columns.dimensions:
+                columns_by_window = columns.split_by('dateRange')
+            else:
+                columns_by_window = {windows[0][0]: columns}
+            rows_by_window = {
+                name: columns_by_window.setdefault(name, columns.empty_like()).rows
+                for name, _ in windows
+            }
+        else:
+            for row in processed['rows']:
+                name = row.pop('dateRange', windows[0][0])
+                rows_by_window.setdefault(name, []).append(row)
+
+        totals_by_window = self._process_range_totals(
+            response,
+            [name for name, _ in windows]
+        )
+
+        results = {}
+        for name, (start, end) in windows:
+            results[name] = {
+                'dimension_headers': dimension_headers,
+                'metric_headers': processed['metric_headers'],
+                'rows': rows_by_window[name],
+                'row_count': len(rows_by_window[name]),
+                'totals': totals_by_window.get(name, {}),
+                'metadata': {
+                    'property_id': self.property_id,
+                    'total_row_count': (
+                        response.row_count if len(windows) == 1
+                        else len(rows_by_window[name])
+                    ),
+                    'date_range': {
+                        'start': start.strftime("%Y-%m-%d"),
+                        'end': end.strftime("%Y-%m-%d")
+                    }
+                }
+            }
+            if name in columns_by_window:
+                results[name]['columns'] = columns_by_window[name]
+
+        return results
+
+    def _build_request(
+        self,
+        metrics: List[str],
+        dimensions: Optional[List[str]],
+        date_ranges: List[DateRange],
+        row_limit: int
+    ) -> RunReportRequest:
+        """
+        Build a RunReportRequest for this property.
+        
+        Args:
+            metrics: List of metric names to fetch
+            dimensions: Optional list of dimension names
+            date_ranges: Date ranges to report on
+            row_limit: Maximum number of rows to return
+            
+        Returns:
+            RunReportRequest with metric totals requested
+        """
+        return RunReportRequest(
+            property=f"properties/{self.property_id}",
+            dimensions=[Dimension(name=dim) for dim in dimensions or []],
+            metrics=[Metric(name=metric) for metric in metrics],
+            date_ranges=date_ranges,
+            metric_aggregations=[MetricAggregation.TOTAL],
+            limit=row_limit
+        )
+
+    async def batch_fetch(
+        self,
+        specs: List[Dict[str, Any]],
+        columnar: bool = False
+    ) -> List[Any]:
+        """
+        Fetch several differently shaped reports through batchRunReports.
+        
+        Windows served from the cache are left out; the remaining reports are
+        packed into batches of up to five and the batches are sent
+        concurrently. A truncated comparison report is fetched again one
+        window per request, as in fetch_comparison.
+        
+        Args:
+            specs: List of report specs, each a dict with the same keys as the
+                fetch_data arguments (metrics, dimensions, start_date,
+                end_date, row_limit), or with date_ranges (window name ->
+                (start_date, end_date), at most four) instead of start_date
+                and end_date for a comparison report whose row_limit applies
+                per window
+            columnar: Whether to return columnar results (see _process_response)
+            
+        Returns:
+            List in the same order as specs: for a comparison report a dict
+            mapping each window name to its data (see fetch_comparison),
+            otherwise the data as fetch_data returns it
+        """
+        try:
+            windows_by_spec = [self._spec_windows(spec) for spec in specs]
+            results: List[Dict[str, Dict[str, Any]]] = [{} for _ in specs]
+            cache_keys: Dict[Tuple[int, str], str] = {}
+            reports = []
+            for position, (spec, windows) in enumerate(zip(specs, windows_by_spec)):
+                missing = []
+                for name, (start, end) in windows:
+                    if self.cache and not columnar:
+                        key = cache_keys[(position, name)] = self.cache.make_key(
+                            self.property_id, spec['metrics'], spec.get('dimensions'),
+                            start, end, spec.get('row_limit', 10000)
+                        )
+                        cached = await self._cache_get(key)
+                        if cached is not None:
+                            results[position][name] = cached
+                            continue
+                    missing.append((name, (start, end)))
+                if missing:
+                    reports.append((position, missing))
+
+            batches = [
+                reports[i:i + MAX_BATCH_REPORTS]
+                for i in range(0, len(reports), MAX_BATCH_REPORTS)
+            ]
+            self.logger.info(
+                f"Fetching {len(reports)} GA4 reports in {len(batches)} batch requests"
+                + (f" ({len(specs) - len(reports)} served from cache)" if len(reports) < len(specs) else "")
+            )
+            responses = await asyncio.gather(*[
+                self._execute(
+                    'batch_run_reports',
+                    BatchRunReportsRequest(
+                        property=f"properties/{self.property_id}",
+                        requests=[
+                            self._build_window_request(specs[position], windows)
+                            for position, windows in batch
+                        ]
+                    )
+                )
+                for batch in batches
+            ])
+
+            refetches = []
+            for (position, windows), response in zip(
+                [report for batch in batches for report in batch],
+                [report for response in responses for report in response.reports]
+            ):
+                if response.row_count > len(response.rows):
+                    if len(windows) > 1:
+                        # The limit applies to all windows together (see
+                        # _fetch_comparison_chunk)
+                        refetches.extend((position, window) for window in windows)
+                        continue
+                    self.logger.warning(
+                        f"GA4 report truncated to {len(response.rows)} of "
+                        f"{response.row_count} rows; use iter_pages to stream all rows"
+                    )
+                results[position].update(self._split_by_date_range(
+                    self._process_response(response, columnar=columnar),
+                    response,
+                    windows
+                ))
+
+            if refetches:
+                self.logger.warning(
+                    f"{len(refetches)} GA4 comparison windows truncated across "
+                    f"windows; fetching each window separately"
+                )
+                for (position, window), chunk_result in zip(refetches, await asyncio.gather(*[
+                    self._fetch_comparison_chunk(
+                        specs[position]['metrics'], [window], specs[position].get('dimensions'),
+                        specs[position].get('row_limit', 10000), columnar
+                    )
+                    for position, window in refetches
+                ])):
+                    results[position].update(chunk_result)
+
+            for position, windows in reports:
+                for name, (start, end) in windows:
+                    if (position, name) in cache_keys:
+                        await self._cache_set(cache_keys[(position, name)], results[position][name], end)
+
+            return [
+                results[position] if 'date_ranges' in spec else results[position][windows[0][0]]
+                for position, (spec, windows) in enumerate(zip(specs, windows_by_spec))
+            ]
+
+        except Exception as e:
+            self.logger.error(f"Error batch fetching GA4 data: {str(e)}")
+            raise
+
+    def _spec_windows(self, spec: Dict[str, Any]) -> List[Tuple[str, Tuple[datetime, datetime]]]:
+        """
+        Get the windows of a report spec.
+        
+        Args:
+            spec: Report spec (see batch_fetch)
+            
+        Returns:
+            List of (window name, (start_date, end_date)) pairs; a spec without
+            date_ranges has one window named after GA's default range name
+        """
+        if 'date_ranges' in spec:
+            if len(spec['date_ranges']) > MAX_DATE_RANGES:
+                raise ValueError(
+                    f"A batched comparison report takes at most {MAX_DATE_RANGES} "
+                    f"date ranges, got {len(spec['date_ranges'])}"
+                )
+            return list(spec['date_ranges'].items())
+        return [('date_range_0', (
+            spec.get('start_date') or datetime.now() - timedelta(days=30),
+            spec.get('end_date') or datetime.now()
+        ))]
+
+    def _build_window_request(
+        self,
+        spec: Dict[str, Any],
+        windows: List[Tuple[str, Tuple[datetime, datetime]]]
+    ) -> RunReportRequest:
+        """
+        Build a RunReportRequest for some windows of a report spec.
+        
+        Args:
+            spec: Report spec (see batch_fetch)
+            windows: List of (window name, (start_date, end_date)) pairs
+            
+        Returns:
+            RunReportRequest with one named date range per window
+        """
+        return self._build_request(
+            metrics=spec['metrics'],
+            dimensions=spec.get('dimensions'),
+            date_ranges=[
+                DateRange(
+                    start_date=start.strftime("%Y-%m-%d"),
+                    end_date=end.strftime("%Y-%m-%d"),
+                    name=name
+                )
+                for name, (start, end) in windows
+            ],
+            row_limit=spec.get('row_limit', 10000) * len(windows)
+        )
+
+    def _build_spec_request(self, spec: Dict[str, Any]) -> RunReportRequest:
+        """
+        Build a RunReportRequest from a report spec.
+        
+        Args:
+            spec: Report spec with the same keys as the fetch_data arguments
+            
+        Returns:
+            RunReportRequest for the spec
+        """
+        start_date = spec.get('start_date') or datetime.now() - timedelta(days=30)
+        end_date = spec.get('end_date') or datetime.now()
+
+        return self._build_request(
+            metrics=spec['metrics'],
+            dimensions=spec.get('dimensions'),
+            date_ranges=[
+                DateRange(
+                    start_date=start_date.strftime("%Y-%m-%d"),
+                    end_date=end_date.strftime("%Y-%m-%d")
+                )
+            ],
+            row_limit=spec.get('row_limit', 10000)
+        )
+
+    async def fetch_pivot(
+        self,
+        metrics: List[str],
+        dimensions: List[str],
+        pivots: List[Dict[str, Any]],
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        columnar: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Fetch a pivot report, letting GA aggregate and rank server side.
+        
+        Args:
+            metrics: List of metric names
+            dimensions: Dimension names used by the pivots
+            pivots: Pivot specs, each a dict with:
+                - field_names: Dimensions of this pivot
+                - limit: Number of value combinations to keep (the product of
+                  all pivot limits may not exceed 100000)
+                - offset: Optional first combination to return
+                - order_by: Optional metric ranking the combinations
+                  (descending), otherwise ordered by dimension value
+                - aggregate: Whether GA returns totals for this pivot
+            start_date: Start date for the report (defaults to 30 days ago)
+            end_date: End date for the report (defaults to today)
+            columnar: Whether to return a columnar result (see _process_response)
+            
+        Returns:
+            Dictionary in the same format as fetch_data, plus pivot_headers
+            (kept value combinations per pivot) and aggregates (decoded
+            aggregate rows); totals holds the grand total when requested
+        """
+        try:
+            spec = {
+                'metrics': metrics,
+                'dimensions': dimensions,
+                'pivots': pivots,
+                'start_date': start_date or datetime.now() - timedelta(days=30),
+                'end_date': end_date or datetime.now()
+            }
+
+            cache_key = None
+            if self.cache and not columnar:
+                cache_key = self._pivot_cache_key(spec)
+                cached = await self._cache_get(cache_key)
+                if cached is not None:
+                    return cached
+
+            self.logger.info(
+                f"Fetching GA4 pivot report for date range: "
+                f"{spec['start_date'].date()} to {spec['end_date'].date()}"
+            )
+            response = await self._execute('run_pivot_report', self._build_pivot_request(spec))
+
+            result = self._process_pivot_response(response, pivots, columnar=columnar)
+            if cache_key:
+                await self._cache_set(cache_key, result, spec['end_date'])
+            return result
+
+        except Exception as e:
+            self.logger.error(f"Error fetching GA4 pivot report: {str(e)}")
+            raise
+
+    async def batch_fetch_pivots(
+        self,
+        specs: List[Dict[str, Any]],
+        columnar: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch several pivot reports through batchRunPivotReports.
+        
+        Args:
+            specs: List of pivot report specs, each a dict with the same keys
+                as the fetch_pivot arguments
+            columnar: Whether to return columnar results (see _process_response)
+            
+        Returns:
+            List of processed results in the same order as specs
+        """
+        try:
+            specs = [
+                {
+                    **spec,
+                    'start_date': spec.get('start_date') or datetime.now() - timedelta(days=30),
+                    'end_date': spec.get('end_date') or datetime.now()
+                }
+                for spec in specs
+            ]
+            results: List[Optional[Dict[str, Any]]] = [None] * len(specs)
+            cache_keys: Dict[int, str] = {}
+            missing = []
+            for position, spec in enumerate(specs):
+                if self.cache and not columnar:
+                    key = cache_keys[position] = self._pivot_cache_key(spec)
+                    results[position] = await self._cache_get(key)
+                if results[position] is None:
+                    missing.append(position)
+
+            batches = [
+                missing[i:i + MAX_BATCH_REPORTS]
+                for i in range(0, len(missing), MAX_BATCH_REPORTS)
+            ]
+            self.logger.info(
+                f"Fetching {len(missing)} GA4 pivot reports in {len(batches)} batch requests"
+                + (f" ({len(specs) - len(missing)} served from cache)" if len(missing) < len(specs) else "")
+            )
+            responses = await asyncio.gather(*[
+                self._execute(
+                    'batch_run_pivot_reports',
+                    BatchRunPivotReportsRequest(
+                        property=f"properties/{self.property_id}",
+                        requests=[self._build_pivot_request(specs[position]) for position in batch]
+                    )
+                )
+                for batch in batches
+            ])
+
+            reports = [report for response in responses for report in response.pivot_reports]
+            for position, report in zip(missing, reports):
+                results[position] = self._process_pivot_response(
+                    report, specs[position]['pivots'], columnar=columnar
+                )
+                if position in cache_keys:
+                    await self._cache_set(cache_keys[position], results[position], specs[position]['end_date'])
+            return results
+
+        except Exception as e:
+            self.logger.error(f"Error batch fetching GA4 pivot reports: {str(e)}")
+            raise
+
+    def _pivot_cache_key(self, spec: Dict[str, Any]) -> str:
+        """
+        Get the response cache key of a pivot report spec.
+        
+        Args:
+            spec: Pivot report spec with its start_date and end_date set
+            
+        Returns:
+            Cache key shared by fetch_pivot and batch_fetch_pivots
+        """
+        return self.cache.make_key(
+            self.property_id, spec['metrics'], spec['dimensions'],
+            spec['start_date'], spec['end_date'], 0,
+            extra={'pivots': spec['pivots']}
+        )
+
+    def _build_pivot_request(self, spec: Dict[str, Any]) -> RunPivotReportRequest:
+        """
+        Build a RunPivotReportRequest from a pivot report spec.
+        
+        Args:
+            spec: Pivot report spec with the same keys as the fetch_pivot arguments
+            
+        Returns:
+            RunPivotReportRequest for the spec
+        """
+        start_date = spec.get('start_date') or datetime.now() - timedelta(days=30)
+        end_date = spec.get('end_date') or datetime.now()
+
+        pivots = []
+        for pivot in spec['pivots']:
+            order_bys = []
+            if pivot.get('order_by'):
+                order_bys.append(OrderBy(
+                    metric=OrderBy.MetricOrderBy(metric_name=pivot['order_by']),
+                    desc=True
+                ))
+            pivots.append(Pivot(
+                field_names=pivot['field_names'],
+                limit=pivot.get('limit', 10),
+                offset=pivot.get('offset', 0),
+                order_bys=order_bys,
+                metric_aggregations=(
+                    [MetricAggregation.TOTAL] if pivot.get('aggregate') else []
+                )
+            ))
+
+        return RunPivotReportRequest(
+            property=f"properties/{self.property_id}",
+            dimensions=[Dimension(name=dim) for dim in spec['dimensions']],
+            metrics=[Metric(name=metric) for metric in spec['metrics']],
+            date_ranges=[
+                DateRange(
+                    start_date=start_date.strftime("%Y-%m-%d"),
+                    end_date=end_date.strftime("%Y-%m-%d")
+                )
+            ],
+            pivots=pivots
+        )
+
+    async def get_metadata(self) -> Any:
+        """
+        Fetch the metric and dimension metadata of the property.
+        
+        Returns:
+            Raw GA4 Metadata response (see GAMetadataCatalog for a cached view)
+        """
+        try:
+            return await self._execute(
+                'get_metadata',
+                GetMetadataRequest(name=f"properties/{self.property_id}/metadata")
+            )
+
+        except Exception as e:
+            self.logger.error(f"Error fetching GA4 metadata: {str(e)}")
+            raise
+
+    async def check_compatibility(
+        self,
+        metrics: List[str],
+        dimensions: Optional[List[str]] = None
+    ) -> Any:
+        """
+        Check which of the given metrics and dimensions can be queried together.
+        
+        Args:
+            metrics: List of metric names
+            dimensions: Optional list of dimension names
+            
+        Returns:
+            Raw GA4 CheckCompatibility response
+        """
+        try:
+            return await self._execute(
+                'check_compatibility',
+                CheckCompatibilityRequest(
+                    property=f"properties/{self.property_id}",
+                    metrics=[Metric(name=metric) for metric in metrics],
+                    dimensions=[Dimension(name=dim) for dim in dimensions or []]
+                )
+            )
+
+        except Exception as e:
+            self.logger.error(f"Error checking GA4 compatibility: {str(e)}")
+            raise
+
+    async def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result on the executor, off the event loop.
+        
+        The lookup reads SQLite under the cache's lock and decodes JSON of up
+        to row_limit rows, which would otherwise stall every other run.
+        
+        Args:
+            key: Cache key (see GAResponseCache.make_key)
+            
+        Returns:
+            Cached result with its dimension values interned, or None
+        """
+        cached = await asyncio.get_running_loop().run_in_executor(
+            self._executor, self.cache.get, key
+        )
+        if cached is not None:
+            intern_rows(cached['rows'], cached['dimension_headers'])
+        return cached
+
+    async def _cache_set(self, key: str, result: Dict[str, Any], end_date: datetime) -> None:
+        """
+        Store a result in the cache on the executor, off the event loop.
+        
+        Args:
+            key: Cache key (see GAResponseCache.make_key)
+            result: Processed result, not modified until this returns
+            end_date: End date of the report, deciding the entry's lifetime
+        """
+        await asyncio.get_running_loop().run_in_executor(
+            self._executor, self.cache.set, key, result, end_date
+        )
+
+    async def _execute(self, method: str, request: Any) -> Any:
+        """
+        Run a blocking Data API client method without stalling the event loop.
+        
+        Args:
+            method: Name of the BetaAnalyticsDataClient method to call
+            request: Request object passed to the method
+            
+        Returns:
+            Raw API response
+        """
+        loop = asyncio.get_running_loop()
+        scheduler = QuotaScheduler.active(self.scheduler)
+        if scheduler is None:
+            return await loop.run_in_executor(
+                self._executor,
+                getattr(self.client, method),
+                request
+            )
+
+        # Ask GA to report remaining quota so the scheduler can track it
+        for report_request in getattr(request, 'requests', [request]):
+            if 'return_property_quota' in type(report_request).meta.fields:
+                report_request.return_property_quota = True
+
+        return await scheduler.run(
+            self.property_id,
+            lambda: loop.run_in_executor(
+                self._executor,
+                getattr(self.client, method),
+                request
+            )
+        )
+
+    def _process_response(
+        self,
+        response: Any,
+        columnar: bool = False
+    ) -> Dict[str, Any]:
         """
         Process the GA4 API response into a structured format.
         
+        Row dicts stay the default: they are what the response cache stores
+        (columnar results are not cached) and what the graph's nodes read,
+        and a lazy view would rebuild a dict on every access. Their
+        dimension values are interned, so each distinct value is held once
+        per run, and the structures built from them (GACube, AggregateIndex)
+        dictionary-encode with the same vocabularies. The spill path, which
+        neither caches nor keeps row dicts, requests columnar results.
+        
         Args:
             response: Raw GA4 API response
+            columnar: Whether to decode rows into a ColumnarResult (typed metric
+                arrays, dictionary-encoded dimensions) under 'columns', with
+                'rows' as a lazy dict-of-rows view over it. Inside a
+                vocabulary_scope, dimension values are encoded (columnar) or
+                interned (rows) with the vocabularies shared by the run.
             
         Returns:
-            Processed data dictionary
+            Processed data dictionary; metadata.total_row_count is the number
+            of rows GA matched before the row limit was applied
         """
         try:
+            if columnar:
+                columns = ColumnarResult.from_response(response, self.converters)
+                return {
+                    'dimension_headers': columns.dimension_headers,
+                    'metric_headers': columns.metric_headers,
+                    'columns': columns,
+                    'rows': columns.rows,
+                    'row_count': columns.row_count,
+                    'totals': self._process_totals(response),
+                    'metadata': {
+                        'property_id': self.property_id,
+                        'total_row_count': getattr(response, 'row_count', columns.row_count)
+                    }
+                }
+
             # Extract dimension headers
             dimension_headers = [
                 header.name for header in response.dimension_headers
@@ -146,6 +1092,12 @@ class GoogleAnalyticsConnector:
                 for header in response.metric_headers
             ]
 
+            # Resolve each metric's converter once, not once per cell
+            converters = [
+                self._converter(header['name'], header['type'])
+                for header in metric_headers
+            ]
+
             # Process rows
             rows = []
             for row in response.rows:
@@ -167,14 +1119,19 @@ class GoogleAnalyticsConnector:
                     row_dict[header] = value
                     
                 # Add metrics
-                for header, value in zip(metric_headers, metric_values):
+                for header, converter, value in zip(metric_headers, converters, metric_values):
                     row_dict[header['name']] = self._convert_metric_value(
                         value,
-                        header['type']
+                        header['type'],
+                        converter
                     )
                     
                 rows.append(row_dict)
 
+            # Within a vocabulary_scope, rows of every report share one string
+            # per distinct dimension value
+            intern_rows(rows, dimension_headers)
+
             return {
                 'dimension_headers': dimension_headers,
                 'metric_headers': metric_headers,
@@ -182,7 +1139,8 @@ class GoogleAnalyticsConnector:
                 'row_count': len(rows),
                 'totals': self._process_totals(response),
                 'metadata': {
-                    'property_id': self.property_id
+                    'property_id': self.property_id,
+                    'total_row_count': getattr(response, 'row_count', len(rows))
                 }
             }
 
@@ -190,6 +1148,72 @@ class GoogleAnalyticsConnector:
             self.logger.error(f"Error processing GA4 response: {str(e)}")
             raise
 
+    def _process_pivot_response(
+        self,
+        response: Any,
+        pivots: List[Dict[str, Any]],
+        columnar: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Process a GA4 pivot response with the same typed decoding as reports.
+        
+        Args:
+            response: Raw RunPivotReportResponse
+            pivots: Pivot specs of the request, in request order
+            columnar: Whether to decode rows into a ColumnarResult
+            
+        Returns:
+            Processed data dictionary (see fetch_pivot)
+        """
+        try:
+            result = self._process_response(response, columnar=columnar)
+            dimension_headers = result['dimension_headers']
+
+            result['pivot_headers'] = [
+                {
+                    'field_names': list(pivot['field_names']),
+                    'values': [
+                        [value.value for value in header.dimension_values]
+                        for header in pivot_header.pivot_dimension_headers
+                    ],
+                    'row_count': pivot_header.row_count
+                }
+                for pivot_header, pivot in zip(response.pivot_headers, pivots)
+            ]
+
+            # Aggregate rows mark aggregated dimensions with reserved values
+            aggregates = []
+            for row in response.aggregates:
+                aggregate = {}
+                for header, value in zip(dimension_headers, row.dimension_values):
+                    aggregate[header] = PIVOT_AGGREGATE_VALUES.get(value.value, value.value)
+                for i, header in enumerate(result['metric_headers']):
+                    aggregate[header['name']] = self._convert_metric_value(
+                        row.metric_values[i].value,
+                        header['type'],
+                        self.converters.get(header['name'])
+                    )
+                aggregates.append(aggregate)
+            result['aggregates'] = aggregates
+
+            grand_total = next(
+                (
+                    aggregate for aggregate in aggregates
+                    if all(aggregate.get(dim) == 'total' for dim in dimension_headers)
+                ),
+                None
+            )
+            if grand_total:
+                result['totals'] = {
+                    header['name']: grand_total[header['name']]
+                    for header in result['metric_headers']
+                }
+            return result
+
+        except Exception as e:
+            self.logger.error(f"Error processing GA4 pivot response: {str(e)}")
+            raise
+
     def _process_totals(self, response: Any) -> Dict[str, Any]:
         """
         Process the totals from the GA4 response.
@@ -202,35 +1226,93 @@ class GoogleAnalyticsConnector:
         """
         totals = {}
         
-        if response.totals:
+        # Pivot responses carry aggregates instead of totals
+        if getattr(response, 'totals', None):
             for i, header in enumerate(response.metric_headers):
                 totals[header.name] = self._convert_metric_value(
                     response.totals[0].metric_values[i].value,
-                    MetricType(header.type_).name
+                    MetricType(header.type_).name,
+                    self.converters.get(header.name)
                 )
                 
         return totals
 
-    def _convert_metric_value(self, value: str, metric_type: str) -> Any:
+    def _process_range_totals(
+        self,
+        response: Any,
+        window_names: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Process the per-date-range totals of a multi-date-range response.
+        
+        Args:
+            response: GA4 API response
+            window_names: Names of the requested date ranges, in request order
+            
+        Returns:
+            Dictionary mapping each window name to its total values
+        """
+        dimension_headers = [
+            header.name for header in response.dimension_headers
+        ]
+        date_range_index = (
+            dimension_headers.index('dateRange')
+            if 'dateRange' in dimension_headers else None
+        )
+
+        totals = {}
+        for position, total_row in enumerate(response.totals):
+            if date_range_index is not None:
+                name = total_row.dimension_values[date_range_index].value
+            elif position < len(window_names):
+                name = window_names[position]
+            else:
+                continue
+
+            totals[name] = {
+                header.name: self._convert_metric_value(
+                    total_row.metric_values[i].value,
+                    MetricType(header.type_).name,
+                    self.converters.get(header.name)
+                )
+                for i, header in enumerate(response.metric_headers)
+            }
+
+        return totals
+
+    def _converter(self, metric: str, metric_type: str) -> Callable[[str], Any]:
+        """
+        Get the converter of a metric, from the metadata catalog when known.
+        
+        Args:
+            metric: Metric name
+            metric_type: MetricType name from the response header
+            
+        Returns:
+            Converter from GA4's string value
+        """
+        return self.converters.get(metric) or resolve_converter(metric_type)[1]
+
+    def _convert_metric_value(
+        self,
+        value: str,
+        metric_type: str,
+        converter: Optional[Callable[[str], Any]] = None
+    ) -> Any:
         """
         Convert metric value to appropriate type.
         
         Args:
             value: String value from GA4
             metric_type: MetricType name
+            converter: Optional precomputed converter of the metric (see
+                use_metadata), otherwise resolved from metric_type
             
         Returns:
             Converted value
         """
         try:
-            if metric_type == 'TYPE_INTEGER':
-                return int(value)
-            elif metric_type == 'TYPE_FLOAT':
-                return float(value)
-            elif metric_type == 'TYPE_CURRENCY':
-                return float(value)
-            else:
-                return value
+            return (converter or resolve_converter(metric_type)[1])(value)
         except (ValueError, TypeError):
             self.logger.warning(
                 f"Could not convert value '{value}' to type {metric_type}"
@@ -257,7 +1339,7 @@ class GoogleAnalyticsConnector:
                 ]
             )
             
-            self.client.run_report(request)
+            await self._execute('run_report', request)
             return True
             
         except Exception as e:
@@ -0,0 +1,320 @@
+import contextlib
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Typical distinct values per dimension over a week, used until a property
+# has history of its own
+DEFAULT_CARDINALITY = {
+    'deviceCategory': 3,
+    'sessionDefaultChannelGroup': 12,
+    'firstUserMedium': 15,
+    'firstUserSource': 100,
+    'country': 100,
+    'city': 1000,
+    'pagePath': 1000,
+    'landingPage': 500,
+    'eventName': 40,
+}
+UNKNOWN_CARDINALITY = 100
+
+class QueryPlanner:
+    """Splits wide dimension sets into narrower reports using cardinality history."""
+
+    def __init__(
+        self,
+        directory: str,
+        fill_ratio: float = 0.8,
+        splits: Optional[List[List[str]]] = None
+    ):
+        """
+        Initialize the planner.
+
+        Args:
+            directory: Directory holding one JSON cardinality history per property
+            fill_ratio: Share of the row limit a planned report may be
+                expected to fill, leaving headroom for estimation error
+            splits: Optional fixed dimension groups to use instead of the
+                automatic plan, e.g. [['sessionDefaultChannelGroup', 'date'],
+                ['pagePath', 'deviceCategory']]
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.directory = directory
+        self.fill_ratio = fill_ratio
+        self.splits = [list(split) for split in splits or []]
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._history: Dict[str, Dict[str, Any]] = {}
+
+    def estimate(self, property_id: str, dimensions: List[str], days: int) -> int:
+        """
+        Estimate the number of rows a report would have.
+
+        An observed row count of the same combination is preferred; otherwise
+        the product of per-dimension estimates is used as an upper bound.
+
+        Args:
+            property_id: GA4 property ID
+            dimensions: Dimension names of the report
+            days: Number of days in the date range
+
+        Returns:
+            Estimated row count
+        """
+        history = self._load(property_id)
+        observed = history['combinations'].get(_combination_key(dimensions))
+        if observed:
+            return max(1, round(_scale(observed['rows'], observed['days'], days, 'date' in dimensions)))
+
+        estimate = 1
+        for dimension in dimensions:
+            estimate *= self._dimension_estimate(history, dimension, days)
+        return max(1, round(estimate))
+
+    def plan(
+        self,
+        property_id: str,
+        dimensions: List[str],
+        days: int,
+        row_limit: int
+    ) -> List[List[str]]:
+        """
+        Split a dimension list into reports expected to fit the row limit.
+
+        Dimensions are placed first-fit in decreasing order of cardinality, so
+        high-cardinality dimensions are paired with the low-cardinality ones
+        that still fit alongside them.
+
+        Args:
+            property_id: GA4 property ID
+            dimensions: Requested dimension names
+            days: Number of days in the date range
+            row_limit: Row limit of each report
+
+        Returns:
+            Dimension lists, one per report (a single list if no split is needed)
+        """
+        budget = row_limit * self.fill_ratio
+        if len(dimensions) <= 1 or self.estimate(property_id, dimensions, days) <= budget:
+            return [list(dimensions)]
+
+        if self.splits:
+            reports = [
+                [dimension for dimension in split if dimension in dimensions]
+                for split in self.splits
+            ]
+            reports = [report for report in reports if report]
+            placed = {dimension for report in reports for dimension in report}
+            remaining = [dimension for dimension in dimensions if dimension not in placed]
+        else:
+            reports = []
+            remaining = list(dimensions)
+
+        by_cardinality = sorted(
+            remaining,
+            key=lambda dimension: self.estimate(property_id, [dimension], days),
+            reverse=True
+        )
+        for dimension in by_cardinality:
+            for report in reports:
+                if self.estimate(property_id, report + [dimension], days) <= budget:
+                    report.append(dimension)
+                    break
+            else:
+                reports.append([dimension])
+
+        # A dimension that fits nowhere else (typically date) is padded with
+        # the smallest dimensions that fit, e.g. date x device x channel, as a
+        # report may repeat dimensions of other reports
+        for report in reports:
+            if len(report) > 1:
+                continue
+            for dimension in reversed(sorted(
+                dimensions,
+                key=lambda dimension: self.estimate(property_id, [dimension], days),
+                reverse=True
+            )):
+                if dimension not in report and self.estimate(property_id, report + [dimension], days) <= budget:
+                    report.append(dimension)
+
+        # Keep the requested dimension order within each report
+        order = {dimension: position for position, dimension in enumerate(dimensions)}
+        return [sorted(report, key=order.get) for report in reports]
+
+    async def fetch(
+        self,
+        connector: Any,
+        metrics: List[str],
+        dimensions: List[str],
+        start_date: datetime,
+        end_date: datetime,
+        row_limit: int = 10000
+    ) -> Dict[str, Any]:
+        """
+        Fetch a window as one or more planned reports, batched together.
+
+        Args:
+            connector: GoogleAnalyticsConnector for the property
+            metrics: List of metric names
+            dimensions: Requested dimension names
+            start_date: Start of the window
+            end_date: End of the window
+            row_limit: Row limit of each report
+
+        Returns:
+            Data in the format of GoogleAnalyticsConnector.fetch_data for the
+            primary report (the one containing 'date', else the first), with
+            every planned report under 'breakdowns' keyed by its dimensions
+            joined with '+', and the plan under metadata.query_plan
+        """
+        try:
+            property_id = connector.property_id
+            days = (end_date.date() - start_date.date()).days + 1
+            plan = self.plan(property_id, dimensions, days, row_limit)
+            if len(plan) > 1:
+                self.logger.info(
+                    f"Splitting {len(dimensions)} dimensions into {len(plan)} "
+                    f"reports for property {property_id}: {plan}"
+                )
+
+            # The planned reports share their shape apart from the
+            # dimensions, so they travel in as few batch requests as possible
+            results = await connector.batch_fetch([
+                {
+                    'metrics': metrics,
+                    'dimensions': report,
+                    'start_date': start_date,
+                    'end_date': end_date,
+                    'row_limit': row_limit
+                }
+                for report in plan
+            ])
+            for report, result in zip(plan, results):
+                self.record(property_id, report, days, result)
+
+            breakdowns = {'+'.join(report): result for report, result in zip(plan, results)}
+            primary = next(
+                (result for report, result in zip(plan, results) if 'date' in report),
+                results[0]
+            )
+            return {
+                **primary,
+                'breakdowns': breakdowns,
+                'metadata': {**primary.get('metadata', {}), 'query_plan': plan}
+            }
+
+        except Exception as e:
+            self.logger.error(f"Error fetching planned GA4 reports: {str(e)}")
+            raise
+
+    def record(
+        self,
+        property_id: str,
+        dimensions: List[str],
+        days: int,
+        result: Dict[str, Any]
+    ) -> None:
+        """
+        Learn cardinalities from a fetched report.
+
+        Args:
+            property_id: GA4 property ID
+            dimensions: Dimension names of the report
+            days: Number of days in the date range
+            result: Result of GoogleAnalyticsConnector.fetch_data
+        """
+        rows = result.get('row_count', 0)
+        total_rows = result.get('metadata', {}).get('total_row_count', rows)
+        truncated = total_rows > rows
+
+        history = self._load(property_id)
+        with self._lock:
+            history['combinations'][_combination_key(dimensions)] = {
+                'rows': total_rows,
+                'days': days
+            }
+            for dimension in dimensions:
+                if dimension == 'date':
+                    continue
+                columns = result.get('columns')
+                if columns is not None:
+                    # Vocabularies may be shared with other reports
+                    distinct = columns.dimensions[dimension].distinct()
+                else:
+                    distinct = len({row.get(dimension) for row in result.get('rows', [])})
+                previous = history['dimensions'].get(dimension)
+                if truncated and previous and previous['days'] == days:
+                    # A truncated report only gives a lower bound
+                    distinct = max(distinct, previous['distinct'])
+                history['dimensions'][dimension] = {'distinct': distinct, 'days': days}
+            history['updated_at'] = time.time()
+
+        self._write(property_id, history)
+
+    def _dimension_estimate(self, history: Dict[str, Any], dimension: str, days: int) -> float:
+        """Estimate the distinct values of one dimension over a number of days."""
+        if dimension == 'date':
+            return days
+        observed = history['dimensions'].get(dimension)
+        if observed:
+            return _scale(observed['distinct'], observed['days'], days, False)
+        return _scale(DEFAULT_CARDINALITY.get(dimension, UNKNOWN_CARDINALITY), 7, days, False)
+
+    def _load(self, property_id: str) -> Dict[str, Any]:
+        """Get the cardinality history of a property, reading it once from disk."""
+        with self._lock:
+            history = self._history.get(property_id)
+            if history is None:
+                try:
+                    with open(self._path(property_id), "r") as f:
+                        history = json.load(f)
+                except FileNotFoundError:
+                    history = None
+                except ValueError as e:
+                    self.logger.warning(f"Ignoring corrupt cardinality history: {str(e)}")
+                    history = None
+                history = history or {'dimensions': {}, 'combinations': {}}
+                self._history[property_id] = history
+            return history
+
+    def _write(self, property_id: str, history: Dict[str, Any]) -> None:
+        """Write the history of a property to disk atomically."""
+        path = self._path(property_id)
+        with self._lock:
+            payload = json.dumps(history)
+        # A private temporary file per write, as overlapping runs of the same
+        # property may write at the same time
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, prefix=f".{property_id}.", suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w") as f:
+                f.write(payload)
+            os.replace(temporary, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temporary)
+            raise
+
+    def _path(self, property_id: str) -> str:
+        """Path of the JSON file of a property."""
+        return os.path.join(self.directory, f"{property_id}.json")
+
+def _scale(observed: float, observed_days: int, days: int, has_date: bool) -> float:
+    """
+    Scale an observed count to a different date span.
+
+    Rows with a date dimension grow linearly with the span; distinct values
+    of other dimensions grow sublinearly, as most of them recur every day.
+    """
+    ratio = days / max(observed_days, 1)
+    return observed * (ratio if has_date else math.sqrt(ratio))
+
+def _combination_key(dimensions: List[str]) -> str:
+    """Order-independent key of a dimension combination."""
+    return ','.join(sorted(dimensions))
@@ -0,0 +1,283 @@
+import asyncio
+import contextvars
+import logging
+import random
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+from google.api_core import exceptions as api_exceptions
+
+# Errors worth retrying: quota throttling and transient server failures
+RETRYABLE_ERRORS = (
+    api_exceptions.ResourceExhausted,
+    api_exceptions.TooManyRequests,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.DeadlineExceeded,
+    api_exceptions.InternalServerError,
+)
+
+# Token quotas reported back by GA when return_property_quota is set
+TOKEN_QUOTAS = ('tokens_per_day', 'tokens_per_hour', 'tokens_per_project_per_hour')
+
+PRIORITIES = ('high', 'normal', 'low')
+
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar(
+    'ga_request_priority',
+    default='normal'
+)
+
+# Scheduler standing in for the connectors' own within an activate() block
+_active: contextvars.ContextVar[Optional['QuotaScheduler']] = contextvars.ContextVar(
+    'ga_active_scheduler',
+    default=None
+)
+
+class QuotaScheduler:
+    """Throttles, prioritizes and retries GA4 requests using reported property quota."""
+
+    def __init__(
+        self,
+        max_concurrent_per_property: int = 10,
+        max_concurrent_total: int = 50,
+        max_retries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 32.0,
+        low_priority_reserve: float = 0.2,
+        defer_seconds: float = 60.0
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrent_per_property: Requests in flight per property (GA4
+                allows 10 concurrent requests per standard property)
+            max_concurrent_total: Requests in flight across all properties
+            max_retries: Retries of a retryable error before giving up
+            base_delay: Initial backoff delay in seconds
+            max_delay: Maximum backoff delay in seconds
+            low_priority_reserve: Fraction of remaining token quota below which
+                low-priority requests are deferred
+            defer_seconds: Longest a low-priority request waits for quota
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.max_concurrent_per_property = max_concurrent_per_property
+        self.max_concurrent_total = max_concurrent_total
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.low_priority_reserve = low_priority_reserve
+        self.defer_seconds = defer_seconds
+
+        self.quota: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self.retries = 0
+        # asyncio primitives are bound to one event loop, so keep them per
+        # loop; loops may run in several threads at once
+        self._loop_state: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]' = (
+            weakref.WeakKeyDictionary()
+        )
+        self._state_lock = threading.Lock()
+        # Bumped by set_limits so each loop rebuilds its semaphores lazily
+        self._generation = 0
+
+    @staticmethod
+    @contextmanager
+    def priority(level: str) -> Iterator[None]:
+        """
+        Set the priority of GA4 requests issued inside the block.
+
+        The priority follows tasks created inside the block, e.g. by
+        asyncio.gather.
+
+        Args:
+            level: One of 'high', 'normal' or 'low'
+        """
+        if level not in PRIORITIES:
+            raise ValueError(f"Invalid priority {level}, expected one of {PRIORITIES}")
+        token = _priority.set(level)
+        try:
+            yield
+        finally:
+            _priority.reset(token)
+
+    @contextmanager
+    def activate(self) -> Iterator[None]:
+        """
+        Schedule the GA4 requests issued inside the block with this scheduler.
+
+        Requests go through it instead of their connector's scheduler; like
+        priority, this follows tasks created inside the block.
+        """
+        token = _active.set(self)
+        try:
+            yield
+        finally:
+            _active.reset(token)
+
+    @staticmethod
+    def active(default: Optional['QuotaScheduler'] = None) -> Optional['QuotaScheduler']:
+        """
+        Get the scheduler of the innermost activate() block.
+
+        Args:
+            default: Scheduler returned outside any activate() block
+
+        Returns:
+            The active scheduler, else default
+        """
+        return _active.get() or default
+
+    def set_limits(
+        self,
+        max_concurrent_total: Optional[int] = None,
+        max_concurrent_per_property: Optional[int] = None
+    ) -> None:
+        """
+        Change the concurrency limits.
+
+        New limits apply to requests started afterwards; requests already in
+        flight finish under the old ones.
+
+        Args:
+            max_concurrent_total: Requests in flight across all properties
+            max_concurrent_per_property: Requests in flight per property
+        """
+        if max_concurrent_total is not None:
+            self.max_concurrent_total = max_concurrent_total
+        if max_concurrent_per_property is not None:
+            self.max_concurrent_per_property = max_concurrent_per_property
+        with self._state_lock:
+            self._generation += 1
+
+    async def run(
+        self,
+        property_id: str,
+        call: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Run a GA4 request under the property's concurrency and quota limits.
+
+        Args:
+            property_id: GA4 property the request is charged to
+            call: Zero-argument coroutine function issuing the request
+
+        Returns:
+            The response of the request
+        """
+        level = _priority.get()
+        if level == 'low':
+            await self._defer_if_tight(property_id)
+
+        state = self._state()
+        semaphore = state['properties'].setdefault(
+            property_id,
+            asyncio.Semaphore(self.max_concurrent_per_property)
+        )
+
+        attempt = 0
+        while True:
+            async with state['total'], semaphore:
+                try:
+                    response = await call()
+                    self.record(property_id, response)
+                    return response
+                except RETRYABLE_ERRORS as e:
+                    if attempt >= self.max_retries:
+                        self.logger.error(
+                            f"Giving up on GA4 request for property {property_id} "
+                            f"after {attempt} retries: {str(e)}"
+                        )
+                        raise
+                    error = e
+
+            # Full jitter backoff, sleeping outside the concurrency slots
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+            attempt += 1
+            self.retries += 1
+            self.logger.warning(
+                f"Retryable GA4 error for property {property_id} "
+                f"(attempt {attempt}/{self.max_retries}), "
+                f"retrying in {delay:.1f}s: {str(error)}"
+            )
+            await asyncio.sleep(delay)
+
+    def record(self, property_id: str, response: Any) -> None:
+        """
+        Track the property quota reported in a response.
+
+        Args:
+            property_id: GA4 property the response belongs to
+            response: Report or batch response, requested with
+                return_property_quota set
+        """
+        quotas = [getattr(response, 'property_quota', None)]
+        quotas += [getattr(report, 'property_quota', None)
+                   for report in list(getattr(response, 'reports', []))
+                   + list(getattr(response, 'pivot_reports', []))]
+
+        for property_quota in quotas:
+            if not property_quota:
+                continue
+            self.quota[property_id] = {
+                name: {
+                    'consumed': getattr(property_quota, name).consumed,
+                    'remaining': getattr(property_quota, name).remaining
+                }
+                for name in TOKEN_QUOTAS + ('concurrent_requests',)
+            }
+
+    def remaining_fraction(self, property_id: str) -> float:
+        """
+        Get the tightest remaining share of the property's token quotas.
+
+        Args:
+            property_id: GA4 property ID
+
+        Returns:
+            Remaining fraction between 0 and 1 (1 when nothing is known yet)
+        """
+        fractions = []
+        for name in TOKEN_QUOTAS:
+            status = self.quota.get(property_id, {}).get(name)
+            if status and status['consumed'] + status['remaining'] > 0:
+                fractions.append(
+                    status['remaining'] / (status['consumed'] + status['remaining'])
+                )
+        return min(fractions) if fractions else 1.0
+
+    async def _defer_if_tight(self, property_id: str) -> None:
+        """Hold back a low-priority request while the property's quota is tight."""
+        waited = 0.0
+        while (
+            self.remaining_fraction(property_id) < self.low_priority_reserve
+            and waited < self.defer_seconds
+        ):
+            if waited == 0:
+                self.logger.info(
+                    f"Deferring low-priority GA4 request for property {property_id}: "
+                    f"{self.remaining_fraction(property_id):.0%} of quota left"
+                )
+            interval = min(5.0, self.defer_seconds - waited)
+            await asyncio.sleep(interval)
+            waited += interval
+
+    def _state(self) -> Dict[str, Any]:
+        """Get the semaphores belonging to the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._state_lock:
+            state = self._loop_state.get(loop)
+            if state is None or state['generation'] != self._generation:
+                # Drop only loops that are closed (e.g. earlier asyncio.run
+                # calls); their semaphores keep them referenced, so the weak
+                # keys alone would not
+                for closed in [other for other in self._loop_state if other.is_closed()]:
+                    del self._loop_state[closed]
+                state = self._loop_state[loop] = {
+                    'total': asyncio.Semaphore(self.max_concurrent_total),
+                    'properties': {},
+                    'generation': self._generation
+                }
+            return state
+
+# Shared by every connector of the default pool
+default_scheduler = QuotaScheduler()
@@ -0,0 +1,307 @@
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from src.connectors.columnar import ColumnarResult, Vocabulary, scoped_vocabulary
+from src.utils.metric_aggregation import RATIO_WEIGHT_METRIC, aggregation_kind
+
+# Rows processed at a time when reading the store back, so a chunk spilled at
+# the full budget is never copied into memory as a whole
+SCAN_ROWS = 65536
+
+Block = Tuple[np.ndarray, np.ndarray]
+
+class SpillingRowStore:
+    """Columnar row store that spills to local files past a memory budget."""
+
+    def __init__(
+        self,
+        dimensions: List[str],
+        metrics: List[str],
+        directory: str,
+        memory_budget_bytes: int = 256 * 2 ** 20,
+        vocabularies: Optional[Dict[str, Vocabulary]] = None
+    ):
+        """
+        Initialize an empty store.
+
+        Rows are held as dimension codes (rows x dimensions) and metric values
+        (rows x metrics). Once the buffered rows exceed the budget they are
+        written to a chunk file and the buffer starts over, so memory use does
+        not depend on the number of rows stored.
+
+        Args:
+            dimensions: Dimension names, in column order
+            metrics: Metric names, in column order
+            directory: Directory under which the store creates its own
+                temporary directory, removed by close
+            memory_budget_bytes: Bytes of buffered rows before a spill
+            vocabularies: Optional dimension vocabularies (defaults to those
+                of the current vocabulary_scope)
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.dimensions = list(dimensions)
+        self.metrics = list(metrics)
+        self.memory_budget_bytes = memory_budget_bytes
+        self.metric_headers: List[Dict[str, str]] = [
+            {'name': metric, 'type': 'METRIC_TYPE_UNSPECIFIED'} for metric in self.metrics
+        ]
+        self.vocabularies = {
+            dimension: (vocabularies or {}).get(dimension) or scoped_vocabulary(dimension)
+            for dimension in self.dimensions
+        }
+        self.row_count = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._directory = tempfile.mkdtemp(prefix='ga_rows_', dir=directory)
+        self._buffer: List[Block] = []
+        self._buffered_bytes = 0
+        self._chunks: List[Tuple[str, str]] = []
+        self.spilled_bytes = 0
+
+    def __enter__(self) -> 'SpillingRowStore':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def append(self, page: Dict[str, Any]) -> None:
+        """
+        Add the rows of a processed page.
+
+        Args:
+            page: Page in the format of GoogleAnalyticsConnector.iter_pages,
+                columnar (preferred, decoded without per-row dicts) or not
+        """
+        if page.get('metric_headers'):
+            headers = {header['name']: header for header in page['metric_headers']}
+            self.metric_headers = [
+                headers.get(metric, default) for metric, default in zip(self.metrics, self.metric_headers)
+            ]
+
+        columns = page.get('columns')
+        if isinstance(columns, ColumnarResult):
+            count = columns.row_count
+            codes = np.empty((count, len(self.dimensions)), dtype=np.uint32)
+            for position, dimension in enumerate(self.dimensions):
+                column = columns.dimensions[dimension]
+                vocabulary = self.vocabularies[dimension]
+                if column.values is vocabulary.values:
+                    codes[:, position] = column.code_array()
+                else:
+                    # Translate the page's own codes through its (small) value list
+                    translation = vocabulary.encode(column.values)
+                    codes[:, position] = np.frombuffer(
+                        translation, dtype=np.dtype(f'u{translation.itemsize}')
+                    )[column.code_array()]
+            values = columns.metric_matrix(self.metrics)
+        else:
+            rows = page.get('rows', [])
+            count = len(rows)
+            codes = np.empty((count, len(self.dimensions)), dtype=np.uint32)
+            for position, dimension in enumerate(self.dimensions):
+                codes[:, position] = np.frombuffer(
+                    self.vocabularies[dimension].encode([str(row.get(dimension)) for row in rows]),
+                    dtype=np.uint32
+                ) if count else 0
+            values = np.array(
+                [[_number(row.get(metric)) for metric in self.metrics] for row in rows],
+                dtype=np.float64
+            ).reshape(count, len(self.metrics))
+
+        if not count:
+            return
+        self._buffer.append((codes, values))
+        self._buffered_bytes += codes.nbytes + values.nbytes
+        self.row_count += count
+        if self._buffered_bytes > self.memory_budget_bytes:
+            self._spill()
+
+    async def consume(self, pages: AsyncIterator[Dict[str, Any]]) -> int:
+        """
+        Add every page of a stream, e.g. GoogleAnalyticsConnector.iter_pages.
+
+        Args:
+            pages: Async iterator of processed pages
+
+        Returns:
+            Number of rows in the store afterwards
+        """
+        async for page in pages:
+            self.append(page)
+        return self.row_count
+
+    def blocks(self) -> Iterator[Block]:
+        """
+        Read the stored rows back, spilled chunks first, in bounded blocks.
+
+        Yields:
+            Tuples of (dimension codes, metric values) of at most SCAN_ROWS rows
+        """
+        for codes_path, values_path in self._chunks:
+            codes = np.load(codes_path, mmap_mode='r')
+            values = np.load(values_path, mmap_mode='r')
+            for start in range(0, len(codes), SCAN_ROWS):
+                yield np.asarray(codes[start:start + SCAN_ROWS]), np.asarray(values[start:start + SCAN_ROWS])
+        for codes, values in self._buffer:
+            yield codes, values
+
+    def aggregate(self, group_by: List[str], metrics: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Combine all stored rows per combination of dimension values in one pass.
+
+        Only the running sums per group are held, so memory is bounded by the
+        number of groups. Counts and unique-user metrics are summed (the
+        latter an upper bound across rows); ratios and averages are averaged,
+        weighted by sessions when the store holds them.
+
+        Args:
+            group_by: Dimensions to group by (empty for a single total row)
+            metrics: Metrics to combine (defaults to all)
+
+        Returns:
+            Data in the format of GoogleAnalyticsConnector.fetch_data, with one
+            row per group
+        """
+        metrics = list(metrics) if metrics is not None else self.metrics
+        positions = [self.dimensions.index(dimension) for dimension in group_by]
+        columns = [self.metrics.index(metric) for metric in metrics]
+        is_mean = np.array([aggregation_kind(metric) == 'mean' for metric in metrics], dtype=bool)
+        weight_column = self.metrics.index(RATIO_WEIGHT_METRIC) if RATIO_WEIGHT_METRIC in self.metrics else None
+
+        keys = np.zeros((0, len(group_by)), dtype=np.int64)
+        sums = np.zeros((0, len(metrics)))
+        weight_sums = np.zeros(0)
+        for codes, values in self.blocks():
+            weights = values[:, weight_column] if weight_column is not None else np.ones(len(values))
+            weighted = values[:, columns]
+            weighted[:, is_mean] *= weights[:, None]
+            merged, inverse = _merge_keys(keys, codes[:, positions].astype(np.int64))
+            merged_sums = np.zeros((len(merged), len(metrics)))
+            merged_weights = np.zeros(len(merged))
+            merged_sums[inverse[:len(keys)]] += sums
+            merged_weights[inverse[:len(keys)]] += weight_sums
+            np.add.at(merged_sums, inverse[len(keys):], weighted)
+            np.add.at(merged_weights, inverse[len(keys):], weights)
+            keys, sums, weight_sums = merged, merged_sums, merged_weights
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sums[:, is_mean] = np.where(weight_sums[:, None] > 0, sums[:, is_mean] / weight_sums[:, None], 0.0)
+        headers = {header['name']: header for header in self.metric_headers}
+        return self._window(
+            group_by,
+            [headers[metric] for metric in metrics],
+            keys,
+            sums,
+            {'source_rows': self.row_count, 'spilled_chunks': len(self._chunks)}
+        )
+
+    def top(self, n: int, order_by: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the n stored rows with the largest value of a metric in one pass.
+
+        Args:
+            n: Number of rows
+            order_by: Metric to rank by (defaults to sessions, else the
+                first metric)
+
+        Returns:
+            Data in the format of GoogleAnalyticsConnector.fetch_data, rows
+            in descending order
+        """
+        order_by = order_by or (RATIO_WEIGHT_METRIC if RATIO_WEIGHT_METRIC in self.metrics else self.metrics[0])
+        column = self.metrics.index(order_by)
+        best_codes = np.zeros((0, len(self.dimensions)), dtype=np.uint32)
+        best_values = np.zeros((0, len(self.metrics)))
+        for codes, values in self.blocks():
+            candidate_codes = np.concatenate([best_codes, codes])
+            candidate_values = np.concatenate([best_values, values])
+            if len(candidate_values) > n:
+                keep = np.argpartition(-candidate_values[:, column], n - 1)[:n]
+                candidate_codes, candidate_values = candidate_codes[keep], candidate_values[keep]
+            best_codes, best_values = candidate_codes, candidate_values
+
+        order = np.argsort(-best_values[:, column], kind='stable')
+        return self._window(
+            self.dimensions,
+            self.metric_headers,
+            best_codes[order],
+            best_values[order],
+            {'total_row_count': self.row_count, 'spilled_chunks': len(self._chunks)}
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Describe the store's use of memory and disk.
+
+        Returns:
+            Dictionary with the rows stored, the chunks and bytes spilled and
+            the bytes currently buffered
+        """
+        return {
+            'rows': self.row_count,
+            'spilled_chunks': len(self._chunks),
+            'spilled_bytes': self.spilled_bytes,
+            'buffered_bytes': self._buffered_bytes
+        }
+
+    def close(self) -> None:
+        """Drop the buffered rows and remove the spilled chunks."""
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._chunks = []
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+    def _spill(self) -> None:
+        """Write the buffered rows to a new chunk and empty the buffer."""
+        codes = np.concatenate([block[0] for block in self._buffer])
+        values = np.concatenate([block[1] for block in self._buffer])
+        self._buffer = []
+        self._buffered_bytes = 0
+
+        prefix = os.path.join(self._directory, f"chunk-{len(self._chunks):05d}")
+        paths = (f"{prefix}-codes.npy", f"{prefix}-values.npy")
+        np.save(paths[0], codes)
+        np.save(paths[1], values)
+        self._chunks.append(paths)
+        self.spilled_bytes += codes.nbytes + values.nbytes
+        self.logger.debug(f"Spilled {len(codes)} rows to {prefix} ({self.row_count} rows stored)")
+
+    def _window(
+        self,
+        dimensions: List[str],
+        metric_headers: List[Dict[str, str]],
+        codes: np.ndarray,
+        values: np.ndarray,
+        metadata: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Decode code and value matrices into fetch_data format."""
+        names = [self.vocabularies[dimension].values for dimension in dimensions]
+        integer = [header['type'] == 'TYPE_INTEGER' for header in metric_headers]
+        rows = []
+        for key, row_values in zip(codes.tolist(), values.tolist()):
+            row = {dimension: names[position][code] for position, (dimension, code) in enumerate(zip(dimensions, key))}
+            for header, value, is_integer in zip(metric_headers, row_values, integer):
+                row[header['name']] = int(round(value)) if is_integer else value
+            rows.append(row)
+        return {
+            'dimension_headers': list(dimensions),
+            'metric_headers': list(metric_headers),
+            'rows': rows,
+            'row_count': len(rows),
+            'metadata': metadata
+        }
+
+def _merge_keys(keys: np.ndarray, new_keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Distinct rows of two key matrices and the position of each input row."""
+    stacked = np.concatenate([keys, new_keys])
+    if stacked.shape[1] == 0:
+        return np.zeros((1 if len(stacked) else 0, 0), dtype=np.int64), np.zeros(len(stacked), dtype=np.int64)
+    merged, inverse = np.unique(stacked, axis=0, return_inverse=True)
+    return merged, inverse.reshape(-1)
+
+def _number(value: Any) -> float:
+    """A metric value as a float, 0 for values that are not numbers."""
+    return float(value) if isinstance(value, (int, float)) else 0.0
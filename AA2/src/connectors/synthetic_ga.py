@@ -0,0 +1,631 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+import numpy as np
+from google.analytics.data_v1beta.types import (
+    BatchRunPivotReportsResponse,
+    BatchRunReportsResponse,
+    CheckCompatibilityResponse,
+    Compatibility,
+    DimensionCompatibility,
+    DimensionMetadata,
+    Metadata,
+    MetricCompatibility,
+    MetricMetadata,
+    MetricType,
+    RunPivotReportResponse,
+    RunReportResponse,
+)
+from src.utils.metric_aggregation import aggregation_kind
+
+# Realistic values for common dimensions; others get generated names
+DIMENSION_VOCABULARIES: Dict[str, List[str]] = {
+    'deviceCategory': ['mobile', 'desktop', 'tablet'],
+    'sessionDefaultChannelGroup': [
+        'Organic Search', 'Direct', 'Paid Search', 'Referral', 'Organic Social',
+        'Email', 'Paid Social', 'Display', 'Affiliates', 'Unassigned',
+    ],
+    'firstUserMedium': ['organic', '(none)', 'cpc', 'referral', 'email', 'social'],
+    'firstUserSource': [
+        'google', '(direct)', 'bing', 'facebook.com', 'newsletter', 'linkedin.com',
+        'duckduckgo', 't.co', 'instagram.com', 'yahoo',
+    ],
+    'country': [
+        'United States', 'Netherlands', 'Germany', 'United Kingdom', 'France',
+        'Belgium', 'India', 'Canada', 'Spain', 'Italy', 'Brazil', 'Australia',
+    ],
+}
+
+DEFAULT_CARDINALITY = {
+    'deviceCategory': 3,
+    'sessionDefaultChannelGroup': 10,
+    'firstUserMedium': 6,
+    'firstUserSource': 40,
+    'country': 120,
+    'pagePath': 2000,
+}
+
+# Default size of count metrics relative to the shared traffic volume
+METRIC_VOLUME_RATIOS = {
+    'sessions': 1.0,
+    'totalUsers': 0.75,
+    'activeUsers': 0.7,
+    'newUsers': 0.35,
+    'screenPageViews': 2.6,
+    'eventCount': 9.0,
+    'conversions': 0.03,
+    'purchaseRevenue': 1.8,
+}
+
+# Relative traffic per weekday, Monday first
+WEEKDAY_PROFILE = np.array([1.0, 1.05, 1.05, 1.0, 0.95, 0.7, 0.65])
+
+class SyntheticGAData:
+    """Deterministic generator of realistic GA4 report data."""
+
+    def __init__(
+        self,
+        dimension_cardinality: Optional[Dict[str, int]] = None,
+        metric_distributions: Optional[Dict[str, Dict[str, Any]]] = None,
+        row_count: int = 10000,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        zipf_exponent: float = 1.1,
+        daily_sessions: float = 5000.0,
+        volume_sigma: float = 0.6,
+        daily_growth: float = 0.001,
+        seed: int = 0
+    ):
+        """
+        Initialize the generator.
+
+        Args:
+            dimension_cardinality: Number of distinct values per dimension
+                (date cardinality follows the requested date range)
+            metric_distributions: Per-metric distribution settings, e.g.
+                {'sessions': {'distribution': 'lognormal', 'mean': 2.0,
+                'sigma': 1.0}}; 'type' overrides the GA4 MetricType name
+            row_count: Maximum number of rows in a single report
+            start_date: First day with data (defaults to two years ago)
+            end_date: Last day with data (defaults to today)
+            zipf_exponent: Skew of dimension value popularity
+            daily_sessions: Average site-wide traffic volume per day, which
+                count metrics are derived from ('ratio' per metric)
+            volume_sigma: Spread of the log-normal noise on per-row volume
+            daily_growth: Relative traffic growth per day
+            seed: Seed for all generated data
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.dimension_cardinality = {**DEFAULT_CARDINALITY, **(dimension_cardinality or {})}
+        self.metric_distributions = metric_distributions or {}
+        self.row_count = row_count
+        self.end_date = (end_date or datetime.now()).date()
+        self.start_date = (start_date.date() if start_date
+                           else self.end_date - timedelta(days=730))
+        self.zipf_exponent = zipf_exponent
+        self.daily_sessions = daily_sessions
+        self.volume_sigma = volume_sigma
+        self.daily_growth = daily_growth
+        self.seed = seed
+
+        # Generated reports keyed by request signature, so paging is cheap
+        self._reports: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+
+    def metric_type(self, metric: str) -> str:
+        """
+        Get the GA4 MetricType name generated for a metric.
+
+        Args:
+            metric: Metric API name
+
+        Returns:
+            MetricType name
+        """
+        configured = self.metric_distributions.get(metric, {}).get('type')
+        if configured:
+            return configured
+        if aggregation_kind(metric) == 'mean':
+            return 'TYPE_SECONDS' if 'Duration' in metric else 'TYPE_FLOAT'
+        return 'TYPE_INTEGER'
+
+    def dimension_value(self, dimension: str, code: int) -> str:
+        """
+        Get the display value of a dimension code.
+
+        Args:
+            dimension: Dimension API name
+            code: Value index, 0 being the most popular
+
+        Returns:
+            Dimension value
+        """
+        vocabulary = DIMENSION_VOCABULARIES.get(dimension, [])
+        if code < len(vocabulary):
+            return vocabulary[code]
+        if dimension == 'pagePath':
+            return '/' if code == 0 else f"/page-{code}"
+        return f"{dimension}-{code}"
+
+    def report(
+        self,
+        dimensions: List[str],
+        metrics: List[str],
+        start: date,
+        end: date,
+        property_id: str = ''
+    ) -> Dict[str, Any]:
+        """
+        Generate (or reuse) the full column data of one report and date range.
+
+        Args:
+            dimensions: Dimension API names
+            metrics: Metric API names
+            start: First day of the range
+            end: Last day of the range
+            property_id: Property the report is generated for
+
+        Returns:
+            Dict with 'codes' (dimension -> int array), 'values'
+            (metric -> float array), 'totals' (metric -> float) and 'days'
+        """
+        signature = f"{property_id}|{','.join(dimensions)}|{','.join(metrics)}|{start}|{end}"
+        cached = self._reports.get(signature)
+        if cached is not None:
+            self._reports.move_to_end(signature)
+            return cached
+
+        rng = np.random.default_rng(
+            [self.seed, int(hashlib.sha256(signature.encode()).hexdigest()[:8], 16)]
+        )
+
+        start = max(start, self.start_date)
+        end = min(end, self.end_date)
+        days = max((end - start).days + 1, 0)
+
+        cardinalities = [
+            days if dim == 'date' else self.dimension_cardinality.get(dim, 50)
+            for dim in dimensions
+        ]
+        space = int(np.prod(cardinalities, dtype=np.float64)) if dimensions else 1
+
+        if days == 0 or space == 0:
+            report = {'codes': {dim: np.zeros(0, dtype=np.int64) for dim in dimensions},
+                      'values': {m: np.zeros(0) for m in metrics}, 'volume': np.zeros(0),
+                      'totals': {m: 0.0 for m in metrics}, 'days': days, 'start': start}
+            return self._remember(signature, report)
+
+        # Each row's share of site traffic is the product of its values'
+        # popularity; popular combinations are also sampled more often
+        draws = min(self.row_count * 2, space * 4) if dimensions else 1
+        code_columns = []
+        share = np.ones(draws)
+        for dim, cardinality in zip(dimensions, cardinalities):
+            if dim == 'date':
+                codes = rng.integers(0, cardinality, draws)
+            else:
+                popularity = 1.0 / np.arange(1, cardinality + 1) ** self.zipf_exponent
+                popularity /= popularity.sum()
+                codes = rng.choice(cardinality, size=draws, p=popularity)
+                share *= popularity[codes]
+            code_columns.append(codes)
+
+        if dimensions:
+            keys = np.zeros(draws, dtype=np.int64)
+            for codes, cardinality in zip(code_columns, cardinalities):
+                keys = keys * cardinality + codes
+            _, first = np.unique(keys, return_index=True)
+            first = first[:self.row_count]
+            code_columns = [codes[first] for codes in code_columns]
+            share = share[first]
+        rows = len(share)
+
+        # Daily site traffic follows the weekday profile and a growth trend
+        day_offsets = np.arange(days)
+        day_numbers = np.datetime64(start, 'D').astype(np.int64) + day_offsets
+        day_traffic = (
+            self.daily_sessions
+            * WEEKDAY_PROFILE[(day_numbers - 4) % 7]
+            * (1 + self.daily_growth) ** (day_offsets + (start - self.start_date).days)
+        )
+        if 'date' in dimensions:
+            traffic = day_traffic[code_columns[dimensions.index('date')]]
+        else:
+            traffic = np.full(rows, day_traffic.sum())
+
+        # Count metrics share one traffic volume so they stay consistent
+        # (e.g. totalUsers below sessions on every row)
+        expected = traffic * share
+        sigma = self.volume_sigma / np.sqrt(1.0 + expected / 500.0)
+        volume = expected * np.exp(rng.standard_normal(rows) * sigma - sigma ** 2 / 2)
+        values = {metric: self._metric_values(rng, metric, volume) for metric in metrics}
+        totals = {}
+        for metric, column in values.items():
+            if aggregation_kind(metric) == 'mean':
+                totals[metric] = float(np.average(column, weights=volume)) if rows else 0.0
+            else:
+                totals[metric] = float(column.sum())
+
+        report = {
+            'codes': dict(zip(dimensions, code_columns)),
+            'values': values,
+            'totals': totals,
+            'volume': volume,
+            'days': days,
+            'start': start
+        }
+        return self._remember(signature, report)
+
+    def _metric_values(self, rng: np.random.Generator, metric: str, volume: np.ndarray) -> np.ndarray:
+        """Draw one metric column according to its configured distribution."""
+        settings = self.metric_distributions.get(metric, {})
+        kind = aggregation_kind(metric)
+        distribution = settings.get(
+            'distribution',
+            'beta' if kind == 'mean' and 'Rate' in metric
+            else 'gamma' if kind == 'mean' else 'volume'
+        )
+        size = len(volume)
+
+        center = None
+        if distribution == 'beta':
+            a, b = settings.get('a', 4.0), settings.get('b', 3.0)
+            values = rng.beta(a, b, size)
+            center = a / (a + b)
+        elif distribution == 'gamma':
+            shape, scale = settings.get('shape', 2.0), settings.get('scale', 60.0)
+            values = rng.gamma(shape, scale, size)
+            center = shape * scale
+        elif distribution == 'poisson':
+            values = rng.poisson(settings.get('lam', 1.0) * volume).astype(np.float64)
+        elif distribution == 'uniform':
+            values = rng.uniform(settings.get('low', 0.0), settings.get('high', 1.0), size) * volume
+        elif distribution == 'lognormal':
+            values = rng.lognormal(settings.get('mean', 0.0), settings.get('sigma', 0.5), size) * volume
+        else:
+            ratio = settings.get('ratio', METRIC_VOLUME_RATIOS.get(metric, 1.0))
+            values = volume * ratio * rng.uniform(0.9, 1.1, size)
+
+        if center is not None:
+            # Averages over more traffic vary less around the typical value
+            values = center + (values - center) / np.sqrt(1.0 + volume / 50.0)
+
+        if self.metric_type(metric) == 'TYPE_INTEGER':
+            values = np.maximum(np.rint(values), 1.0)
+        return values
+
+    def _remember(self, signature: str, report: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep a generated report, holding at most a few in memory."""
+        self._reports[signature] = report
+        while len(self._reports) > 8:
+            self._reports.popitem(last=False)
+        return report
+
+class SyntheticAnalyticsDataClient:
+    """Drop-in stand-in for BetaAnalyticsDataClient serving SyntheticGAData."""
+
+    def __init__(self, data: Optional[SyntheticGAData] = None, latency: float = 0.0):
+        """
+        Initialize the fake client.
+
+        Args:
+            data: Generator to serve (defaults to SyntheticGAData())
+            latency: Seconds each call sleeps, to mimic network round trips
+        """
+        self.data = data or SyntheticGAData()
+        self.latency = latency
+        self.calls: Dict[str, int] = {}
+
+    def run_report(self, request: Any = None, **kwargs: Any) -> RunReportResponse:
+        """Serve a RunReportRequest: named date ranges, totals, offset and limit."""
+        request = request or kwargs.get('request')
+        self._count('run_report')
+
+        property_id = request.property.split('/')[-1]
+        dimensions = [dim.name for dim in request.dimensions]
+        metrics = [metric.name for metric in request.metrics]
+        multiple = len(request.date_ranges) > 1
+
+        pb = RunReportResponse.pb()()
+        for name in dimensions + (['dateRange'] if multiple else []):
+            pb.dimension_headers.add(name=name)
+        for metric in metrics:
+            pb.metric_headers.add(
+                name=metric,
+                type_=MetricType[self.data.metric_type(metric)].value
+            )
+
+        offset = request.offset
+        limit = request.limit or 10000
+        total_rows = 0
+        for position, date_range in enumerate(request.date_ranges):
+            range_name = date_range.name or f"date_range_{position}"
+            report = self.data.report(
+                dimensions, metrics,
+                _parse_date(date_range.start_date), _parse_date(date_range.end_date),
+                property_id
+            )
+            rows = len(next(iter(report['values'].values()), []))
+
+            # Only the requested page is turned into protobuf rows
+            first = max(offset - total_rows, 0)
+            last = min(rows, offset + limit - total_rows)
+            if first < last:
+                self._add_rows(pb, report, dimensions, metrics, slice(first, last),
+                               range_name if multiple else None)
+            total_rows += rows
+
+            if request.metric_aggregations:
+                total = pb.totals.add()
+                for _ in dimensions:
+                    total.dimension_values.add(value='RESERVED_TOTAL')
+                if multiple:
+                    total.dimension_values.add(value=range_name)
+                for metric in metrics:
+                    total.metric_values.add(
+                        value=self._format(metric, report['totals'][metric])
+                    )
+
+        pb.row_count = total_rows
+        if request.return_property_quota:
+            pb.property_quota.tokens_per_hour.consumed = 10
+            pb.property_quota.tokens_per_hour.remaining = 39990
+            pb.property_quota.tokens_per_day.consumed = 10
+            pb.property_quota.tokens_per_day.remaining = 199990
+
+        return RunReportResponse.wrap(pb)
+
+    def batch_run_reports(self, request: Any = None, **kwargs: Any) -> BatchRunReportsResponse:
+        """Serve a BatchRunReportsRequest as one round trip."""
+        request = request or kwargs.get('request')
+        self._count('batch_run_reports')
+        latency, self.latency = self.latency, 0.0
+        try:
+            return BatchRunReportsResponse(
+                reports=[self.run_report(report) for report in request.requests]
+            )
+        finally:
+            self.latency = latency
+
+    def run_pivot_report(self, request: Any = None, **kwargs: Any) -> RunPivotReportResponse:
+        """Serve a RunPivotReportRequest: ranked pivot combinations and totals."""
+        request = request or kwargs.get('request')
+        self._count('run_pivot_report')
+
+        dimensions = [dim.name for dim in request.dimensions]
+        metrics = [metric.name for metric in request.metrics]
+        date_range = request.date_ranges[0]
+        report = self.data.report(
+            dimensions, metrics,
+            _parse_date(date_range.start_date), _parse_date(date_range.end_date),
+            request.property.split('/')[-1]
+        )
+        rows = len(report['volume'])
+
+        pb = RunPivotReportResponse.pb()()
+        for name in dimensions:
+            pb.dimension_headers.add(name=name)
+        for metric in metrics:
+            pb.metric_headers.add(
+                name=metric,
+                type_=MetricType[self.data.metric_type(metric)].value
+            )
+
+        # Rank each pivot's value combinations and keep rows of kept ones
+        keep = np.ones(rows, dtype=bool)
+        ranks = []
+        for pivot in request.pivots:
+            key = np.zeros(rows, dtype=np.int64)
+            for field in pivot.field_names:
+                key = key * (int(report['codes'][field].max(initial=0)) + 1) + report['codes'][field]
+            combos, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+
+            order = np.arange(len(combos))
+            if pivot.order_bys and pivot.order_bys[0].metric.metric_name in report['values']:
+                score = np.bincount(
+                    inverse,
+                    weights=report['values'][pivot.order_bys[0].metric.metric_name],
+                    minlength=len(combos)
+                )
+                order = np.argsort(-score, kind='stable')
+            selected = order[pivot.offset:pivot.offset + (pivot.limit or 10)]
+
+            header = pb.pivot_headers.add(row_count=len(combos))
+            columns = [
+                self._dimension_strings(report, field, report['codes'][field][first[selected]])
+                for field in pivot.field_names
+            ]
+            for combo in zip(*columns):
+                dimension_header = header.pivot_dimension_headers.add()
+                for value in combo:
+                    dimension_header.dimension_values.add(value=value)
+
+            rank = np.full(len(combos), -1)
+            rank[selected] = np.arange(len(selected))
+            ranks.append(rank[inverse])
+            keep &= ranks[-1] >= 0
+
+        positions = np.flatnonzero(keep)
+        if ranks:
+            positions = positions[np.lexsort([rank[positions] for rank in reversed(ranks)])]
+        self._add_rows(pb, report, dimensions, metrics, positions, None)
+
+        # Totals over each aggregated pivot, per kept combination of the others
+        aggregated = [
+            position for position, pivot in enumerate(request.pivots)
+            if pivot.metric_aggregations
+        ]
+        if aggregated:
+            self._add_pivot_aggregates(
+                pb, report, dimensions, metrics, request.pivots, ranks, positions, aggregated
+            )
+
+        return RunPivotReportResponse.wrap(pb)
+
+    def batch_run_pivot_reports(self, request: Any = None, **kwargs: Any) -> BatchRunPivotReportsResponse:
+        """Serve a BatchRunPivotReportsRequest as one round trip."""
+        request = request or kwargs.get('request')
+        self._count('batch_run_pivot_reports')
+        latency, self.latency = self.latency, 0.0
+        try:
+            return BatchRunPivotReportsResponse(
+                pivot_reports=[self.run_pivot_report(report) for report in request.requests]
+            )
+        finally:
+            self.latency = latency
+
+    def get_metadata(self, request: Any = None, **kwargs: Any) -> Metadata:
+        """Serve metadata for every dimension and metric the generator knows."""
+        self._count('get_metadata')
+        metrics = set(self.data.metric_distributions) | {
+            'totalUsers', 'newUsers', 'activeUsers', 'sessions', 'averageSessionDuration',
+            'screenPageViews', 'eventCount', 'engagementRate', 'bounceRate',
+        }
+        dimensions = set(self.data.dimension_cardinality) | {'date', 'dateRange'}
+        return Metadata(
+            dimensions=[
+                DimensionMetadata(api_name=name, ui_name=name, category='Synthetic')
+                for name in sorted(dimensions)
+            ],
+            metrics=[
+                MetricMetadata(
+                    api_name=name,
+                    ui_name=name,
+                    type_=MetricType[self.data.metric_type(name)],
+                    category='Synthetic'
+                )
+                for name in sorted(metrics)
+            ]
+        )
+
+    def check_compatibility(self, request: Any = None, **kwargs: Any) -> CheckCompatibilityResponse:
+        """Report every requested dimension and metric as compatible."""
+        request = request or kwargs.get('request')
+        self._count('check_compatibility')
+        return CheckCompatibilityResponse(
+            dimension_compatibilities=[
+                DimensionCompatibility(
+                    dimension_metadata=DimensionMetadata(api_name=dim.name),
+                    compatibility=Compatibility.COMPATIBLE
+                )
+                for dim in request.dimensions
+            ],
+            metric_compatibilities=[
+                MetricCompatibility(
+                    metric_metadata=MetricMetadata(api_name=metric.name),
+                    compatibility=Compatibility.COMPATIBLE
+                )
+                for metric in request.metrics
+            ]
+        )
+
+    def _add_rows(
+        self,
+        pb: Any,
+        report: Dict[str, Any],
+        dimensions: List[str],
+        metrics: List[str],
+        positions: Any,
+        range_name: Optional[str]
+    ) -> None:
+        """Append the rows at positions (a slice or index array) of a generated report."""
+        dimension_columns = []
+        for dim in dimensions:
+            dimension_columns.append(
+                self._dimension_strings(report, dim, report['codes'][dim][positions])
+            )
+
+        metric_columns = []
+        for metric in metrics:
+            values = report['values'][metric][positions]
+            if self.data.metric_type(metric) == 'TYPE_INTEGER':
+                metric_columns.append(values.astype(np.int64).astype(str).tolist())
+            else:
+                metric_columns.append([repr(value) for value in values.tolist()])
+
+        for position in range(len(metric_columns[0]) if metric_columns else 0):
+            row = pb.rows.add()
+            for column in dimension_columns:
+                row.dimension_values.add(value=column[position])
+            if range_name is not None:
+                row.dimension_values.add(value=range_name)
+            for column in metric_columns:
+                row.metric_values.add(value=column[position])
+
+    def _add_pivot_aggregates(
+        self,
+        pb: Any,
+        report: Dict[str, Any],
+        dimensions: List[str],
+        metrics: List[str],
+        pivots: Any,
+        ranks: List[np.ndarray],
+        positions: np.ndarray,
+        aggregated: List[int]
+    ) -> None:
+        """Append RESERVED_TOTAL aggregate rows for the aggregated pivots."""
+        volume = report['volume'][positions]
+        grouping = [position for position in range(len(pivots)) if position not in aggregated]
+        key = np.zeros(len(positions), dtype=np.int64)
+        for position in grouping:
+            key = key * (int(ranks[position].max(initial=0)) + 1) + ranks[position][positions]
+        groups, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+
+        totalled = {field for position in aggregated for field in pivots[position].field_names}
+        representative = positions[first]
+        names = {
+            dim: self._dimension_strings(report, dim, report['codes'][dim][representative])
+            for dim in dimensions if dim not in totalled
+        }
+        weights = np.bincount(inverse, weights=volume, minlength=len(groups))
+        totals = {}
+        for metric in metrics:
+            values = report['values'][metric][positions]
+            if aggregation_kind(metric) == 'mean':
+                weighted = np.bincount(inverse, weights=values * volume, minlength=len(groups))
+                totals[metric] = np.divide(weighted, weights, out=np.zeros(len(groups)), where=weights > 0)
+            else:
+                totals[metric] = np.bincount(inverse, weights=values, minlength=len(groups))
+
+        for group in range(len(groups)):
+            row = pb.aggregates.add()
+            for dim in dimensions:
+                value = 'RESERVED_TOTAL' if dim in totalled else names[dim][group]
+                row.dimension_values.add(value=value)
+            for metric in metrics:
+                row.metric_values.add(value=self._format(metric, totals[metric][group]))
+
+    def _dimension_strings(self, report: Dict[str, Any], dim: str, codes: np.ndarray) -> List[str]:
+        """Turn dimension codes of a generated report into GA4 dimension values."""
+        if dim == 'date':
+            days = np.datetime64(report['start']) + codes
+            return np.char.replace(np.datetime_as_string(days, unit='D'), '-', '').tolist()
+        # Name each distinct value once, then gather by code
+        distinct, inverse = np.unique(codes, return_inverse=True)
+        names = np.array([self.data.dimension_value(dim, int(code)) for code in distinct])
+        return names[inverse].tolist()
+
+    def _format(self, metric: str, value: float) -> str:
+        """Format a metric value the way GA4 does for its type."""
+        if self.data.metric_type(metric) == 'TYPE_INTEGER':
+            return str(int(value))
+        return repr(float(value))
+
+    def _count(self, method: str) -> None:
+        """Count a call and simulate its latency."""
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+def _parse_date(value: str) -> date:
+    """Parse a GA4 date range boundary (YYYY-MM-DD, today, yesterday, NdaysAgo)."""
+    today = date.today()
+    if value == 'today':
+        return today
+    if value == 'yesterday':
+        return today - timedelta(days=1)
+    if value.endswith('daysAgo'):
+        return today - timedelta(days=int(value[:-len('daysAgo')]))
+    return datetime.strptime(value, "%Y-%m-%d").date()
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import os
+import time
+import yaml
+from contextlib import ExitStack
+from typing import Any, AsyncIterator, Dict, List, Optional
+from src.connectors.quota_scheduler import QuotaScheduler, default_scheduler
+from src.models.report_models import ReportStateInput
+from src.utils.concurrency import ConcurrencyLimit, llm_limit
+
+class PortfolioRunner:
+    """Runs the report graph for many GA4 properties under shared limits."""
+
+    def __init__(
+        self,
+        graph: Any,
+        max_concurrent_runs: int = 8,
+        max_concurrent_llm_calls: Optional[int] = None,
+        max_concurrent_ga_requests: Optional[int] = None,
+        scheduler: QuotaScheduler = default_scheduler,
+        llm: ConcurrencyLimit = llm_limit
+    ):
+        """
+        Initialize the runner.
+
+        Connector pool, response cache, metadata catalog and warehouse are
+        process-wide, so concurrent runs share them. The limits below apply
+        across the runs of this runner only: it gets its own limit and
+        scheduler, which stand in for the shared ones while its runs are in
+        progress, so other callers of the shared ones are unaffected.
+
+        Args:
+            graph: Compiled report graph
+            max_concurrent_runs: Properties processed at once
+            max_concurrent_llm_calls: LLM calls in flight across all runs
+                (default: share the llm limit)
+            max_concurrent_ga_requests: GA4 requests in flight across all runs
+                (default: share the scheduler)
+            scheduler: QuotaScheduler used by the pooled connectors
+            llm: Concurrency limit wrapped around every LLM call
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.graph = graph
+        self.max_concurrent_runs = max_concurrent_runs
+        self.shared_llm = llm
+        self.shared_scheduler = scheduler
+
+        self.llm = llm
+        if max_concurrent_llm_calls is not None:
+            self.llm = ConcurrencyLimit(max_concurrent_llm_calls, name=llm.name)
+
+        self.scheduler = scheduler
+        if max_concurrent_ga_requests is not None:
+            self.scheduler = QuotaScheduler(
+                max_concurrent_per_property=scheduler.max_concurrent_per_property,
+                max_concurrent_total=max_concurrent_ga_requests,
+                max_retries=scheduler.max_retries,
+                base_delay=scheduler.base_delay,
+                max_delay=scheduler.max_delay,
+                low_priority_reserve=scheduler.low_priority_reserve,
+                defer_seconds=scheduler.defer_seconds
+            )
+            # Quota is charged per property whoever schedules the request
+            self.scheduler.quota = scheduler.quota
+
+    @classmethod
+    def from_config(cls, graph: Any, config_path: Optional[str] = None) -> 'PortfolioRunner':
+        """
+        Create a runner from the portfolio_config section of config.yaml.
+
+        Args:
+            graph: Compiled report graph
+            config_path: Optional path of the YAML config
+
+        Returns:
+            Configured runner
+        """
+        config_path = config_path or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+            "config", "config.yaml"
+        )
+        with open(config_path, "r") as f:
+            portfolio_config = yaml.safe_load(f).get("portfolio_config", {})
+
+        return cls(
+            graph,
+            max_concurrent_runs=portfolio_config.get("max_concurrent_runs", 8),
+            max_concurrent_llm_calls=portfolio_config.get("max_concurrent_llm_calls"),
+            max_concurrent_ga_requests=portfolio_config.get("max_concurrent_ga_requests")
+        )
+
+    async def stream(
+        self,
+        property_ids: List[str],
+        input_data: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run the graph for every property, yielding results as they complete.
+
+        A failing property never stops the others.
+
+        Args:
+            property_ids: GA4 property IDs to report on
+            input_data: Extra graph input shared by all properties
+
+        Yields:
+            Dict with property_id, status ('success' or 'failed'), result
+            (final graph state, or None), error and duration_seconds
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrent_runs)
+
+        async def run_one(property_id: str) -> Dict[str, Any]:
+            async with semaphore:
+                started = time.monotonic()
+                try:
+                    state_input = ReportStateInput(
+                        **{**(input_data or {}), 'property_id': property_id}
+                    )
+                    # Set inside this task only, so the runner's limits never
+                    # leak to other callers of the shared ones
+                    with self._limits():
+                        result = await self.graph.ainvoke(state_input)
+
+                    # fetch_ga_data reports failures in the state instead of raising
+                    error = (result.get('ga_data') or {}).get('error')
+                    status = 'failed' if error else 'success'
+                except Exception as e:
+                    self.logger.error(
+                        f"Report for property {property_id} failed: {str(e)}",
+                        exc_info=True
+                    )
+                    result, error, status = None, str(e), 'failed'
+
+                return {
+                    'property_id': property_id,
+                    'status': status,
+                    'result': result,
+                    'error': error,
+                    'duration_seconds': round(time.monotonic() - started, 2)
+                }
+
+        self.logger.info(
+            f"Running reports for {len(property_ids)} properties, "
+            f"{self.max_concurrent_runs} at a time"
+        )
+        tasks = [asyncio.ensure_future(run_one(property_id)) for property_id in property_ids]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                outcome = await completed
+                self.logger.info(
+                    f"Property {outcome['property_id']}: {outcome['status']} "
+                    f"in {outcome['duration_seconds']}s"
+                )
+                yield outcome
+        finally:
+            # Stop outstanding runs if the consumer stops listening
+            for task in tasks:
+                task.cancel()
+
+    async def run(
+        self,
+        property_ids: List[str],
+        input_data: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run the graph for every property and collect all results.
+
+        Args:
+            property_ids: GA4 property IDs to report on
+            input_data: Extra graph input shared by all properties
+
+        Returns:
+            Results in completion order (see stream)
+        """
+        return [outcome async for outcome in self.stream(property_ids, input_data)]
+
+    def _limits(self) -> ExitStack:
+        """Apply the runner's own limits in place of the shared ones."""
+        stack = ExitStack()
+        if self.llm is not self.shared_llm:
+            stack.enter_context(self.shared_llm.replaced(self.llm))
+        if self.scheduler is not self.shared_scheduler:
+            stack.enter_context(self.scheduler.activate())
+        return stack
+
+def property_ids_from_env() -> List[str]:
+    """
+    Read the properties to report on from the environment.
+
+    Returns:
+        IDs from GA_PROPERTY_IDS (comma-separated), falling back to
+        GA_PROPERTY_ID
+    """
+    ids = os.getenv('GA_PROPERTY_IDS') or os.getenv('GA_PROPERTY_ID') or ''
+    return [property_id.strip() for property_id in ids.split(',') if property_id.strip()]
@@ -8,12 +8,19 @@ from langgraph.graph import StateGraph, START, END
 from langchain_openai import ChatOpenAI
 from src.models.report_models import ReportState, ReportStateInput, ReportStateOutput, Section, SectionState, SectionOutputState
 from src.nodes.data_fetching.fetch_ga_data import fetch_ga_data
+from src.nodes.analysis.detect_anomalies import detect_anomalies
+from src.nodes.analysis.forecast_metrics import forecast_metrics
+from src.nodes.analysis.assess_significance import assess_significance
 from src.nodes.planning.generate_report_plan import generate_report_plan
 from src.nodes.writing.write_section import write_section
 from src.nodes.writing.write_final_sections import write_final_sections
 from src.nodes.writing.gather_completed_sections import gather_completed_sections
 from src.nodes.writing.compile_final_report import compile_final_report
 from src.prompts.writing_prompts import section_writer_instructions, final_section_writer_instructions
+from src.utils.concurrency import llm_limit
+from src.analytics.anomalies import format_anomalies
+from src.analytics.forecast import format_forecasts
+from src.analytics.significance import format_significance
 
 logger = logging.getLogger(__name__)
 
@@ -45,7 +52,9 @@ def analyze_ga_data(state: ReportState, config: Dict) -> ReportState:
         # Get current week data for detailed analysis
         current_week_data = ga_data.get('current_week', {})
         metric_headers = current_week_data.get('metric_headers', [])
-        dimension_headers = current_week_data.get('dimension_headers', [])
+        # The cube also holds dimensions of planned reports other than the primary one
+        cube = ga_data.get('cube')
+        dimension_headers = cube.dimensions if cube else current_week_data.get('dimension_headers', [])
         
         # Prepare comparative analysis prompt
         analysis_prompt = f"""Analyze the following Google Analytics 4 data with week-over-week and month-over-month comparisons:
@@ -56,6 +65,15 @@ Weekly Comparison ({time_ranges.get('weekly', {}).get('current', {}).get('start'
 Monthly Comparison ({time_ranges.get('monthly', {}).get('current', {}).get('start')} to {time_ranges.get('monthly', {}).get('current', {}).get('end')}):
 {monthly_metrics}
 
+Detected Anomalies (computed from the daily series, weekday seasonality removed):
+{format_anomalies(state.get("anomalies") or [])}
+
+Expected vs Actual (most recent days against a seasonal forecast from the days before):
+{format_forecasts(state.get("forecasts") or [])}
+
+Statistically Significant Changes (Welch t test on weekday-adjusted daily values, false discovery rate controlled):
+{format_significance(state.get("significance") or [])}
+
 Available Metrics:
 {[header.get('name') for header in metric_headers]}
 
@@ -65,13 +83,15 @@ Available Dimensions:
 Focus on:
 1. Week-over-week performance changes and trends
 2. Month-over-month growth patterns
-3. Key metrics showing significant changes
+3. Key metrics showing statistically significant changes (only those listed above)
 4. Areas of improvement or concern
-5. Seasonal patterns or anomalies
+5. The detected anomalies above; do not infer other anomalies from the totals
+6. Series outside their expected range, which changed more than seasonality explains
 """
         
         # Generate analysis
-        response = llm.invoke(analysis_prompt)
+        with llm_limit.slot():
+            response = llm.invoke(analysis_prompt)
         state["analysis"] = response.content
         
         return state
@@ -111,7 +131,8 @@ Focus on:
 """
         
         # Generate insights
-        response = llm.invoke(insights_prompt)
+        with llm_limit.slot():
+            response = llm.invoke(insights_prompt)
         state["insights"] = response.content
         
         return state
@@ -162,12 +183,25 @@ def initiate_final_section_writing(state: ReportState) -> List[str]:
 # Create main graph
 graph = StateGraph(ReportState)
 
+# Indexes fetch_ga_data builds for the nodes; they hold NumPy arrays
+GA_DATA_INDEXES = ('daily_index', 'aggregates', 'cube')
+# Top-level copies of the current week's rows, exposed for the nodes only
+GA_DATA_NODE_COPIES = ('rows', 'breakdowns')
+
 # Add output node to convert state to final output
 def create_output(state: Dict) -> Dict:
     """Convert final state to output format"""
-    # Create output state with final report
+    # Create output state with final report; callers get the summaries of
+    # the indexes rather than the indexes themselves, and the rows once
+    # (under current_week), so the result stays small and JSON-serializable
+    ga_data = state.get("ga_data") or {}
     output = {
-        "final_report": state.get("final_report", "No report generated")
+        "final_report": state.get("final_report", "No report generated"),
+        "ga_data": {
+            key: value.summary() if key in GA_DATA_INDEXES and value is not None else value
+            for key, value in ga_data.items()
+            if key not in GA_DATA_NODE_COPIES
+        }
     }
     logger.info("Created output state with final report")
     return output
@@ -176,6 +210,9 @@ graph.add_node("create_output", create_output)
 
 # Add nodes
 graph.add_node("fetch_ga_data", fetch_ga_data)
+graph.add_node("detect_anomalies", detect_anomalies)
+graph.add_node("forecast_metrics", forecast_metrics)
+graph.add_node("assess_significance", assess_significance)
 graph.add_node("analyze_data", analyze_ga_data)
 graph.add_node("generate_insights", generate_insights)
 graph.add_node("generate_report_plan", generate_report_plan)
@@ -186,7 +223,10 @@ graph.add_node("compile_final_report", compile_final_report)
 
 # Add edges
 graph.add_edge(START, "fetch_ga_data")
-graph.add_edge("fetch_ga_data", "analyze_data")
+graph.add_edge("fetch_ga_data", "detect_anomalies")
+graph.add_edge("detect_anomalies", "forecast_metrics")
+graph.add_edge("forecast_metrics", "assess_significance")
+graph.add_edge("assess_significance", "analyze_data")
 graph.add_edge("analyze_data", "generate_insights")
 graph.add_edge("generate_insights", "generate_report_plan")
 graph.add_conditional_edges(
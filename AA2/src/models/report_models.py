@@ -33,6 +33,9 @@ class ReportState(TypedDict):
     """State maintained throughout the main graph execution"""
     property_id: str
     ga_data: Dict[str, Any]  # GAData model as dict
+    anomalies: Optional[List[Dict[str, Any]]]
+    forecasts: Optional[List[Dict[str, Any]]]
+    significance: Optional[List[Dict[str, Any]]]
     sections: List[Section]
     completed_sections: List[Section]
     analysis: Optional[str]
@@ -0,0 +1,57 @@
+import logging
+import os
+from typing import Dict
+import yaml
+from src.analytics.growth import comparison_ranges
+from src.analytics.significance import compare_periods
+from src.models.report_models import ReportState
+
+logger = logging.getLogger(__name__)
+
+def assess_significance(state: ReportState, config: Dict) -> ReportState:
+    """
+    Test which period-over-period changes of the daily GA4 series are significant.
+    
+    Args:
+        state: Current state containing GA4 data with its daily index
+        config: Configuration dictionary
+        
+    Returns:
+        Updated state with a list of test results
+    """
+    try:
+        logger.info("Testing significance of period-over-period changes")
+        
+        index = state.get("ga_data", {}).get("daily_index")
+        if index is None:
+            logger.warning("No daily GA4 series to test for significance")
+            state["significance"] = []
+            return state
+        
+        # Load significance settings
+        config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "config", "config.yaml")
+        with open(config_path, "r") as f:
+            significance_config = yaml.safe_load(f).get("ga_config", {}).get("significance", {})
+        
+        ranges = comparison_ranges(
+            index.dates[-1].item(),
+            significance_config.get("comparisons", ["weekly", "monthly"])
+        )
+        results = compare_periods(
+            index,
+            ranges,
+            top_values=significance_config.get("top_values", 5),
+            alpha=significance_config.get("alpha", 0.05),
+            confidence=significance_config.get("confidence", 0.95),
+            seasonality_days=significance_config.get("seasonality_days", 84),
+            control_fdr=significance_config.get("control_fdr", True)
+        )
+        state["significance"] = results
+        
+        significant = sum(1 for result in results if result['significant'])
+        logger.info(f"{significant} of {len(results)} tested changes are significant")
+        return state
+        
+    except Exception as e:
+        logger.error(f"Error testing significance: {str(e)}", exc_info=True)
+        raise
@@ -0,0 +1,54 @@
+import logging
+import os
+from typing import Dict
+import yaml
+from src.analytics.anomalies import detect_anomalies as find_anomalies
+from src.models.report_models import ReportState
+
+logger = logging.getLogger(__name__)
+
+def detect_anomalies(state: ReportState, config: Dict) -> ReportState:
+    """
+    Flag anomalies in the daily GA4 series fetched for the report.
+    
+    Args:
+        state: Current state containing GA4 data with its daily index
+        config: Configuration dictionary
+        
+    Returns:
+        Updated state with a list of anomalies
+    """
+    try:
+        logger.info("Detecting anomalies in daily GA4 series")
+        
+        index = state.get("ga_data", {}).get("daily_index")
+        if index is None:
+            logger.warning("No daily GA4 series to check for anomalies")
+            state["anomalies"] = []
+            return state
+        
+        # Load anomaly settings
+        config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "config", "config.yaml")
+        with open(config_path, "r") as f:
+            anomaly_config = yaml.safe_load(f).get("ga_config", {}).get("anomalies", {})
+        
+        anomalies = find_anomalies(
+            index,
+            lookback_days=anomaly_config.get("lookback_days", 90),
+            window=anomaly_config.get("window", 28),
+            recent_days=anomaly_config.get("recent_days", 7),
+            shift_days=anomaly_config.get("shift_days", 28),
+            z_threshold=anomaly_config.get("z_threshold", 3.0),
+            changepoint_threshold=anomaly_config.get("changepoint_threshold", 6.0),
+            min_shift=anomaly_config.get("min_shift", 0.15),
+            top_values=anomaly_config.get("top_values", 5),
+            max_anomalies=anomaly_config.get("max_anomalies", 20)
+        )
+        state["anomalies"] = anomalies
+        
+        logger.info(f"Detected {len(anomalies)} anomalies")
+        return state
+        
+    except Exception as e:
+        logger.error(f"Error detecting anomalies: {str(e)}", exc_info=True)
+        raise
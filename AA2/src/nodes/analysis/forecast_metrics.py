@@ -0,0 +1,51 @@
+import logging
+import os
+from typing import Dict
+import yaml
+from src.analytics.forecast import forecast_metrics as forecast_series
+from src.models.report_models import ReportState
+
+logger = logging.getLogger(__name__)
+
+def forecast_metrics(state: ReportState, config: Dict) -> ReportState:
+    """
+    Compare the last days of the daily GA4 series with a seasonal forecast.
+    
+    Args:
+        state: Current state containing GA4 data with its daily index
+        config: Configuration dictionary
+        
+    Returns:
+        Updated state with a list of forecasts
+    """
+    try:
+        logger.info("Forecasting daily GA4 series")
+        
+        index = state.get("ga_data", {}).get("daily_index")
+        if index is None:
+            logger.warning("No daily GA4 series to forecast")
+            state["forecasts"] = []
+            return state
+        
+        # Load forecast settings
+        config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "config", "config.yaml")
+        with open(config_path, "r") as f:
+            forecast_config = yaml.safe_load(f).get("ga_config", {}).get("forecast", {})
+        
+        forecasts = forecast_series(
+            index,
+            lookback_days=forecast_config.get("lookback_days", 90),
+            horizon=forecast_config.get("horizon", 7),
+            top_values=forecast_config.get("top_values", 5),
+            method=forecast_config.get("method", "holt_winters"),
+            z=forecast_config.get("z", 1.96)
+        )
+        state["forecasts"] = forecasts
+        
+        outside = sum(1 for forecast in forecasts if forecast['status'] != 'within')
+        logger.info(f"Forecast {len(forecasts)} series, {outside} outside their expected range")
+        return state
+        
+    except Exception as e:
+        logger.error(f"Error forecasting metrics: {str(e)}", exc_info=True)
+        raise
@@ -1,13 +1,365 @@
+import asyncio
 import logging
 import yaml
 import os
-from datetime import datetime, timedelta
-from typing import Dict
-from src.connectors.google_analytics import GoogleAnalyticsConnector
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+from src.connectors.connector_pool import default_pool
+from src.connectors.quota_scheduler import QuotaScheduler
+from src.connectors.ga_cache import GAResponseCache
+from src.connectors.ga_warehouse import GAWarehouse
+from src.connectors.ga_metadata import GAMetadataCatalog
+from src.connectors.query_planner import QueryPlanner
+from src.connectors.columnar import Vocabulary, vocabulary_scope
+from src.connectors.row_store import SpillingRowStore
+from src.utils.ga_export import export_windows
+from src.utils.metric_aggregation import RATIO_WEIGHT_METRIC
+from src.analytics.growth import comparison_ranges, compute_growth, span_start
+from src.analytics.window_index import WindowIndex
+from src.analytics.aggregates import AggregateIndex
+from src.analytics.cube import GACube
 from src.models.report_models import ReportState
 
 logger = logging.getLogger(__name__)
 
+# Response cache, metadata catalog and warehouse are shared by every graph
+# run in this process (e.g. a portfolio of properties run concurrently)
+_shared_lock = threading.Lock()
+_shared_resources: Dict[Tuple[str, str], Any] = {}
+
+def _shared_resource(kind: str, path: str, factory: Callable[[], Any]) -> Any:
+    """Get the process-wide instance of a resource, creating it once."""
+    with _shared_lock:
+        resource = _shared_resources.get((kind, path))
+        if resource is None:
+            resource = _shared_resources[(kind, path)] = factory()
+        return resource
+
+def _daily_index_specs(
+    metrics: List[str],
+    start: date,
+    end: date,
+    dimensions: List[str],
+    dimension_days: int,
+    row_limit: int
+) -> List[Dict[str, Any]]:
+    """
+    Report specs (see GoogleAnalyticsConnector.batch_fetch) of the daily index.
+    
+    Args:
+        metrics: Metric names (sessions are added to weight ratio metrics)
+        start: First day of the property-wide series
+        end: Last day of all series
+        dimensions: Dimensions to also index per value
+        dimension_days: Days of per-value series, ending on end
+        row_limit: Row limit of each per-dimension report
+        
+    Returns:
+        The property-wide daily report, then one date x dimension report per
+        dimension
+    """
+    daily_metrics = metrics + [RATIO_WEIGHT_METRIC] if RATIO_WEIGHT_METRIC not in metrics else metrics
+    dimension_start = max(start, end - timedelta(days=dimension_days - 1))
+    
+    def as_datetime(day: date) -> datetime:
+        return datetime.combine(day, datetime.min.time())
+    
+    return [{
+        'metrics': daily_metrics,
+        'dimensions': ['date'],
+        'start_date': as_datetime(start),
+        'end_date': as_datetime(end),
+        'row_limit': (end - start).days + 1
+    }] + [
+        {
+            'metrics': daily_metrics,
+            'dimensions': ['date', dimension],
+            'start_date': as_datetime(dimension_start),
+            'end_date': as_datetime(end),
+            'row_limit': row_limit
+        }
+        for dimension in dimensions
+    ]
+
+def _build_daily_index(
+    specs: List[Dict[str, Any]],
+    results: List[Dict[str, Any]],
+    start: date,
+    end: date
+) -> WindowIndex:
+    """
+    Index fetched daily series for constant-time window sums.
+    
+    Args:
+        specs: Output of _daily_index_specs
+        results: Fetched data of each spec
+        start: First day of the property-wide series
+        end: Last day of all series
+        
+    Returns:
+        WindowIndex over start..end
+    """
+    (daily_spec, *dimension_specs), (daily_data, *dimension_data) = specs, results
+    index = WindowIndex.from_rows(daily_data.get('rows', []), daily_spec['metrics'], start, end)
+    for spec, data in zip(dimension_specs, dimension_data):
+        index.add_dimension(spec['dimensions'][1], data.get('rows', []), spec['start_date'].date())
+    return index
+
+def _aggregate_index_specs(
+    metrics: List[str],
+    dimensions: List[str],
+    current: Tuple[datetime, datetime],
+    previous: Tuple[datetime, datetime],
+    row_limit: int
+) -> List[Dict[str, Any]]:
+    """
+    Report specs (see GoogleAnalyticsConnector.batch_fetch) of the aggregate index.
+    
+    Args:
+        metrics: Metric names (sessions are added to filter tiny values)
+        dimensions: Dimensions to rank ('date' is skipped)
+        current: Current period
+        previous: Previous period
+        row_limit: Row limit of each report, per period
+        
+    Returns:
+        One report per dimension with both periods as named date ranges
+    """
+    ranked_metrics = metrics + [RATIO_WEIGHT_METRIC] if RATIO_WEIGHT_METRIC not in metrics else metrics
+    return [
+        {
+            'metrics': ranked_metrics,
+            'dimensions': [dimension],
+            'date_ranges': {'current': current, 'previous': previous},
+            'row_limit': row_limit
+        }
+        for dimension in dimensions
+        if dimension != 'date'
+    ]
+
+def _build_aggregate_index(
+    specs: List[Dict[str, Any]],
+    results: List[Dict[str, Dict[str, Any]]],
+    n: int,
+    min_sessions: float
+) -> AggregateIndex:
+    """
+    Rank the values of every fetched dimension.
+    
+    Args:
+        specs: Output of _aggregate_index_specs
+        results: Fetched periods of each spec
+        n: Number of values kept per list
+        min_sessions: Sessions a value needs to be ranked
+        
+    Returns:
+        AggregateIndex over the dimensions
+    """
+    index = AggregateIndex(specs[0]['metrics'] if specs else [], n=n, min_sessions=min_sessions)
+    for spec, periods in zip(specs, results):
+        index.add_dimension(spec['dimensions'][0], periods['current']['rows'], periods['previous']['rows'])
+    return index
+
+def _combination_pivot_specs(
+    window: Dict[str, Any],
+    dimensions: List[str],
+    metrics: List[str],
+    period: Tuple[datetime, datetime],
+    limit: int
+) -> List[Dict[str, Any]]:
+    """
+    Pivot report specs (see GoogleAnalyticsConnector.batch_fetch_pivots) of
+    the dimension pairs the cube cannot rank exactly.
+    
+    The cube ranks a pair from a fetched report holding both dimensions,
+    which costs no request; pairs held by no such report, or only by
+    truncated ones, are ranked by GA server side instead.
+    
+    Args:
+        window: Fetched window the cube is built from
+        dimensions: Configured dimension names ('date' is skipped)
+        metrics: Metric names
+        period: Date range of the window
+        limit: Combinations kept per pair
+        
+    Returns:
+        One pivot report per pair, keyed by its dimensions joined with '+'
+        once fetched
+    """
+    reports = window.get('breakdowns') or {'+'.join(window.get('dimension_headers', [])): window}
+    complete = [
+        set(report.get('dimension_headers', []))
+        for report in reports.values()
+        if report.get('metadata', {}).get('total_row_count', 0) <= report.get('row_count', 0)
+    ]
+    order_by = RATIO_WEIGHT_METRIC if RATIO_WEIGHT_METRIC in metrics else metrics[0]
+    candidates = [dimension for dimension in dimensions if dimension != 'date']
+    return [
+        {
+            'metrics': metrics,
+            'dimensions': [first, second],
+            'pivots': [{'field_names': [first, second], 'limit': limit, 'order_by': order_by}],
+            'start_date': period[0],
+            'end_date': period[1]
+        }
+        for position, first in enumerate(candidates)
+        for second in candidates[position + 1:]
+        if not any({first, second} <= held for held in complete)
+    ]
+
+async def _fetch_combinations(ga_connector: Any, specs: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Fetch the leading combinations of dimension pairs as pivot reports.
+    
+    Args:
+        ga_connector: Connector of the property
+        specs: Output of _combination_pivot_specs
+        
+    Returns:
+        Ranked rows per pair, keyed by its dimensions joined with '+'; empty
+        if the reports fail, as the writers then fall back to the cube
+    """
+    if not specs:
+        return {}
+    try:
+        with QuotaScheduler.priority('low'):
+            results = await ga_connector.batch_fetch_pivots(specs)
+    except Exception as e:
+        logger.warning(f"Could not fetch dimension combinations: {str(e)}")
+        return {}
+    return {'+'.join(spec['dimensions']): result['rows'] for spec, result in zip(specs, results)}
+
+async def _fetch_spilled_window(
+    ga_connector: Any,
+    metrics: List[str],
+    dimensions: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    row_limit: int,
+    directory: str,
+    memory_budget_mb: float,
+    page_size: int
+) -> Dict[str, Any]:
+    """
+    Stream every row of a breakdown through a spilling row store.
+    
+    Args:
+        ga_connector: GoogleAnalyticsConnector for the property
+        metrics: Metric names
+        dimensions: Dimension names of the breakdown
+        start_date: Start of the window
+        end_date: End of the window
+        row_limit: Number of rows kept in the window
+        directory: Directory for spilled chunks (removed afterwards)
+        memory_budget_mb: Megabytes of buffered rows before a spill
+        page_size: Rows per requested page
+        
+    Returns:
+        Data in the format of QueryPlanner.fetch: the row_limit largest rows
+        by sessions, with them and exact per-dimension roll-ups of all rows
+        under 'breakdowns'
+    """
+    with SpillingRowStore(dimensions, metrics, directory, int(memory_budget_mb * 2 ** 20)) as store:
+        await store.consume(ga_connector.iter_pages(
+            metrics=metrics,
+            dimensions=dimensions,
+            start_date=start_date,
+            end_date=end_date,
+            page_size=page_size,
+            columnar=True
+        ))
+        window = store.top(row_limit)
+        # Per-dimension roll-ups are streamed over all rows, so they stay
+        # exact however many rows did not make the top
+        breakdowns = {'+'.join(dimensions): window}
+        for dimension in dimensions:
+            breakdowns[dimension] = store.aggregate([dimension])
+        logger.info(f"Streamed GA4 breakdown through a spilling row store: {store.stats()}")
+        return {
+            **window,
+            'breakdowns': breakdowns,
+            'metadata': {
+                'property_id': ga_connector.property_id,
+                'total_row_count': store.row_count,
+                'spill': store.stats()
+            }
+        }
+
+async def _stream_truncated_reports(
+    ga_connector: Any,
+    window: Dict[str, Any],
+    metrics: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    row_limit: int,
+    directory: str,
+    memory_budget_mb: float,
+    page_size: int
+) -> Dict[str, Any]:
+    """
+    Stream the reports of a window that GA truncated at the row limit.
+    
+    Each truncated report is fetched again through a spilling row store
+    (see _fetch_spilled_window), so memory stays bounded and its
+    per-dimension roll-ups become exact; reports that fit are kept as they
+    are.
+    
+    Args:
+        ga_connector: GoogleAnalyticsConnector for the property
+        window: Fetched window, with planned reports under 'breakdowns'
+        metrics: Metric names
+        start_date: Start of the window
+        end_date: End of the window
+        row_limit: Number of rows kept per report
+        directory: Directory for spilled chunks (removed afterwards)
+        memory_budget_mb: Megabytes of buffered rows before a spill
+        page_size: Rows per requested page
+        
+    Returns:
+        The window with truncated reports replaced by their largest rows
+        (still marked truncated in their metadata) and the roll-ups of every
+        streamed dimension added under 'breakdowns'
+    """
+    primary = '+'.join(window.get('dimension_headers', []))
+    breakdowns = dict(window.get('breakdowns') or {primary: window})
+    truncated = [
+        key for key, report in breakdowns.items()
+        if report.get('metadata', {}).get('total_row_count', 0) > report.get('row_count', 0)
+    ]
+    if not truncated:
+        return window
+
+    logger.warning(
+        f"{len(truncated)} GA4 breakdown reports truncated at {row_limit} rows; "
+        f"streaming all of their rows: {truncated}"
+    )
+    streamed = await asyncio.gather(*[
+        _fetch_spilled_window(
+            ga_connector,
+            metrics=metrics,
+            dimensions=breakdowns[key]['dimension_headers'],
+            start_date=start_date,
+            end_date=end_date,
+            row_limit=row_limit,
+            directory=directory,
+            memory_budget_mb=memory_budget_mb,
+            page_size=page_size
+        )
+        for key in truncated
+    ])
+    for key, result in zip(truncated, streamed):
+        for name, report in result['breakdowns'].items():
+            breakdowns.setdefault(name, report)
+        breakdowns[key] = {name: value for name, value in result.items() if name != 'breakdowns'}
+
+    if primary in truncated:
+        window = {
+            **breakdowns[primary],
+            'metadata': {**window.get('metadata', {}), **breakdowns[primary]['metadata']}
+        }
+    return {**window, 'breakdowns': breakdowns}
+
 async def fetch_ga_data(state: ReportState, config: Dict) -> ReportState:
     """
     Fetch data from Google Analytics 4 using the GoogleAnalyticsConnector.
@@ -28,119 +380,324 @@ async def fetch_ga_data(state: ReportState, config: Dict) -> ReportState:
             yaml_config = yaml.safe_load(f)
             ga_config = yaml_config.get("ga_config", {})
         
-        # Initialize GA connector with configuration
-        ga_connector = GoogleAnalyticsConnector({
+        # Set up the on-disk response cache
+        cache = None
+        cache_config = ga_config.get("cache", {})
+        if cache_config.get("enabled", False):
+            cache_path = os.path.join(
+                os.path.dirname(os.path.dirname(config_path)),
+                cache_config.get("path", ".cache/ga_responses.sqlite")
+            )
+            cache = _shared_resource('cache', cache_path, lambda: GAResponseCache(
+                path=cache_path,
+                ttl_seconds=cache_config.get("ttl_seconds", 900),
+                settle_days=cache_config.get("settle_days", 3),
+                max_size_mb=cache_config.get("max_size_mb", 256)
+            ))
+        
+        # Get the pooled GA connector, reusing credentials and gRPC channel
+        ga_connector = default_pool.get_connector({
             'property_id': state.get('property_id'),
             'credentials': {
                 'refresh_token': os.getenv('GA_REFRESH_TOKEN'),
                 'client_id': os.getenv('GA_CLIENT_ID'),
                 'client_secret': os.getenv('GA_CLIENT_SECRET')
-            }
-        })
+            },
+            'max_concurrent_requests': ga_config.get("max_concurrent_requests", 4)
+        }, cache=cache)
         
         # Validate credentials
-        if not await ga_connector.validate_credentials():
+        if not await default_pool.validate(ga_connector):
             raise ValueError("Failed to validate GA4 credentials")
         
-        # Calculate date ranges for weekly and monthly comparisons
-        end_date = datetime.now()
-        # Weekly ranges
-        start_date = end_date - timedelta(days=7)  # Last 7 days
-        prev_week_start = start_date - timedelta(days=7)  # Previous week
-        
-        # Monthly ranges
-        current_month_start = end_date.replace(day=1)
-        last_month_end = current_month_start - timedelta(days=1)
-        last_month_start = last_month_end.replace(day=1)
-        
-        # Fetch current week data
-        current_data = await ga_connector.fetch_data(
-            metrics=ga_config.get("metrics", []),
-            dimensions=ga_config.get("dimensions", []),
-            start_date=start_date,
-            end_date=end_date,
-            row_limit=ga_config.get("row_limit", 10000)
+        # Validate configured metrics and dimensions against the cached
+        # property metadata before spending any report quota
+        metadata_config = ga_config.get("metadata", {})
+        metadata_directory = os.path.join(
+            os.path.dirname(os.path.dirname(config_path)),
+            metadata_config.get("directory", ".cache/metadata")
+        )
+        catalog = _shared_resource('metadata', metadata_directory, lambda: GAMetadataCatalog(
+            directory=metadata_directory,
+            refresh_seconds=metadata_config.get("refresh_hours", 24) * 3600
+        ))
+        metadata = await catalog.load(ga_connector)
+        ga_connector.use_metadata(metadata)
+        metadata.validate(
+            ga_config.get("metrics", []),
+            ga_config.get("dimensions", [])
+        )
+        compatibility = await catalog.check_compatibility(
+            ga_connector,
+            ga_config.get("metrics", []),
+            ga_config.get("dimensions", [])
         )
+        if compatibility['incompatible_metrics'] or compatibility['incompatible_dimensions']:
+            raise ValueError(f"Incompatible GA4 metrics and dimensions: {compatibility}")
         
-        # Fetch previous week data
-        previous_week_data = await ga_connector.fetch_data(
-            metrics=ga_config.get("metrics", []),
-            dimensions=ga_config.get("dimensions", []),
-            start_date=prev_week_start,
-            end_date=start_date,
-            row_limit=ga_config.get("row_limit", 10000)
+        # Comparisons end on the last complete day, so a partial today never
+        # skews day-over-day or week-over-week changes
+        end_date = datetime.combine(date.today() - timedelta(days=1), datetime.min.time())
+        # Weekly and monthly comparisons are always computed, as the analysis
+        # and the fetched windows are built around them
+        weekly_ranges = comparison_ranges(end_date.date(), ['weekly', 'monthly'])
+        growth_ranges = {
+            **weekly_ranges,
+            **comparison_ranges(end_date.date(), ga_config.get("growth", {}).get("comparisons"))
+        }
+        start_date = datetime.combine(weekly_ranges['weekly']['current'][0], datetime.min.time())
+        
+        metrics = ga_config.get("metrics", [])
+        dimensions = ga_config.get("dimensions", [])
+        row_limit = ga_config.get("row_limit", 10000)
+        # The four windows line up with the weekly and monthly comparisons, so
+        # their exact GA totals can be used for those comparisons
+        date_ranges = {
+            window: tuple(datetime.combine(day, datetime.min.time()) for day in weekly_ranges[comparison][period])
+            for window, (comparison, period) in {
+                'current_week': ('weekly', 'current'),
+                'previous_week': ('weekly', 'previous'),
+                'current_month': ('monthly', 'current'),
+                'previous_month': ('monthly', 'previous')
+            }.items()
+        }
+        
+        # Dimension values of every report of this run go through one
+        # vocabulary per dimension: rows share one string per distinct value
+        # and the aggregates and the cube work on the same integer codes
+        vocabularies: Dict[str, Vocabulary] = {}
+        
+        # Every comparison is computed from one daily index covering the
+        # longest span
+        growth_config = ga_config.get("growth", {})
+        daily_start = span_start(growth_ranges)
+        index_specs = _daily_index_specs(
+            metrics,
+            start=daily_start,
+            end=end_date.date(),
+            dimensions=growth_config.get("dimensions", []),
+            dimension_days=growth_config.get("dimension_days", 90),
+            row_limit=row_limit
         )
         
-        # Fetch current month data
-        current_month_data = await ga_connector.fetch_data(
-            metrics=ga_config.get("metrics", []),
-            dimensions=ga_config.get("dimensions", []),
-            start_date=current_month_start,
-            end_date=end_date,
-            row_limit=ga_config.get("row_limit", 10000)
+        # Top, bottom and moving values of every dimension, ranked once for
+        # all sections
+        aggregates_config = ga_config.get("aggregates", {})
+        aggregate_specs = _aggregate_index_specs(
+            metrics,
+            dimensions=dimensions,
+            current=date_ranges['current_week'],
+            previous=date_ranges['previous_week'],
+            row_limit=row_limit
         )
         
-        # Fetch previous month data
-        previous_month_data = await ga_connector.fetch_data(
-            metrics=ga_config.get("metrics", []),
-            dimensions=ga_config.get("dimensions", []),
-            start_date=last_month_start,
-            end_date=last_month_end,
-            row_limit=ga_config.get("row_limit", 10000)
+        # Growth comparisons only read totals, so every window gets a
+        # dimensionless totals-only report (one report for all four), and the
+        # full breakdown is fetched only for the window the writers consume
+        totals_spec = {
+            'metrics': metrics,
+            'dimensions': [],
+            'date_ranges': date_ranges,
+            'row_limit': 1
+        }
+        
+        # The index, aggregate and totals reports are independent, so they
+        # share batch requests of up to five reports each
+        reports_request = ga_connector.batch_fetch(index_specs + aggregate_specs + [totals_spec])
+        
+        warehouse_config = ga_config.get("warehouse", {})
+        if warehouse_config.get("enabled", False):
+            # Fetch only missing or unsettled days, then build the window locally
+            warehouse_directory = os.path.join(
+                os.path.dirname(os.path.dirname(config_path)),
+                warehouse_config.get("directory", ".cache/warehouse")
+            )
+            warehouse = _shared_resource('warehouse', warehouse_directory, lambda: GAWarehouse(
+                directory=warehouse_directory,
+                settle_days=warehouse_config.get("settle_days", 3)
+            ))
+            # Backfilling days is bulk work, so it yields to other properties'
+            # requests when quota is tight
+            with QuotaScheduler.priority('low'):
+                sync_request = asyncio.ensure_future(warehouse.sync(
+                    ga_connector,
+                    metrics=metrics,
+                    dimensions=dimensions,
+                    start_date=start_date,
+                    end_date=end_date,
+                    page_size=row_limit
+                ))
+            with vocabulary_scope(vocabularies):
+                reports, fetched_days = await asyncio.gather(reports_request, sync_request)
+            logger.info(f"Fetched {fetched_days} days into the GA4 warehouse")
+            current_data = warehouse.window(
+                state.get('property_id'), metrics, dimensions, start_date, end_date
+            )
+        else:
+            query_plan_config = ga_config.get("query_plan", {})
+            spill_config = ga_config.get("spill", {})
+            if spill_config.get("enabled", False):
+                # Stream the whole breakdown instead of truncating it; memory
+                # stays within the budget however many rows GA returns
+                breakdown_request = _fetch_spilled_window(
+                    ga_connector,
+                    metrics=metrics,
+                    dimensions=dimensions,
+                    start_date=start_date,
+                    end_date=end_date,
+                    row_limit=row_limit,
+                    directory=os.path.join(
+                        os.path.dirname(os.path.dirname(config_path)),
+                        spill_config.get("directory", ".cache/spill")
+                    ),
+                    memory_budget_mb=spill_config.get("memory_budget_mb", 256),
+                    page_size=spill_config.get("page_size", 100000)
+                )
+            elif query_plan_config.get("enabled", False):
+                # Split the wide dimension set into narrower reports that fit
+                # the row limit instead of one truncated cross product
+                planner_directory = os.path.join(
+                    os.path.dirname(os.path.dirname(config_path)),
+                    query_plan_config.get("directory", ".cache/cardinality")
+                )
+                planner = _shared_resource('query_plan', planner_directory, lambda: QueryPlanner(
+                    directory=planner_directory,
+                    fill_ratio=query_plan_config.get("fill_ratio", 0.8),
+                    splits=query_plan_config.get("splits")
+                ))
+                breakdown_request = planner.fetch(
+                    ga_connector,
+                    metrics=metrics,
+                    dimensions=dimensions,
+                    start_date=start_date,
+                    end_date=end_date,
+                    row_limit=row_limit
+                )
+            else:
+                breakdown_request = ga_connector.fetch_data(
+                    metrics=metrics,
+                    dimensions=dimensions,
+                    start_date=start_date,
+                    end_date=end_date,
+                    row_limit=row_limit
+                )
+            with vocabulary_scope(vocabularies):
+                reports, current_data = await asyncio.gather(reports_request, breakdown_request)
+                if not spill_config.get("enabled", False):
+                    # Reports GA still truncated are streamed in full, within
+                    # the spill settings, rather than silently cut off
+                    current_data = await _stream_truncated_reports(
+                        ga_connector,
+                        current_data,
+                        metrics=metrics,
+                        start_date=start_date,
+                        end_date=end_date,
+                        row_limit=row_limit,
+                        directory=os.path.join(
+                            os.path.dirname(os.path.dirname(config_path)),
+                            spill_config.get("directory", ".cache/spill")
+                        ),
+                        memory_budget_mb=spill_config.get("memory_budget_mb", 256),
+                        page_size=spill_config.get("page_size", 100000)
+                    )
+        
+        daily_index = _build_daily_index(
+            index_specs, reports[:len(index_specs)], daily_start, end_date.date()
+        )
+        aggregates = _build_aggregate_index(
+            aggregate_specs,
+            reports[len(index_specs):len(index_specs) + len(aggregate_specs)],
+            n=aggregates_config.get("n", 5),
+            min_sessions=aggregates_config.get("min_sessions", 30)
         )
+        windows = reports[-1]
+        
+        # Exact totals come from GA rather than from summed breakdown rows
+        current_data['totals'] = windows['current_week']['totals']
+        previous_week_data = windows['previous_week']
+        current_month_data = windows['current_month']
+        previous_month_data = windows['previous_month']
         
-        # Calculate weekly and monthly growth rates
+        # Compute every growth comparison in one pass over the daily index
+        exact_totals = {
+            tuple(day.date() for day in date_ranges[window]): windows[window].get('totals', {})
+            for window in date_ranges
+        }
+        growth_metrics = compute_growth(daily_index, growth_ranges, exact_totals)
+        # Only report the configured metrics, not the added weight metric
         growth_metrics = {
-            'weekly': {},
-            'monthly': {}
+            comparison: {metric: values for metric, values in by_metric.items() if metric in metrics}
+            for comparison, by_metric in growth_metrics.items()
         }
         
-        for metric in current_data.get('metric_headers', []):
-            metric_name = metric.get('name')
-            
-            # Weekly comparisons
-            current_week_value = float(current_data.get('totals', {}).get(metric_name, 0))
-            prev_week_value = float(previous_week_data.get('totals', {}).get(metric_name, 0))
-            
-            if prev_week_value > 0:
-                weekly_growth = ((current_week_value - prev_week_value) / prev_week_value) * 100
-                growth_metrics['weekly'][metric_name] = {
-                    'current': current_week_value,
-                    'previous': prev_week_value,
-                    'growth_rate': round(weekly_growth, 2)
-                }
-            
-            # Monthly comparisons
-            current_month_value = float(current_month_data.get('totals', {}).get(metric_name, 0))
-            prev_month_value = float(previous_month_data.get('totals', {}).get(metric_name, 0))
-            
-            if prev_month_value > 0:
-                monthly_growth = ((current_month_value - prev_month_value) / prev_month_value) * 100
-                growth_metrics['monthly'][metric_name] = {
-                    'current': current_month_value,
-                    'previous': prev_month_value,
-                    'growth_rate': round(monthly_growth, 2)
-                }
+        # Index the current week breakdown once for every downstream query,
+        # while GA ranks the dimension pairs the cube cannot rank exactly
+        combinations_config = ga_config.get("combinations", {})
+        combination_specs = _combination_pivot_specs(
+            current_data,
+            dimensions,
+            metrics,
+            date_ranges['current_week'],
+            limit=combinations_config.get("limit", 5)
+        ) if combinations_config.get("enabled", True) else []
+        cube, combinations = await asyncio.gather(
+            asyncio.get_running_loop().run_in_executor(
+                None, GACube.from_window, current_data, vocabularies
+            ),
+            _fetch_combinations(ga_connector, combination_specs)
+        )
         
-        # Combine all data
+        # Combine all data; the current week breakdown is also exposed at the
+        # top level, where the planning and writing nodes read it
         ga_data = {
+            'dimension_headers': current_data.get('dimension_headers', []),
+            'metric_headers': current_data.get('metric_headers', []),
+            'rows': current_data.get('rows', []),
+            'row_count': current_data.get('row_count', 0),
+            'totals': current_data.get('totals', {}),
+            'metadata': current_data.get('metadata', {}),
+            'breakdowns': current_data.get('breakdowns', {}),
             'current_week': current_data,
             'previous_week': previous_week_data,
             'current_month': current_month_data,
             'previous_month': previous_month_data,
             'growth_metrics': growth_metrics,
+            'daily_index': daily_index,
+            'aggregates': aggregates,
+            'cube': cube,
+            'combinations': combinations,
             'time_ranges': {
-                'weekly': {
-                    'current': {'start': start_date.date(), 'end': end_date.date()},
-                    'previous': {'start': prev_week_start.date(), 'end': start_date.date()}
-                },
-                'monthly': {
-                    'current': {'start': current_month_start.date(), 'end': end_date.date()},
-                    'previous': {'start': last_month_start.date(), 'end': last_month_end.date()}
+                comparison: {
+                    period: {'start': start, 'end': end}
+                    for period, (start, end) in periods.items()
                 }
+                for comparison, periods in growth_ranges.items()
             }
         }
         
+        # Persist the windows for notebooks and later runs; a failed export
+        # never fails the fetch
+        export_config = ga_config.get("export", {})
+        if export_config.get("enabled", False):
+            try:
+                ga_data['exports'] = await asyncio.get_running_loop().run_in_executor(
+                    None,
+                    export_windows,
+                    ga_data,
+                    os.path.join(
+                        os.path.dirname(os.path.dirname(config_path)),
+                        export_config.get("directory", ".cache/exports")
+                    ),
+                    state.get('property_id'),
+                    export_config.get("format", "arrow")
+                )
+                logger.info(f"Exported GA4 windows: {ga_data['exports']}")
+            except Exception as e:
+                logger.warning(f"Could not export GA4 windows: {str(e)}")
+        
+        if cache:
+            logger.info(f"GA4 cache stats: {cache.stats()}")
+        
         logger.info(
             f"Successfully fetched GA data:\n"
             f"- Time Range: {start_date.date()} to {end_date.date()}\n"
@@ -3,6 +3,7 @@ from typing import Dict
 from langchain_openai import ChatOpenAI
 from src.models.report_models import ReportState, Section
 from src.prompts.planning_prompts import report_planner_instructions
+from src.utils.concurrency import llm_limit
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +27,9 @@ def generate_report_plan(state: ReportState, config: Dict) -> ReportState:
         
         # Extract key metrics and dimensions
         metric_headers = [h.get('name') for h in ga_data.get('metric_headers', [])]
-        dimension_headers = ga_data.get('dimension_headers', [])
+        # The cube also holds dimensions of planned reports other than the primary one
+        cube = ga_data.get('cube')
+        dimension_headers = cube.dimensions if cube else ga_data.get('dimension_headers', [])
         totals = ga_data.get('totals', {})
         
         # Get analysis and insights
@@ -66,7 +69,8 @@ For each section, provide:
         )
         
         # Generate plan
-        response = llm.invoke(planning_prompt)
+        with llm_limit.slot():
+            response = llm.invoke(planning_prompt)
         plan = response.content
         
         # Parse sections from plan
@@ -4,6 +4,7 @@ from langchain_openai import ChatOpenAI
 from src.models.report_models import Section, SectionState
 from src.prompts.writing_prompts import final_section_writer_instructions
 from src.utils.source_formatting import format_sections
+from src.utils.concurrency import llm_limit
 
 logger = logging.getLogger(__name__)
 
@@ -80,7 +81,8 @@ Write a comprehensive {"executive summary" if "summary" in section.name.lower()
             )
             
             # Generate content
-            response = llm.invoke(writing_prompt)
+            with llm_limit.slot():
+                response = llm.invoke(writing_prompt)
             section.content = response.content
             
             logger.info(f"Completed writing final section: {section.name}")
@@ -1,11 +1,29 @@
 import logging
 from typing import Dict, List
 from langchain_openai import ChatOpenAI
+from src.analytics.forecast import format_forecasts
+from src.analytics.significance import format_significance
 from src.models.report_models import Section, SectionState
 from src.prompts.writing_prompts import section_writer_instructions
+from src.utils.concurrency import llm_limit
 
 logger = logging.getLogger(__name__)
 
+# Growth comparisons shown to the writer, with their labels
+GROWTH_LABELS = {
+    'weekly': 'WoW',
+    'monthly': 'MoM',
+    'yearly': 'YoY',
+}
+
+# Unique-user metrics without exact GA totals (e.g. YoY) are sums of daily
+# values, which count a user once per day they were active
+APPROXIMATE_NOTE = " [approximate: sum of daily unique users, overstates users active on several days]"
+
+# Dimension pairs, and combinations per pair, shown to the writer
+MAX_COMBINATION_PAIRS = 3
+COMBINATIONS_PER_PAIR = 5
+
 def write_section(state: Dict, config: Dict) -> Dict:
     """
     Write content for a section using GA4 data analysis
@@ -39,40 +57,111 @@ def write_section(state: Dict, config: Dict) -> Dict:
         for section in research_sections:
             # Extract metrics, dimensions, and growth data
             metric_headers = [h.get('name') for h in ga_data.get('metric_headers', [])]
-            dimension_headers = ga_data.get('dimension_headers', [])
             totals = ga_data.get('totals', {})
             growth_metrics = ga_data.get('growth_metrics', {})
+            aggregates = ga_data.get('aggregates')
+            cube = ga_data.get('cube')
+            significance = state.get("significance") or []
             
-            # Get relevant rows and prepare growth insights
-            section_lower = section.name.lower()
-            rows = ga_data.get('rows', [])[:10]
+            # Tested changes by comparison and series; untested ones keep the
+            # plain growth threshold
+            tested = {
+                (result['comparison'], result['metric'], result['dimension'], result['value']): result
+                for result in significance
+            }
+            
+            # Fields the section names; a section naming none covers all of them
+            if cube:
+                key_metrics, key_dimensions = cube.match(f"{section.name}\n{section.description}")
+                key_metrics = key_metrics or metric_headers
+                key_dimensions = key_dimensions or [d for d in cube.dimensions if d != 'date']
+            else:
+                key_metrics = metric_headers
+                key_dimensions = [d for d in ga_data.get('dimension_headers', []) if d != 'date']
             
             # Format growth metrics with clear comparisons
             growth_insights = []
-            for metric in metric_headers:
-                if metric in growth_metrics:
-                    growth_data = growth_metrics[metric]
+            for comparison, label in GROWTH_LABELS.items():
+                for metric in metric_headers:
+                    growth_data = growth_metrics.get(comparison, {}).get(metric)
+                    if not growth_data or growth_data.get('status') == 'no_data':
+                        continue
+                    test = tested.get((comparison, metric, None, None))
+                    if test and not test['significant']:
+                        continue  # Within the day-to-day noise
                     current_val = growth_data['current']
                     growth_rate = growth_data['growth_rate']
                     
                     # Format metric name for display
                     metric_display = metric.replace('total', '').replace('average', 'avg')
                     
-                    # Create growth insight with MoM comparison
-                    if abs(growth_rate) > 1:  # Only show significant changes
+                    if growth_rate is None:
+                        # Nothing in the previous period, so there is no rate
+                        insight = f"{metric_display}: {current_val:.1f} (up from 0 {label})"
+                        if growth_data.get('approximate'):
+                            insight += APPROXIMATE_NOTE
+                        growth_insights.append(insight)
+                    elif abs(growth_rate) > 1:  # Only show significant changes
                         direction = "increase" if growth_rate > 0 else "decrease"
-                        insight = f"{metric_display}: {current_val:.1f} ({abs(growth_rate):.1f}% {direction} MoM)"
+                        insight = f"{metric_display}: {current_val:.1f} ({abs(growth_rate):.1f}% {direction} {label})"
+                        if test:
+                            insight += f" [significant, p = {test['p_value']:.2g}]"
+                        if growth_data.get('approximate'):
+                            insight += APPROXIMATE_NOTE
                         growth_insights.append(insight)
             
             # Prepare section-specific metrics with growth data
             section_metrics = {
                 'totals': totals,
-                'relevant_rows': rows,
-                'key_metrics': [m for m in metric_headers if _is_relevant_metric(m, section_lower)],
-                'key_dimensions': [d for d in dimension_headers if _is_relevant_dimension(d, section_lower)],
+                'key_metrics': key_metrics,
+                'key_dimensions': key_dimensions,
                 'growth_insights': growth_insights
             }
             
+            # Ranked values of the section's dimensions, precomputed once per
+            # run; movers tested as noise week over week are left out
+            section_metrics['relevant_slices'] = aggregates.format(
+                key_dimensions, key_metrics, {
+                    (result['dimension'], result['metric'], result['value'])
+                    for result in significance
+                    if result['comparison'] == 'weekly' and result['dimension'] and not result['significant']
+                }
+            ) if aggregates else "No dimension breakdowns available."
+            
+            # Significant changes of the section's metrics and dimension values
+            section_metrics['significant_changes'] = format_significance(
+                significance, key_metrics, key_dimensions
+            )
+            
+            # Leading combinations of the section's dimension pairs: GA's pivot
+            # ranking for pairs no complete fetched report holds, otherwise the
+            # cube's precomputed roll-ups, which cost no request
+            ranked_pairs = ga_data.get('combinations') or {}
+            combinations = []
+            if cube:
+                pairs = [(a, b) for i, a in enumerate(key_dimensions) for b in key_dimensions[i + 1:]]
+                for pair in pairs[:MAX_COMBINATION_PAIRS]:
+                    ranked = ranked_pairs.get('+'.join(pair), ranked_pairs.get('+'.join(pair[::-1])))
+                    if ranked is not None:
+                        groups = ranked[:COMBINATIONS_PER_PAIR]
+                    else:
+                        try:
+                            groups = cube.group_by(pair, key_metrics, limit=COMBINATIONS_PER_PAIR)
+                        except KeyError:
+                            continue  # No fetched report holds both dimensions
+                    combinations.append(f"{pair[0]} x {pair[1]}: " + "; ".join(
+                        f"{group[pair[0]]} / {group[pair[1]]} ("
+                        + ", ".join(f"{metric} {group[metric]:.4g}" for metric in key_metrics if metric in group)
+                        + ")"
+                        for group in groups
+                    ))
+            section_metrics['combinations'] = "\n".join(combinations) or "No combinations available."
+            
+            # Forecast residuals of the section's metrics, most surprising first
+            section_metrics['forecasts'] = format_forecasts(
+                state.get("forecasts") or [], key_metrics, key_dimensions
+            )
+            
             # Prepare writing prompt with growth focus
             writing_prompt = f"""Write a detailed {section.name} section for the GA4 analytics report.
 
@@ -93,8 +182,17 @@ Total Values: {section_metrics['totals']}
 Key Metrics to Focus On: {section_metrics['key_metrics']}
 Key Dimensions to Consider: {section_metrics['key_dimensions']}
 
-Sample Data Points:
-{section_metrics['relevant_rows']}
+Top, Bottom and Biggest Movers by Dimension (current vs previous week):
+{section_metrics['relevant_slices']}
+
+Leading Dimension Combinations (current week):
+{section_metrics['combinations']}
+
+Statistically Significant Changes (daily averages, with confidence intervals):
+{section_metrics['significant_changes']}
+
+Expected vs Actual (most recent days against a seasonal forecast):
+{section_metrics['forecasts']}
 
 Write a concise and worldclass analysis that:
 1. Addresses the section requirements
@@ -110,7 +208,8 @@ Write a concise and worldclass analysis that:
             )
             
             # Generate content
-            response = llm.invoke(writing_prompt)
+            with llm_limit.slot():
+                response = llm.invoke(writing_prompt)
             section.content = response.content
             
             print(f"Section content: {vars(section)}")
@@ -123,39 +222,3 @@ Write a concise and worldclass analysis that:
     except Exception as e:
         logger.error(f"Error writing section: {str(e)}", exc_info=True)
         raise
-
-def _is_relevant_metric(metric: str, section_type: str) -> bool:
-    """Helper function to determine if a metric is relevant for a section"""
-    metric = metric.lower()
-    
-    if "executive" in section_type or "overview" in section_type:
-        return True  # All metrics relevant for executive summary
-        
-    if "performance" in section_type:
-        return any(x in metric for x in ["users", "sessions", "views", "rate"])
-        
-    if "behavior" in section_type:
-        return any(x in metric for x in ["session", "engagement", "duration", "views"])
-        
-    if "recommendation" in section_type:
-        return True  # All metrics potentially relevant for recommendations
-        
-    return False
-
-def _is_relevant_dimension(dimension: str, section_type: str) -> bool:
-    """Helper function to determine if a dimension is relevant for a section"""
-    dimension = dimension.lower()
-    
-    if "executive" in section_type or "overview" in section_type:
-        return True  # All dimensions relevant for executive summary
-        
-    if "performance" in section_type:
-        return any(x in dimension for x in ["source", "medium", "campaign", "channel"])
-        
-    if "behavior" in section_type:
-        return any(x in dimension for x in ["page", "device", "country"])
-        
-    if "recommendation" in section_type:
-        return True  # All dimensions potentially relevant for recommendations
-        
-    return False
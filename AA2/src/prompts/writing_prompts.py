@@ -4,7 +4,7 @@ Your task is to analyze the provided GA4 metrics and dimensions to create insigh
 1. Provides clear growth metrics with previous period comparisons (e.g., "8 users per day, representing 15% growth from previous period")
 2. Shows month-over-month trends with confidence levels (e.g., "traffic growth of 12% MoM, consistent with 3-month trend")
 3. Compares key metrics to industry averages in simple terms (e.g., "engagement rate of 1.0 (40% above industry average)")
-4. Highlights statistically significant changes
+4. Highlights statistically significant changes (only the tested changes provided as significant, with their confidence intervals)
 5. Draws actionable insights from the data
 
 Guidelines:
@@ -12,7 +12,7 @@ Guidelines:
 - Support each metric with previous period comparison
 - Include month-over-month (MoM) changes where relevant
 - Add simple industry benchmark comparisons
-- Focus on statistically significant changes
+- Focus on statistically significant changes; do not present differences tested as insignificant as real changes
 - Present actionable insights based on the data
 - Keep technical details clear but not overwhelming
 - Use consistent comparison formats throughout
@@ -0,0 +1,88 @@
+import contextvars
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+class ConcurrencyLimit:
+    """Process-wide cap on concurrent blocking calls, resizable at runtime."""
+
+    def __init__(self, limit: int, name: str = 'calls'):
+        """
+        Initialize the limit.
+
+        Args:
+            limit: Maximum number of calls in flight at once
+            name: Label used in log messages
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.name = name
+        self.limit = limit
+        self.in_flight = 0
+        self.peak = 0
+        self._condition = threading.Condition()
+        # Limit standing in for this one within a replaced() block
+        self._replacement: contextvars.ContextVar[Optional['ConcurrencyLimit']] = (
+            contextvars.ContextVar(f'{name}_replacement', default=None)
+        )
+
+    def set_limit(self, limit: int) -> None:
+        """
+        Change the limit; waiting callers are admitted as soon as it allows.
+
+        Args:
+            limit: New maximum number of calls in flight
+        """
+        if limit < 1:
+            raise ValueError(f"Concurrency limit for {self.name} must be at least 1")
+        with self._condition:
+            self.limit = limit
+            self._condition.notify_all()
+
+    @contextmanager
+    def replaced(self, limit: 'ConcurrencyLimit') -> Iterator[None]:
+        """
+        Take slots from another limit inside the block instead of this one.
+
+        The replacement follows tasks and graph nodes started inside the
+        block, so a caller can apply its own limit to code written against
+        the shared one without resizing it for everybody else.
+
+        Args:
+            limit: Limit used in place of this one
+        """
+        token = self._replacement.set(limit)
+        try:
+            yield
+        finally:
+            self._replacement.reset(token)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        Hold one slot for the duration of the block.
+
+        Graph nodes run in executor threads, so this blocks the calling
+        thread (not the event loop) until a slot is free.
+        """
+        replacement = self._replacement.get()
+        if replacement is not None and replacement is not self:
+            with replacement.slot():
+                yield
+            return
+
+        with self._condition:
+            if self.in_flight >= self.limit:
+                self.logger.debug(f"Waiting for a free slot for {self.name}")
+            self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+                self._condition.notify()
+
+# Shared by every LLM call in this process
+llm_limit = ConcurrencyLimit(8, name='LLM calls')
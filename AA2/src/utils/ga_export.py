@@ -0,0 +1,295 @@
+import contextlib
+import json
+import logging
+import os
+import tempfile
+from array import array
+from collections.abc import Sequence
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
+from src.connectors.columnar import ColumnarResult, resolve_converter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# Windows of the fetch stage's ga_data that are persisted
+EXPORTED_WINDOWS = ('current_week', 'previous_week', 'current_month', 'previous_month')
+
+# Schema metadata key holding headers, totals and window metadata
+METADATA_KEY = b'ga_window'
+
+FORMATS = {'arrow': '.arrow', 'parquet': '.parquet'}
+
+def export_window(window: Dict[str, Any], path: str, format: str = 'arrow') -> str:
+    """
+    Write one fetched window to an Arrow IPC or Parquet file.
+
+    Dimensions are stored dictionary-encoded and metrics with their GA4 type,
+    so a reload needs no parsing. Arrow IPC files are written uncompressed so
+    that load_window can memory-map them without copying.
+
+    Args:
+        window: Window in the format of GoogleAnalyticsConnector.fetch_data
+            (dict rows or a 'columns' ColumnarResult)
+        path: Destination file
+        format: 'arrow' or 'parquet'
+
+    Returns:
+        Path of the written file
+    """
+    _require_pyarrow()
+    if format not in FORMATS:
+        raise ValueError(f"Unsupported export format {format}, expected one of {list(FORMATS)}")
+
+    table = _window_table(window)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    # Write next to the destination and swap in, so readers never see a
+    # partial file; the temporary file is private to this write, as runs of
+    # the same property may export at the same time
+    descriptor, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or '.', prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    os.close(descriptor)
+    try:
+        if format == 'arrow':
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        else:
+            pq.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+    return path
+
+def export_windows(
+    ga_data: Dict[str, Any],
+    directory: str,
+    property_id: str,
+    format: str = 'arrow',
+    run_date: Optional[date] = None
+) -> Dict[str, str]:
+    """
+    Persist every window of the fetch stage's ga_data.
+
+    Files are laid out as {directory}/{property_id}/{run_date}/{window}.{ext}.
+    Planned reports of a window (its 'breakdowns', see QueryPlanner.fetch)
+    other than the window itself go to {window}.{dimensions}.{ext}, with
+    the dimensions joined by '+'.
+
+    Args:
+        ga_data: Output of the fetch_ga_data node
+        directory: Export root directory
+        property_id: GA4 property ID
+        format: 'arrow' or 'parquet'
+        run_date: Date of the run (defaults to today)
+
+    Returns:
+        Dictionary mapping window name (or window.dimensions for planned
+        reports) to written file
+    """
+    run_directory = os.path.join(
+        directory, str(property_id), (run_date or date.today()).isoformat()
+    )
+    exports = {}
+    for name in EXPORTED_WINDOWS:
+        window = ga_data.get(name)
+        if not window:
+            continue
+        exports[name] = export_window(
+            window, os.path.join(run_directory, f"{name}{FORMATS[format]}"), format
+        )
+        primary = '+'.join(window.get('dimension_headers', []))
+        for key, report in (window.get('breakdowns') or {}).items():
+            if key == primary:
+                continue  # The window file holds these rows already
+            exports[f"{name}.{key}"] = export_window(
+                report, os.path.join(run_directory, f"{name}.{key}{FORMATS[format]}"), format
+            )
+    return exports
+
+def load_table(path: str) -> 'pa.Table':
+    """
+    Load an exported window as an Arrow table.
+
+    Arrow IPC files are memory-mapped, so the table references the file's
+    pages directly and loading costs the same regardless of its size.
+
+    Args:
+        path: Exported .arrow or .parquet file
+
+    Returns:
+        Arrow table
+    """
+    _require_pyarrow()
+    if path.endswith(FORMATS['parquet']):
+        return pq.read_table(path, memory_map=True)
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+def load_window(path: str) -> Dict[str, Any]:
+    """
+    Load an exported window in the format of GoogleAnalyticsConnector.fetch_data.
+
+    Args:
+        path: Exported .arrow or .parquet file
+
+    Returns:
+        Window dict whose 'rows' is a lazy view over the memory-mapped table;
+        the table itself is available under 'table' (e.g. for to_pandas())
+    """
+    table = load_table(path)
+    window = json.loads(table.schema.metadata[METADATA_KEY])
+    window['table'] = table
+    window['rows'] = TableRowView(table)
+    window['row_count'] = table.num_rows
+    return window
+
+def load_windows(
+    directory: str,
+    property_id: str,
+    run_date: Optional[date] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Load all windows exported for a property, by default from its latest run.
+
+    Args:
+        directory: Export root directory
+        property_id: GA4 property ID
+        run_date: Date of the run to load (defaults to the most recent)
+
+    Returns:
+        Dictionary mapping window name to window (see load_window), with
+        exported planned reports under the window's 'breakdowns' keyed by
+        their dimensions joined with '+' (the window itself included); empty
+        if nothing was exported
+    """
+    property_directory = os.path.join(directory, str(property_id))
+    if run_date is None:
+        runs = sorted(os.listdir(property_directory)) if os.path.isdir(property_directory) else []
+        if not runs:
+            return {}
+        run_directory = os.path.join(property_directory, runs[-1])
+    else:
+        run_directory = os.path.join(property_directory, run_date.isoformat())
+
+    windows = {}
+    breakdowns: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for filename in sorted(os.listdir(run_directory)):
+        name, extension = os.path.splitext(filename)
+        window_name, _, key = name.partition('.')
+        if window_name not in EXPORTED_WINDOWS or extension not in FORMATS.values():
+            continue
+        window = load_window(os.path.join(run_directory, filename))
+        if key:
+            breakdowns.setdefault(window_name, {})[key] = window
+        else:
+            windows[name] = window
+
+    for name, reports in breakdowns.items():
+        window = windows.get(name)
+        if window is None:
+            continue
+        window['breakdowns'] = {'+'.join(window.get('dimension_headers', [])): window, **reports}
+    return windows
+
+class TableRowView(Sequence):
+    """Lazy dict-of-rows adapter over an Arrow table."""
+
+    def __init__(self, table: 'pa.Table'):
+        self._table = table
+
+    def __len__(self) -> int:
+        return self._table.num_rows
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            start, stop, step = position.indices(len(self))
+            if step == 1:
+                return self._table.slice(start, max(stop - start, 0)).to_pylist()
+            return [self[i] for i in range(start, stop, step)]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("row index out of range")
+        return self._table.slice(position, 1).to_pylist()[0]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for batch in self._table.to_batches():
+            yield from batch.to_pylist()
+
+    def __repr__(self) -> str:
+        return f"TableRowView(row_count={len(self)})"
+
+def _window_table(window: Dict[str, Any]) -> 'pa.Table':
+    """Build a typed Arrow table with the window's headers in its schema metadata."""
+    dimension_headers: List[str] = list(window.get('dimension_headers', []))
+    metric_headers: List[Dict[str, str]] = list(window.get('metric_headers', []))
+    columns = window.get('columns')
+
+    arrays = {}
+    if isinstance(columns, ColumnarResult):
+        for name in dimension_headers:
+            column = columns.dimensions[name]
+            arrays[name] = pa.DictionaryArray.from_arrays(
+                pa.array(np.frombuffer(column.codes, dtype=np.uint32)),
+                pa.array(column.values, type=pa.string())
+            )
+        for header in metric_headers:
+            arrays[header['name']] = _metric_array(columns.metrics[header['name']], header['type'])
+    else:
+        rows = window.get('rows', [])
+        for name in dimension_headers:
+            arrays[name] = pa.array(
+                [row.get(name) for row in rows], type=pa.string()
+            ).dictionary_encode()
+        for header in metric_headers:
+            arrays[header['name']] = _metric_array(
+                [row.get(header['name']) for row in rows], header['type']
+            )
+
+    metadata = {
+        'dimension_headers': dimension_headers,
+        'metric_headers': metric_headers,
+        'totals': window.get('totals', {}),
+        'metadata': window.get('metadata', {})
+    }
+    schema_metadata = {METADATA_KEY: json.dumps(metadata, default=_json_default).encode()}
+
+    if not arrays:
+        return pa.table({}, schema=pa.schema([], metadata=schema_metadata))
+    table = pa.table(arrays)
+    return table.replace_schema_metadata(schema_metadata)
+
+def _metric_array(values: Any, metric_type: str) -> 'pa.Array':
+    """Convert a metric column to an Arrow array of its GA4 type."""
+    typecode, _ = resolve_converter(metric_type)
+    arrow_type = {'q': pa.int64(), 'd': pa.float64()}.get(typecode, pa.string())
+    if isinstance(values, array) and typecode is not None:
+        # Typed arrays expose their buffer, so no per-value conversion is needed
+        return pa.array(np.frombuffer(values, dtype=np.int64 if typecode == 'q' else np.float64))
+    try:
+        return pa.array(values, type=arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        logger.warning(f"Storing metric column of type {metric_type} as strings")
+        return pa.array([None if value is None else str(value) for value in values], type=pa.string())
+
+def _json_default(value: Any) -> str:
+    """Serialize dates in window metadata."""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _require_pyarrow() -> None:
+    """Fail with an actionable message when the optional dependency is missing."""
+    if pa is None:
+        raise ImportError("GA data export requires pyarrow; install it with `pip install pyarrow`")
@@ -0,0 +1,113 @@
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Unique-user counts: summing them across days or rows counts users repeatedly
+DISTINCT_USER_METRICS = {
+    'totalUsers',
+    'activeUsers',
+    'active1DayUsers',
+    'active7DayUsers',
+    'active28DayUsers',
+    'dauPerMau',
+    'dauPerWau',
+    'wauPerMau',
+}
+
+# Ratios and averages that do not follow the naming patterns below
+RATIO_METRICS = {
+    'bounceRate',
+    'engagementRate',
+    'sessionConversionRate',
+    'userConversionRate',
+}
+
+# Weight used when averaging ratio metrics across days or rows
+RATIO_WEIGHT_METRIC = 'sessions'
+
+def aggregation_kind(metric: str) -> str:
+    """
+    Determine how a GA4 metric combines across days or dimension rows.
+
+    Args:
+        metric: GA4 metric API name
+
+    Returns:
+        'sum' for additive counts, 'mean' for ratios and averages (combined as
+        a weighted mean) or 'distinct' for unique-user counts (summing them
+        gives user-days, an upper bound on the true value)
+    """
+    if metric in DISTINCT_USER_METRICS:
+        return 'distinct'
+    if (
+        metric in RATIO_METRICS
+        or metric.startswith('average')
+        or metric.endswith(('Rate', 'PerSession', 'PerUser'))
+    ):
+        return 'mean'
+    return 'sum'
+
+def aggregation_kinds(metrics: List[str]) -> Dict[str, str]:
+    """
+    Determine the aggregation kind of several metrics.
+
+    Args:
+        metrics: GA4 metric API names
+
+    Returns:
+        Dictionary mapping each metric to its aggregation kind
+    """
+    return {metric: aggregation_kind(metric) for metric in metrics}
+
+def combine_rows(
+    rows: Iterable[Dict[str, Any]],
+    group_by: List[str],
+    metrics: List[str]
+) -> List[Dict[str, Any]]:
+    """
+    Combine metric rows into one row per group using each metric's aggregation kind.
+
+    Sums and distinct counts are added up; ratio metrics are averaged, weighted
+    by sessions when the rows carry them.
+
+    Args:
+        rows: Row dicts keyed by dimension and metric name
+        group_by: Dimension names to group by (empty for a single total row)
+        metrics: Metric names to combine
+
+    Returns:
+        One row dict per group
+    """
+    kinds = [aggregation_kind(metric) for metric in metrics]
+    groups: Dict[Tuple[Any, ...], Tuple[List[Any], List[Any]]] = {}
+
+    for row in rows:
+        key = tuple(row.get(dim, '') for dim in group_by)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = ([0] * len(metrics), [0] * len(metrics))
+        sums, weights = group
+
+        weight = row.get(RATIO_WEIGHT_METRIC, 1)
+        if not isinstance(weight, (int, float)):
+            weight = 1
+
+        for i, metric in enumerate(metrics):
+            value = row.get(metric, 0)
+            if not isinstance(value, (int, float)):
+                continue
+            if kinds[i] == 'mean':
+                sums[i] += value * weight
+                weights[i] += weight
+            else:
+                sums[i] += value
+
+    combined = []
+    for key, (sums, weights) in groups.items():
+        row = dict(zip(group_by, key))
+        for i, metric in enumerate(metrics):
+            if kinds[i] == 'mean':
+                row[metric] = sums[i] / weights[i] if weights[i] else 0.0
+            else:
+                row[metric] = sums[i]
+        combined.append(row)
+
+    return combined
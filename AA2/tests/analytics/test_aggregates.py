@@ -0,0 +1,70 @@
+from src.analytics.aggregates import AggregateIndex
+
+CURRENT = [
+    {'pagePath': '/', 'sessions': 500, 'bounceRate': 0.4},
+    {'pagePath': '/pricing', 'sessions': 300, 'bounceRate': 0.2},
+    {'pagePath': '/blog', 'sessions': 200, 'bounceRate': 0.6},
+    {'pagePath': '/docs', 'sessions': 100, 'bounceRate': 0.3},
+    {'pagePath': '/rare', 'sessions': 5, 'bounceRate': 1.0},
+]
+PREVIOUS = [
+    {'pagePath': '/', 'sessions': 450, 'bounceRate': 0.5},
+    {'pagePath': '/pricing', 'sessions': 100, 'bounceRate': 0.2},
+    {'pagePath': '/blog', 'sessions': 210, 'bounceRate': 0.6},
+    {'pagePath': '/retired', 'sessions': 400, 'bounceRate': 0.5},
+]
+
+
+def _index(n=2):
+    index = AggregateIndex(['sessions', 'bounceRate'], n=n, min_sessions=30)
+    index.add_dimension('pagePath', CURRENT, PREVIOUS)
+    return index
+
+
+def test_top_and_bottom_skip_low_volume_values():
+    sessions = _index().slices(['pagePath'], ['sessions'])['pagePath']['sessions']
+    assert [entry['value'] for entry in sessions['top']] == ['/', '/pricing']
+    assert [entry['value'] for entry in sessions['bottom']] == ['/docs', '/blog']
+
+    bounce = _index().slices(['pagePath'], ['bounceRate'])['pagePath']['bounceRate']
+    assert [entry['value'] for entry in bounce['top']] == ['/blog', '/']
+    assert '/rare' not in [entry['value'] for entry in bounce['bottom']]
+
+
+def test_bottom_does_not_repeat_top_values():
+    sessions = _index(n=3).slices(['pagePath'], ['sessions'])['pagePath']['sessions']
+    top = {entry['value'] for entry in sessions['top']}
+    bottom = {entry['value'] for entry in sessions['bottom']}
+    assert top == {'/', '/pricing', '/blog'}
+    assert bottom == {'/docs'}
+
+
+def test_movers_include_values_gone_from_the_current_period():
+    sessions = _index(n=3).slices(['pagePath'], ['sessions'])['pagePath']['sessions']
+    movers = sessions['movers']
+    assert [entry['value'] for entry in movers] == ['/retired', '/pricing', '/docs']
+    assert movers[0] == {
+        'value': '/retired', 'current': 0.0, 'previous': 400.0, 'delta': -400.0, 'growth_rate': -100.0
+    }
+    assert movers[1]['growth_rate'] == 200.0
+    assert movers[2]['growth_rate'] is None
+
+
+def test_ratio_movers_need_both_periods():
+    bounce = _index(n=5).slices(['pagePath'], ['bounceRate'])['pagePath']['bounceRate']
+    assert [entry['value'] for entry in bounce['movers']] == ['/']
+
+
+def test_format_leaves_out_insignificant_movers():
+    index = _index()
+    text = index.format(['pagePath'], ['sessions'])
+    assert "pagePath by sessions, top: / 500, /pricing 300" in text
+    assert "biggest movers: /retired 0 (-100.0%), /pricing 300 (+200.0%)" in text
+
+    text = index.format(['pagePath'], ['sessions'], insignificant={('pagePath', 'sessions', '/retired')})
+    assert "biggest movers: /pricing 300 (+200.0%)" in text
+
+    empty = AggregateIndex(['sessions'])
+    empty.add_dimension('country', [], [])
+    assert empty.format(['country'], ['sessions']) == "No dimension breakdowns available."
+    assert empty.dimensions == ['country']
@@ -0,0 +1,98 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from src.analytics.anomalies import changepoints, detect_anomalies, rolling_zscores, weekday_factors
+from src.analytics.window_index import WindowIndex
+
+END = date(2024, 6, 30)
+
+
+def test_weekday_factors():
+    weekdays = np.arange(28) % 7
+    values = np.where(weekdays >= 5, 50.0, 100.0)[None, :]
+    factors = weekday_factors(values, weekdays)
+    mean = values.mean()
+    assert np.allclose(factors[0], [100 / mean] * 5 + [50 / mean] * 2)
+
+    # Series without activity keep neutral factors
+    assert np.allclose(weekday_factors(np.zeros((1, 28)), weekdays), 1.0)
+
+
+def test_rolling_zscores_match_trailing_window_statistics():
+    rng = np.random.default_rng(2)
+    values = rng.normal(100, 10, size=(2, 40))
+    scores, means, deviations = rolling_zscores(values, window=14)
+
+    assert np.isnan(scores[:, :14]).all()
+    for day in (14, 25, 39):
+        baseline = values[:, day - 14:day]
+        assert np.allclose(means[:, day], baseline.mean(axis=1))
+        assert np.allclose(deviations[:, day], baseline.std(axis=1))
+        assert np.allclose(scores[:, day], (values[:, day] - baseline.mean(axis=1)) / baseline.std(axis=1))
+
+
+def test_changepoints_find_the_shift():
+    values = np.concatenate([np.full(30, 10.0), np.full(20, 20.0)])[None, :]
+    values = values + np.tile([0.5, -0.5], 25)
+    day, statistic, before, after = changepoints(values)
+    assert day[0] == 30
+    assert np.isclose(before[0], 10.0, atol=0.1)
+    assert np.isclose(after[0], 20.0, atol=0.1)
+    assert statistic[0] > 10
+
+
+def test_recent_shift_is_not_hidden_by_an_older_one():
+    values = np.concatenate([np.full(20, 10.0), np.full(50, 30.0), np.full(20, 36.0)])[None, :]
+    values = values + np.tile([0.5, -0.5], 45)
+
+    assert changepoints(values)[0][0] == 20
+    day, _, before, after = changepoints(values, first_split=62, baseline=28)
+    assert day[0] == 70
+    assert np.isclose(before[0], 30.0, atol=0.1)
+    assert np.isclose(after[0], 36.0, atol=0.1)
+
+
+def test_changepoints_short_series():
+    day, statistic, _, _ = changepoints(np.ones((3, 10)))
+    assert list(day) == [-1, -1, -1]
+    assert not statistic.any()
+
+
+def _index(spike_day=None, shift_from=None, days=90):
+    start = END - timedelta(days=days - 1)
+    rng = np.random.default_rng(4)
+    rows = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        sessions = (1000 if day.weekday() < 5 else 600) + rng.normal(0, 15)
+        views = 3000 + rng.normal(0, 30)
+        if offset == spike_day:
+            sessions *= 3
+        if shift_from is not None and offset >= shift_from:
+            views *= 0.5
+        rows.append({'date': day.strftime('%Y%m%d'), 'sessions': sessions, 'screenPageViews': views})
+    return WindowIndex.from_rows(rows, ['sessions', 'screenPageViews'], start, END)
+
+
+def test_detect_anomalies_ranks_by_severity():
+    anomalies = detect_anomalies(_index(spike_day=87, shift_from=75))
+
+    spike = next(anomaly for anomaly in anomalies if anomaly['type'] == 'spike')
+    assert spike['metric'] == 'sessions'
+    assert spike['date'] == str(END - timedelta(days=2))
+    assert spike['change_pct'] > 150
+
+    shift = next(anomaly for anomaly in anomalies if anomaly['type'] == 'level_shift')
+    assert shift['metric'] == 'screenPageViews'
+    assert shift['date'] == str(END - timedelta(days=14))
+    assert np.isclose(shift['change_pct'], -50, atol=3)
+
+    severities = [anomaly['severity'] for anomaly in anomalies]
+    assert severities == sorted(severities, reverse=True)
+    assert all(anomaly['severity'] >= 1 for anomaly in anomalies)
+
+
+def test_steady_series_have_no_anomalies():
+    assert detect_anomalies(_index()) == []
+    assert detect_anomalies(_index(days=30)) == []
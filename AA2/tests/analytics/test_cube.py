@@ -0,0 +1,113 @@
+from itertools import product
+
+import numpy as np
+import pytest
+
+from src.analytics.cube import GACube
+
+METRICS = ['sessions', 'screenPageViews', 'bounceRate']
+
+
+def _window():
+    rng = np.random.default_rng(5)
+    rows = []
+    for channel, device, country in product(
+        ['Organic Search', 'Direct', 'Referral'], ['desktop', 'mobile'], ['US', 'DE', 'FR', 'JP']
+    ):
+        rows.append({
+            'sessionDefaultChannelGroup': channel,
+            'deviceCategory': device,
+            'country': country,
+            'sessions': int(rng.integers(1, 500)),
+            'screenPageViews': int(rng.integers(0, 2000)),
+            'bounceRate': float(rng.random())
+        })
+    return {
+        'dimension_headers': ['sessionDefaultChannelGroup', 'deviceCategory', 'country'],
+        'metric_headers': [{'name': metric} for metric in METRICS],
+        'rows': rows
+    }
+
+
+def _expected(rows, group):
+    """Naive per-group sums, with bounceRate weighted by sessions."""
+    totals = {}
+    for row in rows:
+        key = tuple(row[dimension] for dimension in group)
+        entry = totals.setdefault(key, {'sessions': 0.0, 'screenPageViews': 0.0, 'bounces': 0.0})
+        entry['sessions'] += row['sessions']
+        entry['screenPageViews'] += row['screenPageViews']
+        entry['bounces'] += row['bounceRate'] * row['sessions']
+    return {
+        key: {
+            'sessions': entry['sessions'],
+            'screenPageViews': entry['screenPageViews'],
+            'bounceRate': entry['bounces'] / entry['sessions']
+        }
+        for key, entry in totals.items()
+    }
+
+
+@pytest.mark.parametrize('group', [
+    ['deviceCategory'],
+    ['country'],
+    ['sessionDefaultChannelGroup', 'deviceCategory'],
+    ['country', 'sessionDefaultChannelGroup'],
+    ['sessionDefaultChannelGroup', 'deviceCategory', 'country'],
+])
+def test_rollups_equal_row_sums(group):
+    window = _window()
+    cube = GACube.from_window(window)
+    expected = _expected(window['rows'], group)
+
+    rows = cube.group_by(group)
+    assert len(rows) == len(expected)
+    for row in rows:
+        values = expected[tuple(row[dimension] for dimension in group)]
+        for metric in METRICS:
+            assert np.isclose(row[metric], values[metric])
+
+
+def test_total_and_dice_match_row_sums():
+    window = _window()
+    cube = GACube.from_window(window)
+
+    total = _expected(window['rows'], [])[()]
+    for metric in METRICS:
+        assert np.isclose(cube.total()[metric], total[metric])
+
+    mobile_us = [
+        row for row in window['rows'] if row['deviceCategory'] == 'mobile' and row['country'] in ('US', 'DE')
+    ]
+    diced = cube.dice({'deviceCategory': 'mobile', 'country': ['US', 'DE', 'unknown']})
+    assert np.isclose(diced.total()['sessions'], sum(row['sessions'] for row in mobile_us))
+    assert {row['country'] for row in diced.group_by(['country'])} == {'US', 'DE'}
+    # The view leaves the cube itself unfiltered
+    assert np.isclose(cube.total()['sessions'], total['sessions'])
+
+
+def test_group_by_orders_and_limits():
+    cube = GACube.from_window(_window())
+    rows = cube.group_by(['country'], ['sessions'], limit=2)
+    assert len(rows) == 2
+    assert rows[0]['sessions'] >= rows[1]['sessions']
+    assert set(rows[0]) == {'country', 'sessions'}
+
+    ascending = cube.group_by(['country'], order_by='screenPageViews', ascending=True)
+    views = [row['screenPageViews'] for row in ascending]
+    assert views == sorted(views)
+
+
+def test_unknown_dimensions_raise():
+    cube = GACube.from_window(_window())
+    with pytest.raises(KeyError):
+        cube.group_by(['city'])
+    with pytest.raises(KeyError):
+        cube.slice('city', 'Paris')
+
+
+def test_match_finds_fields_by_alias():
+    cube = GACube.from_window(_window())
+    metrics, dimensions = cube.match("Traffic by device and country")
+    assert metrics == ['sessions']
+    assert dimensions == ['deviceCategory', 'country']
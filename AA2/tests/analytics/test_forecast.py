@@ -0,0 +1,85 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from src.analytics.forecast import forecast_metrics, holt_winters, seasonal_naive
+from src.analytics.window_index import WindowIndex
+
+WEEKLY = np.array([100.0, 120.0, 130.0, 125.0, 110.0, 60.0, 50.0])
+
+
+def test_holt_winters_reproduces_a_seasonal_pattern():
+    values = np.tile(WEEKLY, 10)[None, :]
+    forecasts, residuals = holt_winters(values, np.zeros_like(values, dtype=bool), horizon=7)
+
+    assert forecasts.shape == (1, 7)
+    assert np.allclose(forecasts[0], WEEKLY, rtol=0.02)
+    assert np.isnan(residuals[0, :7]).all()
+    assert np.nanmax(np.abs(residuals[0, 7:])) < 1.0
+
+
+def test_holt_winters_ignores_missing_days():
+    values = np.tile(WEEKLY, 10)[None, :]
+    missing = np.zeros_like(values, dtype=bool)
+    values[0, 40] = 10_000.0
+    missing[0, 40] = True
+    forecasts, residuals = holt_winters(values, missing, horizon=7)
+
+    assert np.isnan(residuals[0, 40])
+    assert np.allclose(forecasts[0], WEEKLY, rtol=0.02)
+
+
+def test_seasonal_naive_averages_recent_weekdays():
+    values = np.vstack([np.tile(WEEKLY, 4), np.tile(WEEKLY, 4) * 2])
+    values[:, -7:] += 28.0
+    forecasts, residuals = seasonal_naive(values, np.zeros_like(values, dtype=bool), horizon=3)
+
+    assert np.allclose(forecasts[0], WEEKLY[:3] + 7.0)
+    assert np.allclose(forecasts[1], WEEKLY[:3] * 2 + 7.0)
+    assert np.isnan(residuals[:, :7]).all()
+    assert np.allclose(residuals[:, 7:21], 0.0)
+    assert np.allclose(residuals[:, 21:], 28.0)
+
+
+def _index(days=84, spike=1.0):
+    end = date(2024, 6, 30)
+    start = end - timedelta(days=days - 1)
+    rng = np.random.default_rng(11)
+    rows = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        sessions = WEEKLY[day.weekday()] * 10 + rng.normal(0, 5)
+        if offset >= days - 7:
+            sessions *= spike
+        rows.append({'date': day.strftime('%Y%m%d'), 'sessions': sessions, 'bounceRate': 0.4 + rng.normal(0, 0.01)})
+    return WindowIndex.from_rows(rows, ['sessions', 'bounceRate'], start, end)
+
+
+def test_forecast_metrics_flags_a_surge():
+    forecasts = forecast_metrics(_index(spike=2.0))
+
+    sessions = next(forecast for forecast in forecasts if forecast['metric'] == 'sessions')
+    assert sessions['status'] == 'above'
+    assert sessions['aggregate'] == 'sum'
+    assert sessions['residual_pct'] > 50
+    assert forecasts[0] is sessions
+    assert sessions['start'] == '2024-06-24' and sessions['end'] == '2024-06-30'
+
+    bounce = next(forecast for forecast in forecasts if forecast['metric'] == 'bounceRate')
+    assert bounce['aggregate'] == 'mean'
+    assert bounce['status'] == 'within'
+
+
+def test_forecast_metrics_without_change_stays_within_bounds():
+    for forecast in forecast_metrics(_index()):
+        assert forecast['status'] == 'within'
+        assert forecast['lower'] <= forecast['expected'] <= forecast['upper']
+
+
+def test_forecast_metrics_short_history():
+    assert forecast_metrics(_index(days=20)) == []
+    # Under four weeks of history falls back to the seasonal naive forecast
+    assert forecast_metrics(_index(days=30), method='holt_winters')
+    with pytest.raises(ValueError):
+        forecast_metrics(_index(), method='arima')
@@ -0,0 +1,86 @@
+from datetime import date, timedelta
+
+import pytest
+
+from src.analytics.growth import comparison_ranges, compute_growth, span_start
+from src.analytics.window_index import WindowIndex
+
+END = date(2024, 3, 31)
+
+
+def _index(first_day=date(2023, 1, 1), metrics=('sessions', 'totalUsers')):
+    """Index where every day has sessions equal to its day of month."""
+    rows = []
+    day = first_day
+    while day <= END:
+        rows.append({'date': day.strftime('%Y%m%d'), 'sessions': day.day, 'totalUsers': 1})
+        day += timedelta(days=1)
+    return WindowIndex.from_rows(rows, list(metrics), date(2023, 1, 1), END)
+
+
+def test_comparison_ranges():
+    ranges = comparison_ranges(END, ['daily', 'weekly', 'monthly', 'yearly'])
+    assert ranges['daily'] == {'current': (END, END), 'previous': (date(2024, 3, 30), date(2024, 3, 30))}
+    assert ranges['weekly']['current'] == (date(2024, 3, 25), END)
+    assert ranges['weekly']['previous'] == (date(2024, 3, 18), date(2024, 3, 24))
+    # February 2024 has 29 days; the previous month-to-date stops at its end
+    assert ranges['monthly']['previous'] == (date(2024, 2, 1), date(2024, 2, 29))
+    assert ranges['yearly']['previous'] == (date(2023, 1, 1), date(2023, 3, 31))
+    assert span_start(ranges) == date(2023, 1, 1)
+
+    with pytest.raises(ValueError):
+        comparison_ranges(END, ['fortnightly'])
+
+
+def test_leap_day_year_over_year():
+    ranges = comparison_ranges(date(2024, 2, 29), ['yearly'])
+    assert ranges['yearly']['previous'] == (date(2023, 1, 1), date(2023, 2, 28))
+
+
+def test_compute_growth_matches_hand_sums():
+    ranges = comparison_ranges(END, ['weekly', 'monthly'])
+    growth = compute_growth(_index(), ranges)
+
+    weekly = growth['weekly']['sessions']
+    assert weekly['current'] == sum(range(25, 32))
+    assert weekly['previous'] == sum(range(18, 25))
+    assert weekly['delta'] == 49
+    assert weekly['growth_rate'] == round(49 / sum(range(18, 25)) * 100, 2)
+    assert weekly['status'] == 'ok'
+    assert not weekly['approximate']
+
+    monthly = growth['monthly']['sessions']
+    assert monthly['current'] == sum(range(1, 32))
+    assert monthly['previous'] == sum(range(1, 30))
+
+
+def test_unique_users_are_approximate_unless_exact_totals_are_given():
+    ranges = comparison_ranges(END, ['weekly'])
+    assert compute_growth(_index(), ranges)['weekly']['totalUsers']['approximate']
+
+    exact = {ranges['weekly']['current']: {'totalUsers': 4}, ranges['weekly']['previous']: {'totalUsers': 2}}
+    users = compute_growth(_index(), ranges, exact_totals=exact)['weekly']['totalUsers']
+    assert not users['approximate']
+    assert users['current'] == 4
+    assert users['growth_rate'] == 100.0
+
+
+def test_periods_before_the_first_activity_have_no_data():
+    index = _index(first_day=date(2024, 3, 1))
+    growth = compute_growth(index, comparison_ranges(END, ['weekly', 'yearly']))
+    assert growth['weekly']['sessions']['status'] == 'ok'
+    assert growth['yearly']['sessions']['status'] == 'no_data'
+    assert growth['yearly']['sessions']['growth_rate'] is None
+
+
+def test_zero_baseline():
+    rows = [{'date': '20240331', 'sessions': 10}]
+    index = WindowIndex.from_rows(rows, ['sessions'], date(2024, 3, 1), END)
+    sessions = compute_growth(index, comparison_ranges(END, ['daily']))['daily']['sessions']
+    assert sessions['status'] == 'no_data'
+
+    rows.append({'date': '20240301', 'sessions': 1})
+    index = WindowIndex.from_rows(rows, ['sessions'], date(2024, 3, 1), END)
+    sessions = compute_growth(index, comparison_ranges(END, ['daily']))['daily']['sessions']
+    assert sessions['status'] == 'zero_baseline'
+    assert sessions['growth_rate'] is None
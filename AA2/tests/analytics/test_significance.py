@@ -0,0 +1,86 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from src.analytics.growth import comparison_ranges
+from src.analytics.significance import (
+    benjamini_hochberg,
+    compare_periods,
+    student_t_quantile,
+    student_t_sf,
+    welch_test,
+)
+from src.analytics.window_index import WindowIndex
+
+
+def test_benjamini_hochberg_matches_known_values():
+    p_values = np.array([0.01, 0.04, 0.03, 0.005])
+    assert np.allclose(benjamini_hochberg(p_values), [0.02, 0.04, 0.04, 0.02])
+
+    p_values = np.array([0.001, 0.008, 0.039, 0.041, 0.042, 0.06, 0.074, 0.205])
+    expected = [0.008, 0.032, 0.0672, 0.0672, 0.0672, 0.08, 0.0845714, 0.205]
+    assert np.allclose(benjamini_hochberg(p_values), expected)
+
+
+def test_benjamini_hochberg_keeps_the_order_of_p_values():
+    assert np.allclose(benjamini_hochberg(np.array([0.9, 0.8])), [0.9, 0.9])
+    assert np.allclose(benjamini_hochberg(np.array([0.3, 0.7, 0.6])), [0.7, 0.7, 0.7])
+    assert np.allclose(benjamini_hochberg(np.array([1.0])), [1.0])
+    assert len(benjamini_hochberg(np.array([]))) == 0
+
+
+def test_student_t_tail_and_quantile_match_tables():
+    # One degree of freedom is the Cauchy distribution
+    assert np.isclose(student_t_sf(np.array([1.0]), np.array([1.0]))[0], 0.25)
+    assert np.isclose(student_t_sf(np.array([2.228]), np.array([10.0]))[0], 0.025, atol=1e-4)
+    assert np.isclose(student_t_sf(np.array([0.0]), np.array([5.0]))[0], 0.5)
+    assert np.isclose(student_t_quantile(0.975, np.array([10.0]))[0], 2.228, rtol=1e-3)
+    assert np.isclose(student_t_quantile(0.975, np.array([1e6]))[0], 1.96, rtol=1e-3)
+
+
+def test_welch_test_matches_hand_computation():
+    current = np.array([20.0, 22.0, 19.0, 24.0, 25.0])
+    previous = np.array([15.0, 17.0, 16.0, 18.0, 14.0, 16.0])
+    result = welch_test(
+        np.array([current.mean()]), np.array([current.var(ddof=1)]), np.array([5.0]),
+        np.array([previous.mean()]), np.array([previous.var(ddof=1)]), np.array([6.0])
+    )
+
+    stderr = np.sqrt(current.var(ddof=1) / 5 + previous.var(ddof=1) / 6)
+    assert np.isclose(result['difference'][0], current.mean() - previous.mean())
+    assert np.isclose(result['t'][0], (current.mean() - previous.mean()) / stderr)
+    assert result['p_value'][0] < 0.01
+    assert result['lower'][0] < result['difference'][0] < result['upper'][0]
+
+
+def test_welch_test_constant_samples():
+    result = welch_test(
+        np.array([5.0, 5.0]), np.zeros(2), np.array([7.0, 7.0]),
+        np.array([5.0, 4.0]), np.zeros(2), np.array([7.0, 7.0])
+    )
+    assert list(result['p_value']) == [1.0, 0.0]
+
+
+def test_compare_periods_flags_only_the_real_change():
+    rng = np.random.default_rng(3)
+    end = date(2024, 6, 30)
+    start = end - timedelta(days=119)
+    rows = []
+    for offset in range(120):
+        day = start + timedelta(days=offset)
+        level = 1000 if offset < 113 else 1500
+        rows.append({
+            'date': day.strftime('%Y%m%d'),
+            'sessions': level + rng.normal(0, 20),
+            'screenPageViews': 3000 + rng.normal(0, 60)
+        })
+    index = WindowIndex.from_rows(rows, ['sessions', 'screenPageViews'], start, end)
+
+    results = compare_periods(index, comparison_ranges(end, ['weekly']))
+
+    by_metric = {result['metric']: result for result in results}
+    assert by_metric['sessions']['significant']
+    assert by_metric['sessions']['change_pct'] > 40
+    assert by_metric['sessions']['ci_lower_pct'] < by_metric['sessions']['change_pct'] < by_metric['sessions']['ci_upper_pct']
+    assert not by_metric['screenPageViews']['significant']
+    assert results[0]['p_value'] <= results[-1]['p_value']
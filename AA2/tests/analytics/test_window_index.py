@@ -0,0 +1,125 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from src.analytics.window_index import WindowIndex
+
+START = date(2024, 1, 1)
+DAYS = 60
+METRICS = ['sessions', 'screenPageViews', 'bounceRate']
+
+
+def _rows():
+    rng = np.random.default_rng(7)
+    rows = []
+    for offset in range(DAYS):
+        day = (START + timedelta(days=offset)).strftime('%Y%m%d')
+        for device in ('desktop', 'mobile'):
+            rows.append({
+                'date': day,
+                'deviceCategory': device,
+                'sessions': int(rng.integers(0, 100)),
+                'screenPageViews': int(rng.integers(0, 500)),
+                'bounceRate': float(rng.random())
+            })
+    return rows
+
+
+def _property_rows(rows):
+    """Combine the device rows into one property-wide row per day."""
+    combined = []
+    for position in range(0, len(rows), 2):
+        pair = rows[position:position + 2]
+        sessions = sum(row['sessions'] for row in pair)
+        combined.append({
+            'date': pair[0]['date'],
+            'sessions': sessions,
+            'screenPageViews': sum(row['screenPageViews'] for row in pair),
+            'bounceRate': (
+                sum(row['bounceRate'] * row['sessions'] for row in pair) / sessions if sessions else 0.0
+            )
+        })
+    return combined
+
+
+def _index(rows, dimension_start=None):
+    index = WindowIndex.from_rows(_property_rows(rows), METRICS, START, START + timedelta(days=DAYS - 1))
+    index.add_dimension('deviceCategory', rows, start=dimension_start)
+    return index
+
+
+def _naive(rows, start, end, device=None):
+    selected = [
+        row for row in rows
+        if start.strftime('%Y%m%d') <= row['date'] <= end.strftime('%Y%m%d')
+        and (device is None or row['deviceCategory'] == device)
+    ]
+    sessions = np.array([row['sessions'] for row in selected], dtype=float)
+    bounce = np.array([row['bounceRate'] for row in selected])
+    return {
+        'sessions': sessions.sum(),
+        'screenPageViews': float(sum(row['screenPageViews'] for row in selected)),
+        'bounceRate': (bounce * sessions).sum() / sessions.sum() if sessions.sum() else 0.0
+    }
+
+
+def test_window_sums_match_naive_sums():
+    rows = _rows()
+    index = _index(rows)
+
+    rng = np.random.default_rng(1)
+    for _ in range(25):
+        first, last = sorted(rng.integers(0, DAYS, size=2))
+        start, end = START + timedelta(days=int(first)), START + timedelta(days=int(last))
+
+        expected = _naive(rows, start, end)
+        actual = index.window(start, end)
+        for metric in METRICS:
+            assert np.isclose(actual[metric], expected[metric])
+
+        for device in ('desktop', 'mobile'):
+            expected = _naive(rows, start, end, device)
+            actual = index.window(start, end, 'deviceCategory', device)
+            for metric in METRICS:
+                assert np.isclose(actual[metric], expected[metric])
+
+
+def test_batched_sums_match_single_windows():
+    rows = _rows()
+    index = _index(rows)
+    ranges = [(START, START + timedelta(days=6)), (START + timedelta(days=30), START + timedelta(days=59))]
+
+    sums = index.sums(ranges)
+    breakdown = index.breakdown_sums('deviceCategory', ranges)
+    values = index.dimension_values('deviceCategory')
+    for position, (start, end) in enumerate(ranges):
+        assert np.allclose(sums[position], list(index.window(start, end).values()))
+        for code, device in enumerate(values):
+            expected = index.window(start, end, 'deviceCategory', device)
+            assert np.allclose(breakdown[code, position], list(expected.values()))
+
+
+def test_missing_days_and_unknown_values_are_zero():
+    rows = [{'date': '20240103', 'sessions': 5, 'screenPageViews': 9, 'bounceRate': 0.5}]
+    index = WindowIndex.from_rows(rows, METRICS, START, START + timedelta(days=9))
+
+    assert index.window(START, START + timedelta(days=1))['sessions'] == 0
+    assert index.window(START, START + timedelta(days=9))['sessions'] == 5
+    assert index.first_active == 2
+    assert list(index.series('sessions')) == [0, 0, 5, 0, 0, 0, 0, 0, 0, 0]
+
+    index.add_dimension('deviceCategory', [])
+    assert not index.sums([(START, START)], 'deviceCategory', 'tablet').any()
+
+
+def test_covered_rejects_ranges_outside_the_index():
+    rows = _rows()
+    index = _index(rows, dimension_start=START + timedelta(days=10))
+
+    ranges = [
+        (START, START + timedelta(days=5)),
+        (START - timedelta(days=1), START),
+        (START + timedelta(days=DAYS - 1), START + timedelta(days=DAYS))
+    ]
+    assert list(index.covered(ranges)) == [True, False, False]
+    assert list(index.covered(ranges, 'deviceCategory')) == [False, False, False]
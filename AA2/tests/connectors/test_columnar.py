@@ -0,0 +1,129 @@
+from array import array
+
+import numpy as np
+import pytest
+from google.analytics.data_v1beta.types import MetricType, RunReportResponse
+
+from src.connectors.columnar import (
+    ColumnarResult,
+    Vocabulary,
+    build_metric_column,
+    intern_rows,
+    scoped_vocabulary,
+    vocabulary_scope,
+)
+
+ROWS = [
+    ('mobile', 'US', '100', '0.5'),
+    ('desktop', 'US', '300', '0.3'),
+    ('mobile', 'DE', '50', '0.9'),
+    ('tablet', 'DE', '10', '0.1'),
+]
+
+
+def _response(rows=ROWS):
+    pb = RunReportResponse.pb()()
+    for name in ('deviceCategory', 'country'):
+        pb.dimension_headers.add(name=name)
+    pb.metric_headers.add(name='sessions', type_=MetricType.TYPE_INTEGER.value)
+    pb.metric_headers.add(name='bounceRate', type_=MetricType.TYPE_FLOAT.value)
+    for device, country, sessions, bounce in rows:
+        row = pb.rows.add()
+        row.dimension_values.add(value=device)
+        row.dimension_values.add(value=country)
+        row.metric_values.add(value=sessions)
+        row.metric_values.add(value=bounce)
+    pb.row_count = len(rows)
+    return RunReportResponse.wrap(pb)
+
+
+def test_from_response_builds_typed_columns():
+    result = ColumnarResult.from_response(_response())
+
+    assert result.row_count == 4
+    assert result.metrics['sessions'] == array('q', [100, 300, 50, 10])
+    assert result.metrics['bounceRate'] == array('d', [0.5, 0.3, 0.9, 0.1])
+    assert result.dimensions['deviceCategory'].values == ['mobile', 'desktop', 'tablet']
+    assert list(result.dimensions['deviceCategory'].codes) == [0, 1, 0, 2]
+    assert result.metric_headers == [
+        {'name': 'sessions', 'type': 'TYPE_INTEGER'},
+        {'name': 'bounceRate', 'type': 'TYPE_FLOAT'}
+    ]
+
+
+def test_rows_view_matches_row_dicts():
+    rows = ColumnarResult.from_response(_response()).rows
+
+    assert len(rows) == 4
+    assert rows[0] == {'deviceCategory': 'mobile', 'country': 'US', 'sessions': 100, 'bounceRate': 0.5}
+    assert rows[-1]['deviceCategory'] == 'tablet'
+    assert [row['sessions'] for row in rows[1:3]] == [300, 50]
+    assert [row['country'] for row in rows] == ['US', 'US', 'DE', 'DE']
+    with pytest.raises(IndexError):
+        rows[4]
+
+
+def test_results_in_one_scope_share_codes():
+    with vocabulary_scope() as vocabularies:
+        first = ColumnarResult.from_response(_response())
+        second = ColumnarResult.from_response(_response([('tablet', 'FR', '1', '0.0'), ('mobile', 'US', '2', '0.0')]))
+
+    assert list(second.dimensions['deviceCategory'].codes) == [2, 0]
+    assert second.dimensions['deviceCategory'].values is first.dimensions['deviceCategory'].values
+    assert vocabularies['country'].values == ['US', 'DE', 'FR']
+    # Outside a scope every result gets its own vocabulary
+    assert scoped_vocabulary('country') is not scoped_vocabulary('country')
+
+
+def test_group_by_weights_ratios_by_sessions():
+    grouped = ColumnarResult.from_response(_response()).group_by(['country'])
+    rows = {row['country']: row for row in grouped.rows}
+
+    assert rows['US']['sessions'] == 400
+    assert np.isclose(rows['US']['bounceRate'], (100 * 0.5 + 300 * 0.3) / 400)
+    assert rows['DE']['sessions'] == 60
+    assert np.isclose(rows['DE']['bounceRate'], (50 * 0.9 + 10 * 0.1) / 60)
+
+    total = ColumnarResult.from_response(_response()).group_by([]).row(0)
+    assert total['sessions'] == 460
+
+
+def test_split_by_partitions_rows():
+    parts = ColumnarResult.from_response(_response()).split_by('country')
+
+    assert set(parts) == {'US', 'DE'}
+    assert parts['DE'].dimension_headers == ['deviceCategory']
+    assert list(parts['DE'].rows) == [
+        {'deviceCategory': 'mobile', 'sessions': 50, 'bounceRate': 0.9},
+        {'deviceCategory': 'tablet', 'sessions': 10, 'bounceRate': 0.1}
+    ]
+    assert parts['US'].empty_like().row_count == 0
+
+
+def test_build_metric_column_keeps_unconvertible_values():
+    assert build_metric_column(['1', '2'], 'TYPE_INTEGER') == array('q', [1, 2])
+    assert build_metric_column(['1', 'n/a'], 'TYPE_INTEGER') == [1, 'n/a']
+    assert build_metric_column(['a', 'b'], 'METRIC_TYPE_UNSPECIFIED') == ['a', 'b']
+    assert build_metric_column(['1.5'], 'TYPE_SECONDS', lambda value: float(value) * 2) == array('d', [3.0])
+
+
+def test_intern_rows_shares_value_strings():
+    rows = [{'pagePath': ''.join(['/', 'home'])} for _ in range(3)]
+    assert rows[0]['pagePath'] is not rows[1]['pagePath']
+
+    intern_rows(rows, ['pagePath'])
+    assert rows[0]['pagePath'] is not rows[1]['pagePath']
+
+    with vocabulary_scope() as vocabularies:
+        intern_rows(rows, ['pagePath'])
+    assert rows[0]['pagePath'] is rows[1]['pagePath'] is rows[2]['pagePath']
+    assert vocabularies['pagePath'].code('/home') == 0
+
+
+def test_vocabulary_codes_are_stable():
+    vocabulary = Vocabulary()
+    assert list(vocabulary.encode(['a', 'b', 'a'])) == [0, 1, 0]
+    assert list(vocabulary.encode(['c', 'a'])) == [2, 0]
+    assert vocabulary.code('b') == 1
+    assert vocabulary.code('z') is None
+    assert len(vocabulary) == 3
@@ -0,0 +1,73 @@
+import asyncio
+
+from src.connectors.connector_pool import ConnectorPool
+from src.connectors.ga_cache import GAResponseCache
+from src.connectors.synthetic_ga import SyntheticAnalyticsDataClient
+
+
+def _config(property_id, client_id='client'):
+    return {
+        'property_id': property_id,
+        'credentials': {'client_id': client_id, 'client_secret': 'secret', 'refresh_token': 'token'}
+    }
+
+
+def _pool(**kwargs):
+    clients = []
+
+    def factory(credentials):
+        clients.append(SyntheticAnalyticsDataClient())
+        return clients[-1]
+
+    return ConnectorPool(client_factory=factory, max_workers=2, **kwargs), clients
+
+
+def test_connectors_share_clients_per_credential_set():
+    pool, clients = _pool()
+
+    first = pool.get_connector(_config('1'))
+    assert pool.get_connector(_config('1')) is first
+    second = pool.get_connector(_config('2'))
+    other = pool.get_connector(_config('1', client_id='other'))
+
+    assert second is not first and other is not first
+    assert second.client is first.client
+    assert second.credentials is first.credentials
+    assert other.client is not first.client
+    assert second._executor is first._executor is other._executor
+    assert len(clients) == 2
+    assert pool.stats() == {'connectors': 3, 'clients': 2}
+
+
+def test_cache_is_attached_to_pooled_connectors(tmp_path):
+    pool, _ = _pool()
+    connector = pool.get_connector(_config('1'))
+    assert connector.cache is None
+
+    cache = GAResponseCache(str(tmp_path / 'cache.sqlite'))
+    assert pool.get_connector(_config('1'), cache=cache).cache is cache
+
+
+def test_validation_is_reused_until_invalidated():
+    pool, clients = _pool(validation_ttl_seconds=3600)
+    connector = pool.get_connector(_config('1'))
+
+    assert asyncio.run(pool.validate(connector))
+    assert asyncio.run(pool.validate(connector))
+    assert clients[0].calls['run_report'] == 1
+
+    pool.invalidate(connector)
+    assert asyncio.run(pool.validate(connector))
+    assert clients[0].calls['run_report'] == 2
+
+
+def test_failed_validation_is_not_cached():
+    pool, clients = _pool()
+    connector = pool.get_connector(_config('1'))
+
+    def unauthorized(*args, **kwargs):
+        raise PermissionError("invalid_grant")
+
+    clients[0].run_report = unauthorized
+    assert not asyncio.run(pool.validate(connector))
+    assert not asyncio.run(pool.validate(connector))
@@ -0,0 +1,83 @@
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+from src.connectors import ga_cache
+from src.connectors.ga_cache import GAResponseCache
+
+
+def _key(**overrides):
+    params = dict(
+        property_id="123",
+        metrics=["sessions"],
+        dimensions=["date"],
+        start_date=datetime(2024, 1, 1),
+        end_date=datetime(2024, 1, 31),
+        row_limit=1000
+    )
+    params.update(overrides)
+    return GAResponseCache.make_key(**params)
+
+
+def test_make_key_distinguishes_requests():
+    assert _key() == _key()
+    assert _key() != _key(row_limit=10)
+    assert _key() != _key(extra={"pivots": [1]})
+    assert _key(extra={"pivots": [1]}) != _key(extra={"pivots": [2]})
+
+
+def test_recent_period_expires_after_ttl(tmp_path, monkeypatch):
+    cache = GAResponseCache(str(tmp_path / "cache.db"), ttl_seconds=60)
+    now = [1_000_000.0]
+    monkeypatch.setattr(ga_cache, "time", SimpleNamespace(time=lambda: now[0]))
+
+    cache.set("k", {"rows": [1]}, datetime.combine(date.today(), datetime.min.time()))
+    assert cache.get("k") == {"rows": [1]}
+
+    now[0] += 61
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_settled_period_is_cached_permanently(tmp_path, monkeypatch):
+    cache = GAResponseCache(str(tmp_path / "cache.db"), ttl_seconds=60, settle_days=3)
+    now = [1_000_000.0]
+    monkeypatch.setattr(ga_cache, "time", SimpleNamespace(time=lambda: now[0]))
+
+    settled_end = datetime.now() - timedelta(days=10)
+    assert cache.is_settled(settled_end)
+    assert not cache.is_settled(datetime.now() - timedelta(days=1))
+
+    cache.set("k", {"rows": [1]}, settled_end)
+    now[0] += 10 ** 7
+    assert cache.get("k") == {"rows": [1]}
+
+
+def test_stats_count_hits_and_misses(tmp_path):
+    cache = GAResponseCache(str(tmp_path / "cache.db"))
+    assert cache.get("missing") is None
+    cache.set("k", {"rows": []}, datetime.now())
+    cache.get("k")
+    cache.get("k")
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+    assert stats["bytes"] > 0
+
+
+def test_evicts_least_recently_used_over_budget(tmp_path, monkeypatch):
+    cache = GAResponseCache(str(tmp_path / "cache.db"), max_size_mb=0.001)
+    now = [1_000_000.0]
+    monkeypatch.setattr(ga_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    payload = {"rows": ["x" * 400]}
+    settled_end = datetime.now() - timedelta(days=10)
+
+    cache.set("old", payload, settled_end)
+    now[0] += 1
+    cache.set("new", payload, settled_end)
+    now[0] += 1
+    cache.set("newest", payload, settled_end)
+
+    assert cache.get("old") is None
+    assert cache.get("newest") == payload
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+from google.analytics.data_v1beta.types import (
+    CheckCompatibilityResponse,
+    Compatibility,
+    DimensionCompatibility,
+    DimensionMetadata,
+    Metadata,
+    MetricCompatibility,
+    MetricMetadata,
+    MetricType,
+)
+
+from src.connectors import ga_metadata
+from src.connectors.ga_metadata import GAMetadataCatalog
+
+
+class FakeConnector:
+    """Serves a small metadata catalog and counts the round trips."""
+
+    property_id = '123'
+
+    def __init__(self):
+        self.calls = {'get_metadata': 0, 'check_compatibility': 0}
+
+    async def get_metadata(self):
+        self.calls['get_metadata'] += 1
+        return Metadata(
+            dimensions=[
+                DimensionMetadata(api_name='country', ui_name='Country', category='Geography'),
+                DimensionMetadata(
+                    api_name='sessionDefaultChannelGroup', ui_name='Channel', category='Traffic source',
+                    deprecated_api_names=['sessionDefaultChannelGrouping']
+                ),
+            ],
+            metrics=[
+                MetricMetadata(api_name='sessions', ui_name='Sessions', type_=MetricType.TYPE_INTEGER, category='Session'),
+                MetricMetadata(api_name='bounceRate', ui_name='Bounce rate', type_=MetricType.TYPE_FLOAT, category='Session'),
+            ]
+        )
+
+    async def check_compatibility(self, metrics, dimensions):
+        self.calls['check_compatibility'] += 1
+        return CheckCompatibilityResponse(
+            dimension_compatibilities=[
+                DimensionCompatibility(
+                    dimension_metadata=DimensionMetadata(api_name=name),
+                    compatibility=Compatibility.INCOMPATIBLE if name == 'country' else Compatibility.COMPATIBLE
+                )
+                for name in dimensions
+            ],
+            metric_compatibilities=[
+                MetricCompatibility(metric_metadata=MetricMetadata(api_name=name), compatibility=Compatibility.COMPATIBLE)
+                for name in metrics
+            ]
+        )
+
+
+def test_validate_suggests_close_names(tmp_path):
+    metadata = asyncio.run(GAMetadataCatalog(str(tmp_path)).load(FakeConnector()))
+
+    metadata.validate(['sessions', 'bounceRate'], ['country'])
+    # Deprecated names still resolve
+    metadata.validate(['sessions'], ['sessionDefaultChannelGrouping'])
+
+    with pytest.raises(ValueError) as error:
+        metadata.validate(['session', 'bounceRate'], ['countrry'])
+    assert "unknown metric 'session' (did you mean ['sessions']?)" in str(error.value)
+    assert "unknown dimension 'countrry'" in str(error.value)
+
+
+def test_categories_and_converters(tmp_path):
+    metadata = asyncio.run(GAMetadataCatalog(str(tmp_path)).load(FakeConnector()))
+
+    assert metadata.category('sessionDefaultChannelGroup') == 'Traffic source'
+    assert metadata.category('sessions') == 'Session'
+    assert metadata.category('unknown') is None
+    assert metadata.converters['sessions']('12') == 12
+    assert metadata.converters['bounceRate']('0.25') == 0.25
+
+
+def test_metadata_is_fetched_once_per_refresh_interval(tmp_path, monkeypatch):
+    connector = FakeConnector()
+    asyncio.run(GAMetadataCatalog(str(tmp_path)).load(connector))
+    assert os.listdir(tmp_path) == ['123.json']
+
+    # A new catalog reads the file instead of fetching again
+    catalog = GAMetadataCatalog(str(tmp_path), refresh_seconds=3600)
+    asyncio.run(catalog.load(connector))
+    assert connector.calls['get_metadata'] == 1
+
+    later = time.time() + 7200
+    monkeypatch.setattr(ga_metadata, 'time', SimpleNamespace(time=lambda: later))
+    asyncio.run(catalog.load(connector))
+    assert connector.calls['get_metadata'] == 2
+
+
+def test_corrupt_cache_file_is_refetched(tmp_path):
+    (tmp_path / '123.json').write_text('{"dimensions": ')
+    connector = FakeConnector()
+    metadata = asyncio.run(GAMetadataCatalog(str(tmp_path)).load(connector))
+
+    assert connector.calls['get_metadata'] == 1
+    assert 'sessions' in metadata.metrics
+    assert json.loads((tmp_path / '123.json').read_text())['metrics']['sessions']['type'] == 'TYPE_INTEGER'
+
+
+def test_compatibility_checks_are_cached(tmp_path):
+    connector = FakeConnector()
+    catalog = GAMetadataCatalog(str(tmp_path))
+
+    result = asyncio.run(catalog.check_compatibility(connector, ['sessions'], ['country', 'sessionDefaultChannelGroup']))
+    assert result == {'incompatible_metrics': [], 'incompatible_dimensions': ['country']}
+
+    # Order does not matter, and the result survives a new catalog
+    again = asyncio.run(GAMetadataCatalog(str(tmp_path)).check_compatibility(
+        connector, ['sessions'], ['sessionDefaultChannelGroup', 'country']
+    ))
+    assert again == result
+    assert connector.calls['check_compatibility'] == 1
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
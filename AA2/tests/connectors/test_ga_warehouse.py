@@ -0,0 +1,139 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from src.connectors.ga_warehouse import GAWarehouse, _contiguous_runs
+
+METRIC_HEADERS = [
+    {'name': 'sessions', 'type': 'TYPE_INTEGER'},
+    {'name': 'bounceRate', 'type': 'TYPE_FLOAT'},
+    {'name': 'totalUsers', 'type': 'TYPE_INTEGER'}
+]
+DEVICES = ('mobile', 'desktop')
+
+
+def _row(day, device):
+    """Deterministic metric values of one day and device."""
+    sessions = day.day * (2 if device == 'mobile' else 1)
+    return {'sessions': sessions, 'bounceRate': 0.5 if device == 'mobile' else 0.2, 'totalUsers': sessions // 2 + 1}
+
+
+class FakeConnector:
+    """Serves the two report shapes GAWarehouse.sync requests and records the days asked for."""
+
+    property_id = '123'
+
+    def __init__(self):
+        self.requested = []
+
+    def _days(self, start_date, end_date):
+        day = start_date.date()
+        while day <= end_date.date():
+            yield day
+            day += timedelta(days=1)
+
+    async def iter_pages(self, metrics, dimensions, start_date, end_date, page_size):
+        self.requested.append((start_date.date(), end_date.date()))
+        rows = [
+            {'deviceCategory': device, 'date': day.strftime('%Y%m%d'), **_row(day, device)}
+            for day in self._days(start_date, end_date)
+            for device in DEVICES
+        ]
+        for first in range(0, len(rows), page_size):
+            yield {'metric_headers': METRIC_HEADERS, 'rows': rows[first:first + page_size]}
+
+    async def fetch_data(self, metrics, dimensions, start_date, end_date, row_limit):
+        rows = []
+        for day in self._days(start_date, end_date):
+            mobile, desktop = _row(day, 'mobile'), _row(day, 'desktop')
+            sessions = mobile['sessions'] + desktop['sessions']
+            rows.append({
+                'date': day.strftime('%Y%m%d'),
+                'sessions': sessions,
+                'bounceRate': (mobile['sessions'] * 0.5 + desktop['sessions'] * 0.2) / sessions,
+                # Unique users overlap across devices
+                'totalUsers': mobile['totalUsers']
+            })
+        return {'metric_headers': METRIC_HEADERS, 'rows': rows}
+
+
+def _sync(warehouse, connector, start, end):
+    return asyncio.run(warehouse.sync(
+        connector, ['sessions', 'bounceRate', 'totalUsers'], ['deviceCategory'], start, end, page_size=7
+    ))
+
+
+def test_sync_fetches_only_stale_days(tmp_path):
+    warehouse = GAWarehouse(str(tmp_path), settle_days=3)
+    connector = FakeConnector()
+    start, end = datetime(2024, 1, 1), datetime(2024, 1, 10)
+
+    assert _sync(warehouse, connector, start, end) == 10
+    assert _sync(warehouse, connector, start, end) == 0
+
+    # Extending the range fetches the new days only, as one run per gap
+    assert _sync(warehouse, connector, datetime(2023, 12, 30), datetime(2024, 1, 12)) == 4
+    assert connector.requested[1:] == [
+        (date(2023, 12, 30), date(2023, 12, 31)),
+        (date(2024, 1, 11), date(2024, 1, 12))
+    ]
+
+
+def test_recent_days_are_refetched(tmp_path):
+    warehouse = GAWarehouse(str(tmp_path), settle_days=3)
+    connector = FakeConnector()
+    end = datetime.combine(date.today(), datetime.min.time())
+    start = end - timedelta(days=9)
+
+    assert _sync(warehouse, connector, start, end) == 10
+    # Days from settle_days ago on are not final yet
+    assert _sync(warehouse, connector, start, end) == 4
+
+
+def test_window_combines_partitions(tmp_path):
+    warehouse = GAWarehouse(str(tmp_path))
+    _sync(warehouse, FakeConnector(), datetime(2024, 1, 1), datetime(2024, 1, 10))
+
+    window = warehouse.window(
+        '123', ['sessions', 'bounceRate', 'totalUsers'], ['deviceCategory'],
+        datetime(2024, 1, 3), datetime(2024, 1, 5)
+    )
+    rows = {row['deviceCategory']: row for row in window['rows']}
+    assert rows['mobile']['sessions'] == 2 * (3 + 4 + 5)
+    assert rows['desktop']['sessions'] == 3 + 4 + 5
+    assert np.isclose(rows['mobile']['bounceRate'], 0.5)
+
+    totals = window['totals']
+    assert totals['sessions'] == 3 * (3 + 4 + 5)
+    assert np.isclose(totals['bounceRate'], (24 * 0.5 + 12 * 0.2) / 36)
+    assert window['metric_headers'] == METRIC_HEADERS
+    assert window['metadata']['source'] == 'warehouse'
+    assert window['metadata']['days'] == 3
+    assert window['metadata']['approximate_metrics'] == ['totalUsers']
+
+    daily = warehouse.daily_totals(
+        '123', ['sessions', 'bounceRate', 'totalUsers'], ['deviceCategory'],
+        datetime(2024, 1, 9), datetime(2024, 1, 12)
+    )
+    assert [day for day, _ in daily] == ['2024-01-09', '2024-01-10']
+    assert daily[0][1]['sessions'] == 27
+
+
+def test_datasets_are_kept_apart(tmp_path):
+    warehouse = GAWarehouse(str(tmp_path))
+    _sync(warehouse, FakeConnector(), datetime(2024, 1, 1), datetime(2024, 1, 2))
+
+    window = warehouse.window('123', ['sessions'], ['deviceCategory'], datetime(2024, 1, 1), datetime(2024, 1, 2))
+    assert window['rows'] == []
+    assert window['metadata']['days'] == 0
+
+
+def test_contiguous_runs():
+    days = [date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 4), date(2024, 1, 6), date(2024, 1, 7)]
+    assert _contiguous_runs(days) == [
+        (date(2024, 1, 1), date(2024, 1, 2)),
+        (date(2024, 1, 4), date(2024, 1, 4)),
+        (date(2024, 1, 6), date(2024, 1, 7))
+    ]
+    assert _contiguous_runs([]) == []
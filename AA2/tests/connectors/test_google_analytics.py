@@ -0,0 +1,169 @@
+import asyncio
+from datetime import datetime
+
+from src.connectors.ga_cache import GAResponseCache
+from src.connectors.google_analytics import GoogleAnalyticsConnector
+from src.connectors.synthetic_ga import SyntheticAnalyticsDataClient
+
+CURRENT = (datetime(2026, 9, 1), datetime(2026, 9, 7))
+PREVIOUS = (datetime(2026, 8, 25), datetime(2026, 8, 31))
+
+
+def _connector(cache=None):
+    client = SyntheticAnalyticsDataClient()
+    config = {
+        'property_id': '1',
+        'credentials': {'client_id': 'client', 'client_secret': 'secret', 'refresh_token': 'token'}
+    }
+    return GoogleAnalyticsConnector(config, cache=cache, client=client), client
+
+
+def test_comparison_windows_match_separate_reports():
+    connector, client = _connector()
+    windows = {'current': CURRENT, 'previous': PREVIOUS}
+
+    result = asyncio.run(connector.fetch_comparison(['sessions'], windows, dimensions=['deviceCategory']))
+    assert list(result) == ['current', 'previous']
+    assert client.calls == {'run_report': 1}
+
+    for name, (start, end) in windows.items():
+        single = asyncio.run(connector.fetch_data(['sessions'], ['deviceCategory'], start, end))
+        assert result[name]['rows'] == single['rows']
+        assert result[name]['totals'] == single['totals']
+        assert result[name]['metadata']['total_row_count'] == single['metadata']['total_row_count']
+        assert result[name]['metadata']['date_range'] == {
+            'start': start.strftime('%Y-%m-%d'), 'end': end.strftime('%Y-%m-%d')
+        }
+
+
+def test_truncated_comparison_is_fetched_per_window():
+    connector, client = _connector()
+    windows = {'current': CURRENT, 'previous': PREVIOUS}
+
+    result = asyncio.run(connector.fetch_comparison(
+        ['sessions'], windows, dimensions=['deviceCategory', 'country'], row_limit=5
+    ))
+    assert client.calls == {'run_report': 3}
+
+    for name, (start, end) in windows.items():
+        single = asyncio.run(connector.fetch_data(
+            ['sessions'], ['deviceCategory', 'country'], start, end, row_limit=5
+        ))
+        assert result[name]['row_count'] == 5
+        assert result[name]['rows'] == single['rows']
+
+
+def test_comparison_windows_are_served_from_cache(tmp_path):
+    cache = GAResponseCache(str(tmp_path / 'cache.sqlite'))
+    connector, client = _connector(cache=cache)
+    windows = {'current': CURRENT, 'previous': PREVIOUS}
+
+    first = asyncio.run(connector.fetch_comparison(['sessions'], windows, dimensions=['deviceCategory']))
+    second = asyncio.run(connector.fetch_comparison(['sessions'], windows, dimensions=['deviceCategory']))
+    single = asyncio.run(connector.fetch_data(['sessions'], ['deviceCategory'], *PREVIOUS))
+
+    assert second == first
+    assert single['rows'] == first['previous']['rows']
+    assert client.calls == {'run_report': 1}
+
+
+def test_pages_cover_the_whole_report():
+    connector, client = _connector()
+
+    async def collect():
+        return [
+            page async for page in connector.iter_pages(
+                ['sessions'], ['date', 'pagePath'], *CURRENT, page_size=100
+            )
+        ]
+
+    pages = asyncio.run(collect())
+    total = pages[0]['metadata']['total_row_count']
+    assert total > 100
+    assert [page['metadata']['offset'] for page in pages] == list(range(0, total, 100))
+    assert client.calls == {'run_report': len(pages)}
+
+    full = asyncio.run(connector.fetch_data(
+        ['sessions'], ['date', 'pagePath'], *CURRENT, row_limit=total
+    ))
+    assert [row for page in pages for row in page['rows']] == full['rows']
+
+
+def test_pages_stop_when_the_consumer_stops():
+    connector, client = _connector()
+
+    async def first_page():
+        pages = connector.iter_pages(['sessions'], ['date', 'pagePath'], *CURRENT, page_size=100)
+        page = await pages.__anext__()
+        await pages.aclose()
+        return page
+
+    page = asyncio.run(first_page())
+    assert page['row_count'] == 100
+    # Only the prefetched second page was requested
+    assert client.calls['run_report'] <= 2
+
+
+def test_batch_matches_individual_reports(tmp_path):
+    cache = GAResponseCache(str(tmp_path / 'cache.sqlite'))
+    connector, client = _connector(cache=cache)
+    dimensions = ['deviceCategory', 'country', 'date', 'sessionSource', 'pagePath', 'landingPage']
+    specs = [
+        {'metrics': ['sessions'], 'dimensions': [dimension], 'start_date': CURRENT[0], 'end_date': CURRENT[1]}
+        for dimension in dimensions
+    ]
+    specs.append({
+        'metrics': ['sessions'], 'dimensions': ['deviceCategory'],
+        'date_ranges': {'current': CURRENT, 'previous': PREVIOUS}
+    })
+
+    results = asyncio.run(connector.batch_fetch(specs))
+    assert client.calls['batch_run_reports'] == 2
+    assert list(results[-1]) == ['current', 'previous']
+
+    # Every window was cached, so the individual reports cost nothing
+    for spec, result in zip(specs[:-1], results):
+        single = asyncio.run(connector.fetch_data(
+            spec['metrics'], spec['dimensions'], spec['start_date'], spec['end_date']
+        ))
+        assert single == result
+    comparison = asyncio.run(connector.fetch_comparison(
+        ['sessions'], specs[-1]['date_ranges'], dimensions=['deviceCategory']
+    ))
+    assert comparison == results[-1]
+    assert client.calls['batch_run_reports'] == 2
+    assert asyncio.run(connector.batch_fetch(specs)) == results
+    assert client.calls['batch_run_reports'] == 2
+
+    # And match what a fresh connector fetches one report at a time
+    uncached, _ = _connector()
+    single = asyncio.run(uncached.fetch_data(['sessions'], ['country'], *CURRENT))
+    assert single['rows'] == results[1]['rows']
+    assert single['totals'] == results[1]['totals']
+
+
+def _pivot_spec(limit):
+    return {
+        'metrics': ['sessions'],
+        'dimensions': ['deviceCategory', 'country'],
+        'pivots': [
+            {'field_names': ['deviceCategory'], 'limit': 3, 'aggregate': True},
+            {'field_names': ['country'], 'limit': limit, 'order_by': 'sessions'},
+        ],
+        'start_date': CURRENT[0],
+        'end_date': CURRENT[1],
+    }
+
+
+def test_pivot_reports_share_the_cache(tmp_path):
+    cache = GAResponseCache(str(tmp_path / 'cache.sqlite'))
+    connector, client = _connector(cache=cache)
+
+    single = asyncio.run(connector.fetch_pivot(**_pivot_spec(5)))
+    batched = asyncio.run(connector.batch_fetch_pivots([_pivot_spec(5), _pivot_spec(10)]))
+    assert batched[0] == single
+    assert batched[1] != single
+    assert client.calls == {'run_pivot_report': 2, 'batch_run_pivot_reports': 1}
+
+    assert asyncio.run(connector.batch_fetch_pivots([_pivot_spec(10), _pivot_spec(5)])) == batched[::-1]
+    assert client.calls == {'run_pivot_report': 2, 'batch_run_pivot_reports': 1}
@@ -0,0 +1,103 @@
+import asyncio
+import os
+from datetime import datetime
+
+from src.connectors.query_planner import QueryPlanner
+
+DIMENSIONS = ['date', 'deviceCategory', 'pagePath', 'country']
+
+
+def _result(dimensions, rows, total_row_count=None):
+    return {
+        'dimension_headers': dimensions,
+        'rows': rows,
+        'row_count': len(rows),
+        'metadata': {'total_row_count': total_row_count if total_row_count is not None else len(rows)}
+    }
+
+
+class FakeConnector:
+    """Answers batch_fetch with one row per report and records the batches."""
+
+    property_id = '123'
+
+    def __init__(self):
+        self.batches = []
+
+    async def batch_fetch(self, specs):
+        self.batches.append(specs)
+        return [
+            _result(spec['dimensions'], [{dimension: 'x' for dimension in spec['dimensions']}])
+            for spec in specs
+        ]
+
+
+def test_estimates_use_defaults_until_history_exists(tmp_path):
+    planner = QueryPlanner(str(tmp_path))
+    assert planner.estimate('123', ['date', 'deviceCategory'], 7) == 21
+    assert planner.estimate('123', ['someCustomDimension'], 7) == 100
+    # Distinct values grow with the square root of the span
+    assert planner.estimate('123', ['pagePath'], 28) == 2000
+
+    planner.record('123', ['pagePath'], 7, _result(['pagePath'], [{'pagePath': str(n)} for n in range(40)]))
+    assert planner.estimate('123', ['pagePath'], 7) == 40
+
+    planner.record('123', ['date', 'pagePath'], 7, _result(['date', 'pagePath'], [{}] * 10, total_row_count=250))
+    # Observed row counts of a combination win, scaled linearly with date
+    assert planner.estimate('123', ['pagePath', 'date'], 14) == 500
+
+
+def test_plan_splits_wide_dimension_sets(tmp_path):
+    planner = QueryPlanner(str(tmp_path), fill_ratio=0.8)
+
+    assert planner.plan('123', ['date', 'deviceCategory'], 7, 10000) == [['date', 'deviceCategory']]
+    plan = planner.plan('123', DIMENSIONS, 7, 10000)
+    assert plan == [['date', 'pagePath'], ['deviceCategory', 'country']]
+    # Every dimension is planned and every report fits the budget
+    assert sorted(dimension for report in plan for dimension in report) == sorted(DIMENSIONS)
+    assert all(planner.estimate('123', report, 7) <= 8000 for report in plan)
+
+
+def test_fixed_splits_seed_the_plan(tmp_path):
+    planner = QueryPlanner(str(tmp_path), splits=[['country', 'date'], ['unrequested']])
+    plan = planner.plan('123', DIMENSIONS, 7, 10000)
+
+    # Other dimensions join a fixed group they fit into; a lone one is padded
+    assert plan == [['date', 'deviceCategory', 'country'], ['deviceCategory', 'pagePath']]
+
+
+def test_truncated_reports_only_raise_cardinality(tmp_path):
+    planner = QueryPlanner(str(tmp_path))
+    planner.record('123', ['country'], 7, _result(['country'], [{'country': str(n)} for n in range(80)]))
+    planner.record('123', ['country'], 7, _result(['country'], [{'country': str(n)} for n in range(50)], 90))
+    assert planner.estimate('123', ['country', 'deviceCategory'], 7) == 80 * 3
+
+    planner.record('123', ['country'], 7, _result(['country'], [{'country': str(n)} for n in range(50)]))
+    assert planner.estimate('123', ['country', 'deviceCategory'], 7) == 50 * 3
+
+
+def test_history_is_persisted(tmp_path):
+    QueryPlanner(str(tmp_path)).record('123', ['pagePath'], 7, _result(['pagePath'], [{'pagePath': '/'}]))
+    assert QueryPlanner(str(tmp_path)).estimate('123', ['pagePath'], 7) == 1
+    assert os.listdir(tmp_path) == ['123.json']
+
+    (tmp_path / '123.json').write_text('not json')
+    assert QueryPlanner(str(tmp_path)).estimate('123', ['pagePath'], 7) == 1000
+
+
+def test_fetch_batches_the_planned_reports(tmp_path):
+    planner = QueryPlanner(str(tmp_path))
+    connector = FakeConnector()
+
+    window = asyncio.run(planner.fetch(
+        connector, ['sessions'], DIMENSIONS, datetime(2024, 1, 1), datetime(2024, 1, 7), row_limit=10000
+    ))
+
+    assert len(connector.batches) == 1
+    assert [spec['dimensions'] for spec in connector.batches[0]] == [['date', 'pagePath'], ['deviceCategory', 'country']]
+    assert window['dimension_headers'] == ['date', 'pagePath']
+    assert set(window['breakdowns']) == {'date+pagePath', 'deviceCategory+country'}
+    assert window['metadata']['query_plan'] == [['date', 'pagePath'], ['deviceCategory', 'country']]
+    assert window['metadata']['total_row_count'] == 1
+    # Fetched reports teach the planner their cardinality
+    assert planner.estimate('123', ['country'], 7) == 1
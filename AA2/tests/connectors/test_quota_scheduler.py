@@ -0,0 +1,148 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+from google.api_core import exceptions as api_exceptions
+
+from src.connectors.quota_scheduler import QuotaScheduler
+
+
+def _quota(consumed, remaining):
+    status = SimpleNamespace(consumed=consumed, remaining=remaining)
+    return SimpleNamespace(
+        tokens_per_day=status,
+        tokens_per_hour=SimpleNamespace(consumed=0, remaining=100),
+        tokens_per_project_per_hour=SimpleNamespace(consumed=0, remaining=0),
+        concurrent_requests=SimpleNamespace(consumed=1, remaining=9)
+    )
+
+
+async def _peak(scheduler, property_ids, requests=12):
+    """Run requests for the given properties and return the most in flight at once."""
+    in_flight = [0]
+    peak = [0]
+
+    async def call():
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+
+    await asyncio.gather(*[
+        scheduler.run(property_ids[position % len(property_ids)], call) for position in range(requests)
+    ])
+    return peak[0]
+
+
+def test_concurrency_is_limited_per_property_and_in_total():
+    scheduler = QuotaScheduler(max_concurrent_per_property=2, max_concurrent_total=3)
+    assert asyncio.run(_peak(scheduler, ['a'])) == 2
+    assert asyncio.run(_peak(scheduler, ['a', 'b'])) == 3
+
+
+def test_set_limits_applies_to_later_requests():
+    scheduler = QuotaScheduler(max_concurrent_total=2)
+    assert asyncio.run(_peak(scheduler, ['a'])) == 2
+    scheduler.set_limits(max_concurrent_total=4, max_concurrent_per_property=4)
+    assert asyncio.run(_peak(scheduler, ['a'])) == 4
+
+
+def test_event_loops_in_threads_get_their_own_semaphores():
+    scheduler = QuotaScheduler(max_concurrent_total=2)
+    peaks = []
+    threads = [
+        threading.Thread(target=lambda: peaks.append(asyncio.run(_peak(scheduler, ['a']))))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peaks == [2, 2, 2]
+
+
+def test_retryable_errors_are_retried():
+    scheduler = QuotaScheduler(max_retries=3, base_delay=0.001)
+    attempts = [0]
+
+    async def flaky():
+        attempts[0] += 1
+        if attempts[0] < 3:
+            raise api_exceptions.ServiceUnavailable("try again")
+        return 'ok'
+
+    assert asyncio.run(scheduler.run('a', flaky)) == 'ok'
+    assert attempts[0] == 3
+    assert scheduler.retries == 2
+
+
+def test_retries_give_up_and_other_errors_are_raised_at_once():
+    scheduler = QuotaScheduler(max_retries=2, base_delay=0.001)
+    attempts = [0]
+
+    async def exhausted():
+        attempts[0] += 1
+        raise api_exceptions.ResourceExhausted("quota")
+
+    with pytest.raises(api_exceptions.ResourceExhausted):
+        asyncio.run(scheduler.run('a', exhausted))
+    assert attempts[0] == 3
+
+    async def invalid():
+        attempts[0] += 1
+        raise api_exceptions.InvalidArgument("bad request")
+
+    with pytest.raises(api_exceptions.InvalidArgument):
+        asyncio.run(scheduler.run('a', invalid))
+    assert attempts[0] == 4
+
+
+def test_record_tracks_the_tightest_quota():
+    scheduler = QuotaScheduler()
+    assert scheduler.remaining_fraction('a') == 1.0
+
+    scheduler.record('a', SimpleNamespace(property_quota=_quota(75, 25)))
+    assert scheduler.remaining_fraction('a') == 0.25
+    assert scheduler.quota['a']['concurrent_requests'] == {'consumed': 1, 'remaining': 9}
+
+    # Batch responses report the quota of each report
+    scheduler.record('b', SimpleNamespace(property_quota=None, reports=[SimpleNamespace(property_quota=_quota(90, 10))]))
+    assert scheduler.remaining_fraction('b') == 0.1
+
+
+def test_low_priority_requests_wait_while_quota_is_tight():
+    scheduler = QuotaScheduler(low_priority_reserve=0.2, defer_seconds=0.05)
+    scheduler.record('a', SimpleNamespace(property_quota=_quota(95, 5)))
+    order = []
+
+    async def call(name):
+        order.append(name)
+
+    async def main():
+        with QuotaScheduler.priority('low'):
+            low = asyncio.create_task(scheduler.run('a', lambda: call('low')))
+        await asyncio.sleep(0)
+        await scheduler.run('a', lambda: call('normal'))
+        await low
+
+    asyncio.run(main())
+    assert order == ['normal', 'low']
+
+    with pytest.raises(ValueError):
+        with QuotaScheduler.priority('urgent'):
+            pass
+
+
+def test_activate_overrides_the_default_scheduler():
+    own = QuotaScheduler()
+    shared = QuotaScheduler()
+    assert QuotaScheduler.active(own) is own
+    with shared.activate():
+        assert QuotaScheduler.active(own) is shared
+
+        async def inner():
+            return QuotaScheduler.active(own)
+
+        assert asyncio.run(inner()) is shared
+    assert QuotaScheduler.active() is None
@@ -0,0 +1,104 @@
+import asyncio
+import os
+
+import numpy as np
+
+from src.connectors.row_store import SpillingRowStore
+from src.connectors.columnar import vocabulary_scope
+
+METRIC_HEADERS = [{'name': 'sessions', 'type': 'TYPE_INTEGER'}, {'name': 'bounceRate', 'type': 'TYPE_FLOAT'}]
+
+
+def _pages(count=1000, page_size=100):
+    rng = np.random.default_rng(9)
+    rows = [
+        {
+            'pagePath': f"/page/{int(rng.integers(0, 50))}",
+            'deviceCategory': ['mobile', 'desktop', 'tablet'][int(rng.integers(0, 3))],
+            'sessions': int(rng.integers(1, 100)),
+            'bounceRate': float(rng.random())
+        }
+        for _ in range(count)
+    ]
+    return rows, [
+        {'metric_headers': METRIC_HEADERS, 'rows': rows[start:start + page_size]}
+        for start in range(0, count, page_size)
+    ]
+
+
+def _store(directory, budget):
+    return SpillingRowStore(
+        ['pagePath', 'deviceCategory'], ['sessions', 'bounceRate'], str(directory), memory_budget_bytes=budget
+    )
+
+
+def test_aggregate_matches_naive_group_sums_after_spilling(tmp_path):
+    rows, pages = _pages()
+    with _store(tmp_path, budget=2048) as store:
+        for page in pages:
+            store.append(page)
+        assert store.stats()['spilled_chunks'] > 1
+        result = store.aggregate(['deviceCategory'])
+
+    expected = {}
+    for row in rows:
+        sessions, bounces = expected.get(row['deviceCategory'], (0, 0.0))
+        expected[row['deviceCategory']] = (sessions + row['sessions'], bounces + row['bounceRate'] * row['sessions'])
+
+    assert result['row_count'] == 3
+    assert result['metadata']['source_rows'] == 1000
+    for row in result['rows']:
+        sessions, bounces = expected[row['deviceCategory']]
+        assert row['sessions'] == sessions
+        assert isinstance(row['sessions'], int)
+        assert np.isclose(row['bounceRate'], bounces / sessions)
+
+
+def test_spilling_does_not_change_results(tmp_path):
+    _, pages = _pages()
+    results = []
+    for budget in (1024, 2 ** 30):
+        with _store(tmp_path, budget) as store:
+            for page in pages:
+                store.append(page)
+            results.append((store.aggregate(['pagePath', 'deviceCategory'])['rows'], store.aggregate([])['rows']))
+    assert results[0] == results[1]
+    assert len(results[0][1]) == 1
+
+
+def test_top_rows(tmp_path):
+    rows, pages = _pages()
+    with _store(tmp_path, budget=4096) as store:
+        asyncio.run(store.consume(_iterate(pages)))
+        top = store.top(5)
+
+    expected = sorted((row['sessions'] for row in rows), reverse=True)[:5]
+    assert [row['sessions'] for row in top['rows']] == expected
+    assert top['metadata']['total_row_count'] == 1000
+    assert set(top['rows'][0]) == {'pagePath', 'deviceCategory', 'sessions', 'bounceRate'}
+
+
+def test_close_removes_spilled_chunks(tmp_path):
+    _, pages = _pages()
+    store = _store(tmp_path, budget=1024)
+    for page in pages:
+        store.append(page)
+    assert store.stats()['spilled_bytes'] > 0
+    assert os.listdir(tmp_path)
+
+    store.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_codes_follow_the_scope_vocabularies(tmp_path):
+    _, pages = _pages(count=10)
+    with vocabulary_scope() as vocabularies:
+        with _store(tmp_path, budget=2 ** 20) as store:
+            store.append(pages[0])
+            assert store.vocabularies['pagePath'] is vocabularies['pagePath']
+            assert store.aggregate(['pagePath'])['row_count'] == len(vocabularies['pagePath'])
+
+
+async def _iterate(pages):
+    for page in pages:
+        yield page
@@ -0,0 +1,99 @@
+import asyncio
+import contextvars
+import time
+
+from src.connectors.quota_scheduler import QuotaScheduler
+from src.flows.portfolio_runner import PortfolioRunner, property_ids_from_env
+from src.utils.concurrency import ConcurrencyLimit
+
+
+class FakeGraph:
+    """Stands in for the report graph: LLM calls in executor threads, like the graph's nodes."""
+
+    def __init__(self, llm, shared_scheduler, failing=(), erroring=(), llm_calls=4):
+        self.llm = llm
+        self.shared_scheduler = shared_scheduler
+        self.failing = set(failing)
+        self.erroring = set(erroring)
+        self.llm_calls = llm_calls
+        self.schedulers = []
+
+    async def ainvoke(self, state):
+        self.schedulers.append(QuotaScheduler.active(self.shared_scheduler))
+        if state.property_id in self.failing:
+            raise RuntimeError(f"boom {state.property_id}")
+
+        def call_llm():
+            with self.llm.slot():
+                time.sleep(0.02)
+
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[
+            loop.run_in_executor(None, contextvars.copy_context().run, call_llm)
+            for _ in range(self.llm_calls)
+        ])
+        if state.property_id in self.erroring:
+            return {'ga_data': {'error': 'no access'}}
+        return {'property_id': state.property_id, 'ga_data': {}}
+
+
+def test_runs_every_property_and_isolates_failures():
+    llm, scheduler = ConcurrencyLimit(8), QuotaScheduler()
+    graph = FakeGraph(llm, scheduler, failing={'2'}, erroring={'3'})
+    runner = PortfolioRunner(graph, max_concurrent_runs=2, scheduler=scheduler, llm=llm)
+
+    outcomes = {outcome['property_id']: outcome for outcome in asyncio.run(runner.run(['1', '2', '3', '4']))}
+
+    assert set(outcomes) == {'1', '2', '3', '4'}
+    assert outcomes['1']['status'] == 'success'
+    assert outcomes['1']['result']['property_id'] == '1'
+    assert outcomes['2']['status'] == 'failed'
+    assert outcomes['2']['result'] is None
+    assert outcomes['2']['error'] == 'boom 2'
+    assert outcomes['3']['status'] == 'failed'
+    assert outcomes['3']['error'] == 'no access'
+    assert all(outcome['duration_seconds'] >= 0 for outcome in outcomes.values())
+
+
+def test_own_limits_replace_the_shared_ones_during_runs_only():
+    llm, scheduler = ConcurrencyLimit(8), QuotaScheduler(max_concurrent_total=50)
+    graph = FakeGraph(llm, scheduler)
+    runner = PortfolioRunner(
+        graph,
+        max_concurrent_runs=3,
+        max_concurrent_llm_calls=2,
+        max_concurrent_ga_requests=7,
+        scheduler=scheduler,
+        llm=llm
+    )
+
+    outcomes = asyncio.run(runner.run(['1', '2', '3']))
+
+    assert [outcome['status'] for outcome in outcomes] == ['success'] * 3
+    assert runner.llm.peak == 2
+    assert llm.peak == 0
+    assert llm.limit == 8
+    assert all(active is runner.scheduler for active in graph.schedulers)
+    assert runner.scheduler.max_concurrent_total == 7
+    assert runner.scheduler.quota is scheduler.quota
+    assert scheduler.max_concurrent_total == 50
+    assert QuotaScheduler.active(scheduler) is scheduler
+
+
+def test_shared_limits_are_used_by_default():
+    llm, scheduler = ConcurrencyLimit(3), QuotaScheduler()
+    graph = FakeGraph(llm, scheduler)
+    runner = PortfolioRunner(graph, max_concurrent_runs=4, scheduler=scheduler, llm=llm)
+
+    asyncio.run(runner.run(['1', '2', '3', '4']))
+    assert llm.peak == 3
+    assert all(active is scheduler for active in graph.schedulers)
+
+
+def test_property_ids_from_env(monkeypatch):
+    monkeypatch.delenv('GA_PROPERTY_IDS', raising=False)
+    monkeypatch.setenv('GA_PROPERTY_ID', '42')
+    assert property_ids_from_env() == ['42']
+
+    monkeypatch.setenv('GA_PROPERTY_IDS', ' 1, 2 ,,3')
+    assert property_ids_from_env() == ['1', '2', '3']
@@ -0,0 +1,141 @@
+import asyncio
+import copy
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import yaml
+
+from src.connectors.connector_pool import default_pool
+from src.connectors.synthetic_ga import SyntheticAnalyticsDataClient
+from src.nodes.data_fetching import fetch_ga_data as fetch_module
+
+# Config sections whose files live under a directory of their own
+DIRECTORIES = {
+    'metadata': 'directory',
+    'warehouse': 'directory',
+    'query_plan': 'directory',
+    'spill': 'directory',
+    'export': 'directory',
+}
+
+
+@pytest.fixture
+def run_fetch(tmp_path, monkeypatch):
+    """Run the fetch stage against the synthetic client with its files under tmp_path."""
+    client = SyntheticAnalyticsDataClient()
+    overrides = {}
+    load = yaml.safe_load
+
+    def safe_load(stream):
+        config = load(stream)
+        ga_config = config['ga_config']
+        ga_config['cache']['path'] = str(tmp_path / 'cache' / 'ga_responses.sqlite')
+        for section, key in DIRECTORIES.items():
+            ga_config.setdefault(section, {})[key] = str(tmp_path / section)
+        for section, values in copy.deepcopy(overrides).items():
+            if isinstance(values, dict):
+                ga_config.setdefault(section, {}).update(values)
+            else:
+                ga_config[section] = values
+        return config
+
+    monkeypatch.setattr(fetch_module, 'yaml', SimpleNamespace(safe_load=safe_load))
+    monkeypatch.setattr(default_pool, 'client_factory', lambda credentials: client)
+    # Pooled connectors are keyed by credentials, so every test gets its own
+    monkeypatch.setenv('GA_CLIENT_ID', f"client-{tmp_path.name}")
+    monkeypatch.setenv('GA_CLIENT_SECRET', 'secret')
+    monkeypatch.setenv('GA_REFRESH_TOKEN', 'token')
+
+    def run(**config):
+        overrides.clear()
+        overrides.update(config)
+        client.calls.clear()
+        state = asyncio.run(fetch_module.fetch_ga_data({'property_id': '42'}, {}))
+        return state['ga_data'], dict(client.calls)
+
+    return run
+
+
+def test_fetch_builds_consistent_views(run_fetch):
+    ga_data, calls = run_fetch()
+
+    assert 'error' not in ga_data
+    assert ga_data['row_count'] > 0
+    assert ga_data['metadata']['query_plan'][0] == ga_data['dimension_headers']
+    # Reports of the run travel in batches
+    assert calls['batch_run_reports'] >= 1
+
+    totals = ga_data['current_week']['totals']
+    weekly = ga_data['growth_metrics']['weekly']['sessions']
+    assert weekly['current'] == totals['sessions']
+    assert weekly['previous'] == ga_data['previous_week']['totals']['sessions']
+    assert not weekly['approximate']
+
+    # Synthetic reports of different shapes agree only up to their noise
+    time_range = ga_data['time_ranges']['weekly']['current']
+    index_sessions = ga_data['daily_index'].window(time_range['start'], time_range['end'])['sessions']
+    assert np.isclose(index_sessions, totals['sessions'], rtol=0.05)
+
+    # The cube rolls up the planned report holding the dimension
+    report = next(
+        report for report in ga_data['breakdowns'].values() if 'deviceCategory' in report['dimension_headers']
+    )
+    expected = {}
+    for row in report['rows']:
+        expected[row['deviceCategory']] = expected.get(row['deviceCategory'], 0) + row['sessions']
+    by_device = ga_data['cube'].group_by(['deviceCategory'], ['sessions'])
+    assert {row['deviceCategory']: row['sessions'] for row in by_device} == expected
+
+    assert 'deviceCategory' in ga_data['aggregates'].dimensions
+    assert ga_data['combinations']
+    for rows in ga_data['combinations'].values():
+        sessions = [row['sessions'] for row in rows]
+        assert sessions == sorted(sessions, reverse=True)
+
+
+def test_repeat_runs_are_served_from_the_cache(run_fetch):
+    first, _ = run_fetch()
+    # The second run plans with the cardinalities learned by the first
+    run_fetch()
+    third, calls = run_fetch()
+
+    assert calls.get('run_report', 0) == 0
+    assert calls.get('batch_run_reports', 0) == 0
+    assert calls.get('run_pivot_report', 0) == 0
+    assert calls.get('batch_run_pivot_reports', 0) == 0
+    assert third['row_count'] == first['row_count']
+    assert third['current_week']['totals'] == first['current_week']['totals']
+
+
+def test_truncated_reports_are_streamed(run_fetch):
+    ga_data, _ = run_fetch(row_limit=1000)
+
+    assert 'error' not in ga_data
+    truncated = {
+        key: report for key, report in ga_data['breakdowns'].items()
+        if report['metadata'].get('total_row_count', 0) > report['row_count']
+    }
+    assert 'pagePath' in truncated
+    for report in truncated.values():
+        # Streamed through the row store, keeping the largest rows
+        assert report['row_count'] == 1000
+        assert report['metadata']['spill']['rows'] == report['metadata']['total_row_count']
+        sessions = [row['sessions'] for row in report['rows']]
+        assert sessions == sorted(sessions, reverse=True)
+
+
+def test_export_round_trip(run_fetch, tmp_path):
+    pytest.importorskip('pyarrow')
+    from src.utils.ga_export import load_windows
+
+    ga_data, _ = run_fetch(export={'enabled': True})
+
+    assert 'current_week' in ga_data['exports']
+    windows = load_windows(str(tmp_path / 'export'), '42')
+    assert sorted(windows) == ['current_month', 'current_week', 'previous_month', 'previous_week']
+    current = windows['current_week']
+    assert current['row_count'] == ga_data['current_week']['row_count']
+    assert sorted(current['breakdowns']) == sorted(ga_data['current_week']['breakdowns'])
+    for key, report in current['breakdowns'].items():
+        assert report['row_count'] == ga_data['current_week']['breakdowns'][key]['row_count']
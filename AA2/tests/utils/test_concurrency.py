@@ -0,0 +1,48 @@
+import threading
+import time
+
+import pytest
+
+from src.utils.concurrency import ConcurrencyLimit
+
+
+def _run(limit, calls=6, hold=0.02):
+    def call():
+        with limit.slot():
+            time.sleep(hold)
+
+    threads = [threading.Thread(target=call) for _ in range(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_slots_cap_calls_in_flight():
+    limit = ConcurrencyLimit(2)
+    _run(limit)
+    assert limit.peak == 2
+    assert limit.in_flight == 0
+
+
+def test_set_limit():
+    limit = ConcurrencyLimit(1)
+    limit.set_limit(3)
+    _run(limit)
+    assert limit.peak == 3
+
+    with pytest.raises(ValueError):
+        limit.set_limit(0)
+
+
+def test_replaced_limit_takes_the_slots():
+    shared = ConcurrencyLimit(8)
+    own = ConcurrencyLimit(1)
+
+    with shared.replaced(own):
+        with shared.slot():
+            assert own.in_flight == 1
+            assert shared.in_flight == 0
+    with shared.slot():
+        assert shared.in_flight == 1
+    assert own.peak == 1
@@ -0,0 +1,87 @@
+import os
+from datetime import date, datetime
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from src.utils.ga_export import export_window, export_windows, load_window, load_windows  # noqa: E402
+
+METRIC_HEADERS = [{'name': 'sessions', 'type': 'TYPE_INTEGER'}, {'name': 'bounceRate', 'type': 'TYPE_FLOAT'}]
+RUN_DATE = date(2024, 2, 1)
+
+
+def _window(dimensions, rows):
+    return {
+        'dimension_headers': dimensions,
+        'metric_headers': METRIC_HEADERS,
+        'rows': rows,
+        'row_count': len(rows),
+        'totals': {'sessions': sum(row['sessions'] for row in rows)},
+        'metadata': {'date_range': {'start': datetime(2024, 1, 25), 'end': datetime(2024, 1, 31)}}
+    }
+
+
+def _planned_window():
+    primary = _window(['date', 'deviceCategory'], [
+        {'date': '20240125', 'deviceCategory': 'mobile', 'sessions': 10, 'bounceRate': 0.5},
+        {'date': '20240125', 'deviceCategory': 'desktop', 'sessions': 5, 'bounceRate': 0.25},
+    ])
+    pages = _window(['pagePath'], [
+        {'pagePath': '/', 'sessions': 12, 'bounceRate': 0.4},
+        {'pagePath': '/docs', 'sessions': 3, 'bounceRate': 0.1},
+    ])
+    return {**primary, 'breakdowns': {'date+deviceCategory': primary, 'pagePath': pages}}
+
+
+@pytest.mark.parametrize('format', ['arrow', 'parquet'])
+def test_window_round_trip(tmp_path, format):
+    window = _planned_window()
+    path = export_window(window, str(tmp_path / f"window.{format}"), format)
+    loaded = load_window(path)
+
+    assert list(loaded['rows']) == window['rows']
+    assert loaded['rows'][-1] == window['rows'][-1]
+    assert loaded['row_count'] == 2
+    assert loaded['dimension_headers'] == window['dimension_headers']
+    assert loaded['metric_headers'] == METRIC_HEADERS
+    assert loaded['totals'] == {'sessions': 15}
+    assert loaded['metadata']['date_range']['start'] == '2024-01-25T00:00:00'
+    assert str(loaded['table'].schema.field('sessions').type) == 'int64'
+    assert os.listdir(tmp_path) == [f"window.{format}"]
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        export_window(_planned_window(), str(tmp_path / 'window.csv'), 'csv')
+
+
+def test_windows_round_trip_with_breakdowns(tmp_path):
+    ga_data = {
+        'current_week': _planned_window(),
+        'previous_week': _window(['date'], [{'date': '20240118', 'sessions': 7, 'bounceRate': 0.3}]),
+        'property_id': '123'
+    }
+    exports = export_windows(ga_data, str(tmp_path), '123', run_date=RUN_DATE)
+
+    assert sorted(exports) == ['current_week', 'current_week.pagePath', 'previous_week']
+    assert exports['current_week.pagePath'].endswith(os.path.join('123', '2024-02-01', 'current_week.pagePath.arrow'))
+
+    windows = load_windows(str(tmp_path), '123')
+    assert sorted(windows) == ['current_week', 'previous_week']
+    current = windows['current_week']
+    assert sorted(current['breakdowns']) == ['date+deviceCategory', 'pagePath']
+    assert current['breakdowns']['date+deviceCategory'] is current
+    assert list(current['breakdowns']['pagePath']['rows']) == ga_data['current_week']['breakdowns']['pagePath']['rows']
+    assert 'breakdowns' not in windows['previous_week']
+
+
+def test_load_windows_picks_the_latest_run(tmp_path):
+    export_windows({'current_week': _window(['date'], [{'date': '20240101', 'sessions': 1, 'bounceRate': 0.0}])},
+                   str(tmp_path), '123', run_date=date(2024, 1, 8))
+    export_windows({'current_week': _window(['date'], [{'date': '20240108', 'sessions': 2, 'bounceRate': 0.0}])},
+                   str(tmp_path), '123', run_date=date(2024, 1, 15))
+
+    assert load_windows(str(tmp_path), '123')['current_week']['rows'][0]['sessions'] == 2
+    assert load_windows(str(tmp_path), '123', run_date=date(2024, 1, 8))['current_week']['rows'][0]['sessions'] == 1
+    assert load_windows(str(tmp_path), '456') == {}
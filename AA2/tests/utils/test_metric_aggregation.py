@@ -0,0 +1,51 @@
+import pytest
+
+from src.utils.metric_aggregation import aggregation_kind, aggregation_kinds, combine_rows
+
+
+@pytest.mark.parametrize('metric, kind', [
+    ('sessions', 'sum'),
+    ('screenPageViews', 'sum'),
+    ('totalUsers', 'distinct'),
+    ('activeUsers', 'distinct'),
+    ('bounceRate', 'mean'),
+    ('averageSessionDuration', 'mean'),
+    ('screenPageViewsPerSession', 'mean'),
+    ('eventsPerUser', 'mean'),
+    ('purchaseToViewRate', 'mean'),
+])
+def test_aggregation_kind(metric, kind):
+    assert aggregation_kind(metric) == kind
+
+
+def test_aggregation_kinds():
+    assert aggregation_kinds(['sessions', 'bounceRate']) == {'sessions': 'sum', 'bounceRate': 'mean'}
+
+
+def test_ratios_are_weighted_by_sessions():
+    rows = [
+        {'deviceCategory': 'mobile', 'sessions': 300, 'totalUsers': 200, 'bounceRate': 0.5},
+        {'deviceCategory': 'mobile', 'sessions': 100, 'totalUsers': 80, 'bounceRate': 0.1},
+        {'deviceCategory': 'desktop', 'sessions': 100, 'totalUsers': 90, 'bounceRate': 0.2},
+    ]
+    metrics = ['sessions', 'totalUsers', 'bounceRate']
+
+    by_device = combine_rows(rows, ['deviceCategory'], metrics)
+    assert by_device == [
+        {'deviceCategory': 'mobile', 'sessions': 400, 'totalUsers': 280, 'bounceRate': pytest.approx(0.4)},
+        {'deviceCategory': 'desktop', 'sessions': 100, 'totalUsers': 90, 'bounceRate': pytest.approx(0.2)},
+    ]
+
+    total, = combine_rows(rows, [], metrics)
+    assert total == {'sessions': 500, 'totalUsers': 370, 'bounceRate': pytest.approx(0.36)}
+
+
+def test_rows_without_sessions_or_values():
+    rows = [
+        {'bounceRate': 0.2},
+        {'bounceRate': 0.4, 'sessions': 'n/a'},
+        {'bounceRate': None},
+    ]
+    assert combine_rows(rows, [], ['bounceRate']) == [{'bounceRate': pytest.approx(0.3)}]
+    assert combine_rows([{'sessions': 0, 'bounceRate': 0.5}], [], ['bounceRate']) == [{'bounceRate': 0.0}]
+    assert combine_rows([], [], ['sessions']) == []